@@ -0,0 +1,495 @@
+"""
+End-to-end and micro-benchmarks of editing synthetic books.
+
+Drives FileProcessor (interactive mode, with a reviewer who accepts every
+edit) and BatchProcessor against FakeChatModel, and times loading a book,
+diffing its sections and saving progress on books of 1 KB to 100 MB.
+Results are printed as JSON, so runs can be compared between releases.
+
+Run with: python -m text_edit_ai.benchmarks.book_benchmark
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from text_edit_ai.benchmarks.diff_benchmark import best_time, edit_text, make_paragraph
+from text_edit_ai.benchmarks.fake_chat_model import FakeChatModel
+from text_edit_ai.cli.batch_processor import BatchProcessor
+from text_edit_ai.cli.config_manager import ConfigManager
+from text_edit_ai.cli.file_processor import FileProcessor
+from text_edit_ai.cli.langchain_manager import LangchainManager
+from text_edit_ai.cli.markup_manager import MarkupManager
+from text_edit_ai.cli.paragraph_index import ParagraphIndex
+from text_edit_ai.cli.paragraph_reader import ParagraphReader
+from text_edit_ai.cli.retry_policy import RetryPolicy
+from text_edit_ai.cli.section_classifier import SectionClassifier
+from text_edit_ai.cli.ui_manager import UIManager
+
+SIZE_UNITS = {"KB": 1024, "MB": 1024**2, "GB": 1024**3}
+# Distinct paragraphs a synthetic book cycles through
+PARAGRAPH_POOL = 512
+
+
+def parse_size(text: str) -> int:
+    """Parse a size such as "100KB" or "1MB" into bytes."""
+    text = text.strip().upper()
+    for unit, factor in SIZE_UNITS.items():
+        if text.endswith(unit):
+            return int(float(text[: -len(unit)]) * factor)
+    return int(text)
+
+
+def format_size(size: int) -> str:
+    """Format a size in bytes the way parse_size reads it."""
+    for unit, factor in reversed(SIZE_UNITS.items()):
+        if size >= factor and size % factor == 0:
+            return f"{size // factor}{unit}"
+    return str(size)
+
+
+def make_book(path: str, size: int, seed: int = 0) -> int:
+    """
+    Write a synthetic book of about size bytes, one paragraph per line.
+
+    Returns:
+        The number of paragraphs written
+    """
+    rng = random.Random(seed)
+    pool = [make_paragraph(rng, rng.randint(20, 150)) for _ in range(PARAGRAPH_POOL)]
+    written = 0
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < size:
+            paragraph = pool[count % PARAGRAPH_POOL][: size - written - 2] + "\n\n"
+            f.write(paragraph)
+            written += len(paragraph)
+            count += 1
+    return count
+
+
+class BenchmarkConfigManager(ConfigManager):
+    """ConfigManager writing to its own file, already set up for a fake model."""
+
+    def __init__(self, config_file: str):
+        self.CONFIG_FILE = config_file
+        super().__init__()
+        self.config["DEFAULT"].update({"api_key": "benchmark", "model": "fake"})
+
+
+class FakeLangchainManager(LangchainManager):
+    """
+    LangchainManager talking to a FakeChatModel instead of a provider.
+
+    Records the time to first token and total time of every request, from
+    any thread.
+    """
+
+    def __init__(self, config_manager, fake_model: FakeChatModel, **kwargs):
+        self.fake_model = fake_model
+        self.first_tokens: list[float] = []
+        self.totals: list[float] = []
+        super().__init__(config_manager, **kwargs)
+
+    def get_model(self):
+        return self.fake_model
+
+    def get_timed_response(self, context, writing, on_token=None):
+        response, first_token, total = super().get_timed_response(
+            context, writing, on_token
+        )
+        if first_token is not None:
+            self.first_tokens.append(first_token)
+        self.totals.append(total)
+        return response, first_token, total
+
+
+class ScriptedUIManager(UIManager):
+    """
+    A reviewer who continues and accepts every section, printing nothing.
+
+    Records how long the reviewer waited for the first token and for all of
+    every edit, from asking for it, which prefetching shortens. With
+    view_markup, the markup of every edit is rendered before accepting, and
+    think_time seconds are spent reading each edit.
+    """
+
+    def __init__(self, view_markup: bool = False, think_time: float = 0.0):
+        self.view_markup = view_markup
+        self.think_time = think_time
+        self.first_tokens: list[float] = []
+        self.totals: list[float] = []
+
+    def get_initial_action(self, section: str) -> str:
+        return "continue"
+
+    def get_ai_action(self, edited_text, get_diff, streamed=False) -> str:
+        if self.view_markup:
+            get_diff()
+        if self.think_time:
+            time.sleep(self.think_time)
+        return "accept"
+
+    def start_stream(self) -> None:
+        pass
+
+    def display_token(self, token: str) -> None:
+        pass
+
+    def end_stream(self, first_token: float | None, total: float) -> None:
+        if first_token is not None:
+            self.first_tokens.append(first_token)
+        self.totals.append(total)
+
+    def show_progress(self, done: int, total: int, label: str | None = None) -> None:
+        pass
+
+    def show_completion_message(self, summary: str | None = None) -> None:
+        pass
+
+
+def percentile(values: list[float], fraction: float) -> float | None:
+    """Get a percentile of values by the nearest-rank method."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_end_to_end(
+    book: str,
+    mode: str = "interactive",
+    ttft: float = 0.05,
+    tokens_per_second: float | None = 500.0,
+    error_rate: float = 0.0,
+    prefetch: int = 2,
+    max_workers: int = 4,
+    view_markup: bool = True,
+    think_time: float = 0.0,
+    file_prompt: str = "Fix typos and tighten the prose.",
+    seed: int = 0,
+) -> dict:
+    """
+    Edit a whole book against a fake model and measure the run.
+
+    Args:
+        book: Path of the book to edit
+        mode: "interactive" (FileProcessor) or "batch" (BatchProcessor)
+        ttft: The fake model's time to first token, in seconds
+        tokens_per_second: The fake model's streaming rate
+        error_rate: Fraction of requests that fail and are retried
+        prefetch: Prefetch depth in interactive mode
+        max_workers: Concurrent requests in batch mode
+        view_markup: Render the markup of every edit in interactive mode
+        think_time: Seconds the reviewer reads each edit in interactive mode
+        file_prompt: The file prompt sent with every section
+        seed: Seed for the injected errors
+
+    Returns:
+        The measurements of the run
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config_manager = BenchmarkConfigManager(os.path.join(temp_dir, "bench.cfg"))
+        config_manager.get_file_config(book)["file_prompt"] = file_prompt
+        model = FakeChatModel(ttft, tokens_per_second, error_rate, seed=seed)
+        langchain_manager = FakeLangchainManager(
+            config_manager,
+            model,
+            retry_policy=RetryPolicy(max_attempts=10, base_delay=0.01, max_delay=0.1),
+        )
+        ui_manager = ScriptedUIManager(view_markup, think_time)
+        # Synthetic books repeat their paragraphs; every one should reach the
+        # model rather than reuse an earlier edit
+        classifier = SectionClassifier(enabled=False)
+
+        if mode == "batch":
+            processor = BatchProcessor(
+                config_manager,
+                langchain_manager,
+                book,
+                max_workers=max_workers,
+                classifier=classifier,
+            )
+        else:
+            processor = FileProcessor(
+                config_manager,
+                langchain_manager,
+                book,
+                prefetch_depth=prefetch,
+                classifier=classifier,
+            )
+        processor.ui_manager = ui_manager
+
+        start = time.perf_counter()
+        try:
+            processor.process()
+        finally:
+            elapsed = time.perf_counter() - start
+            # Leave the book as it was, for the next run
+            for path in (
+                processor.output_file,
+                processor.output_file + ".journal",
+                ParagraphIndex.index_path(book),
+            ):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    paragraphs = processor.session_manager.current_section
+    return {
+        "mode": mode,
+        "paragraphs": paragraphs,
+        "seconds": elapsed,
+        "paragraphs_per_second": paragraphs / elapsed if elapsed else None,
+        "output_tokens_per_second": model.output_tokens / elapsed if elapsed else None,
+        "requests": model.requests,
+        "injected_errors": model.errors,
+        "error_rate": model.errors / model.requests if model.requests else 0.0,
+        "request_ttft_p50_s": percentile(langchain_manager.first_tokens, 0.5),
+        "request_ttft_p95_s": percentile(langchain_manager.first_tokens, 0.95),
+        "request_p50_s": percentile(langchain_manager.totals, 0.5),
+        "request_p95_s": percentile(langchain_manager.totals, 0.95),
+        # Interactive mode only: the waits the reviewer actually saw
+        "shown_ttft_p50_s": percentile(ui_manager.first_tokens, 0.5),
+        "shown_ttft_p95_s": percentile(ui_manager.first_tokens, 0.95),
+        "shown_wait_mean_s": (
+            statistics.fmean(ui_manager.totals) if ui_manager.totals else None
+        ),
+        "model": {
+            "ttft_s": ttft,
+            "tokens_per_second": tokens_per_second,
+            "error_rate": error_rate,
+        },
+    }
+
+
+def bench_loading(book: str, repeat: int) -> dict:
+    """Time scanning a book into paragraphs, without and with its index."""
+    index_path = ParagraphIndex.index_path(book)
+
+    def scan():
+        if os.path.exists(index_path):
+            os.remove(index_path)
+        reader = ParagraphReader(book)
+        try:
+            return len(reader)
+        finally:
+            reader.close()
+
+    def open_indexed():
+        # Resuming: jump straight to the last paragraph
+        reader = ParagraphReader(book)
+        try:
+            return reader[len(reader) - 1]
+        finally:
+            reader.close()
+
+    scan_s = best_time(scan, repeat)
+    scan()  # leave a fresh index behind
+    indexed_s = best_time(open_indexed, repeat)
+    os.remove(index_path)
+    return {"scan_s": scan_s, "indexed_open_s": indexed_s}
+
+
+def bench_diff(book: str, repeat: int, samples: int, max_bytes: int, seed: int):
+    """
+    Time generate_diff on sampled sections of a book, and on the whole book
+    if it is no larger than max_bytes.
+    """
+    rng = random.Random(seed)
+    reader = ParagraphReader(book)
+    try:
+        count = len(reader)
+        indices = sorted(rng.sample(range(count), min(samples, count)))
+        sections = [reader[i] for i in indices]
+    finally:
+        reader.close()
+    edits = [edit_text(rng, section, 0.05) for section in sections]
+
+    def diff_sections():
+        # A fresh manager each time, so nothing is served from its memo
+        markup_manager = MarkupManager()
+        for section, edited in zip(sections, edits):
+            markup_manager.generate_diff(section, edited)
+
+    result = {
+        "section_mean_s": best_time(diff_sections, repeat) / len(sections),
+        "book_s": None,
+    }
+
+    if os.path.getsize(book) <= max_bytes:
+        with open(book, encoding="utf-8") as f:
+            original = f.read()
+        edited = edit_text(rng, original, 0.05)
+        result["book_s"] = best_time(
+            lambda: MarkupManager().generate_diff(original, edited), repeat
+        )
+    return result
+
+
+def bench_save_config(book: str, paragraphs: int, repeat: int) -> dict:
+    """
+    Time saving progress after every paragraph of a book, as an editing
+    session does, and a single forced write of the config file.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config_manager = BenchmarkConfigManager(os.path.join(temp_dir, "bench.cfg"))
+        file_config = config_manager.get_file_config(book)
+
+        def save_all():
+            for i in range(paragraphs):
+                file_config["current_section"] = str(i + 1)
+                config_manager.save_config()
+            config_manager.flush()
+
+        def write():
+            file_config["current_section"] = str(time.perf_counter_ns())
+            config_manager._dirty = True
+            config_manager.flush()
+
+        session_s = best_time(save_all, repeat)
+        write_s = best_time(write, repeat)
+
+    return {
+        "session_s": session_s,
+        "per_save_s": session_s / paragraphs,
+        "write_s": write_s,
+    }
+
+
+def run(args) -> dict:
+    """Run the selected benchmarks and collect their results."""
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "books": [],
+        "end_to_end": [],
+    }
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if not args.skip_micro:
+            for size in args.sizes:
+                book = os.path.join(temp_dir, f"book_{format_size(size)}.txt")
+                paragraphs = make_book(book, size, args.seed)
+                print(f"Benchmarking {format_size(size)} book", file=sys.stderr)
+                results["books"].append(
+                    {
+                        "size": format_size(size),
+                        "bytes": os.path.getsize(book),
+                        "paragraphs": paragraphs,
+                        "loading": bench_loading(book, args.repeat),
+                        "generate_diff": bench_diff(
+                            book,
+                            args.repeat,
+                            args.diff_samples,
+                            parse_size(args.max_book_diff),
+                            args.seed,
+                        ),
+                        "save_config": bench_save_config(book, paragraphs, args.repeat),
+                    }
+                )
+                os.remove(book)
+
+        if not args.skip_end_to_end:
+            book = os.path.join(temp_dir, "end_to_end.txt")
+            make_book(book, parse_size(args.e2e_size), args.seed)
+            for mode in args.modes:
+                print(f"Benchmarking {mode} editing", file=sys.stderr)
+                results["end_to_end"].append(
+                    run_end_to_end(
+                        book,
+                        mode,
+                        ttft=args.ttft,
+                        tokens_per_second=args.tokens_per_second or None,
+                        error_rate=args.error_rate,
+                        prefetch=args.prefetch,
+                        max_workers=args.max_workers,
+                        think_time=args.think_time,
+                        seed=args.seed,
+                    )
+                )
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark editing synthetic books end to end"
+    )
+    parser.add_argument(
+        "--sizes",
+        type=parse_size,
+        nargs="+",
+        default=[parse_size(s) for s in ("1KB", "100KB", "10MB", "100MB")],
+        help="Book sizes for the micro-benchmarks (e.g. 1KB 10MB)",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement")
+    parser.add_argument(
+        "--diff-samples", type=int, default=50, help="Sections diffed per book"
+    )
+    parser.add_argument(
+        "--max-book-diff",
+        default="100KB",
+        help="Largest book also diffed as a whole (default 100KB)",
+    )
+    parser.add_argument(
+        "--e2e-size", default="20KB", help="Size of the book edited end to end"
+    )
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        choices=("interactive", "batch"),
+        default=["interactive", "batch"],
+        help="Processors to run end to end",
+    )
+    parser.add_argument(
+        "--ttft", type=float, default=0.05, help="Fake model time to first token (s)"
+    )
+    parser.add_argument(
+        "--tokens-per-second",
+        type=float,
+        default=500.0,
+        help="Fake model streaming rate (0 for instant)",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of fake model requests that fail",
+    )
+    parser.add_argument("--prefetch", type=int, default=2, help="Interactive prefetch")
+    parser.add_argument(
+        "--max-workers", type=int, default=4, help="Batch concurrent requests"
+    )
+    parser.add_argument(
+        "--think-time",
+        type=float,
+        default=0.0,
+        help="Seconds the interactive reviewer reads each edit",
+    )
+    parser.add_argument(
+        "--skip-micro", action="store_true", help="Skip the micro-benchmarks"
+    )
+    parser.add_argument(
+        "--skip-end-to-end", action="store_true", help="Skip the end-to-end runs"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    args = parser.parse_args()
+
+    results = run(args)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
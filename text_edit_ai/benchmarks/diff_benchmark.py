@@ -0,0 +1,132 @@
+"""
+Benchmark of MyersDiff against difflib.SequenceMatcher.
+
+Diffs synthetic prose sections of increasing size, edited at each of a few
+rates from a copy editor's light touch to a full rewrite, and reports the
+time per diff for both engines.
+
+Run with: python -m text_edit_ai.benchmarks.diff_benchmark
+"""
+
+import argparse
+import difflib
+import itertools
+import json
+import random
+import time
+from text_edit_ai.cli.diff_engine import MyersDiff
+from text_edit_ai.cli.markup_manager import MarkupManager
+
+WORDS = (
+    "the a of and to in was he she it that his her with had for on as at by "
+    "said from they but were all there been one would have when which could "
+    "into out no little time very about over only now upon more some any "
+    "house door night morning window garden letter river voice silence "
+    "walked looked turned stood waited whispered remembered answered"
+).split()
+
+
+def make_paragraph(rng: random.Random, words: int = 100) -> str:
+    """Make a paragraph of random prose."""
+    sentences = []
+    while words > 0:
+        length = min(words, rng.randint(6, 20))
+        sentence = " ".join(rng.choice(WORDS) for _ in range(length))
+        sentences.append(sentence.capitalize() + rng.choice(".,;!?"))
+        words -= length
+    return " ".join(sentences)
+
+
+def edit_text(rng: random.Random, text: str, rate: float) -> str:
+    """Replace, delete or insert roughly rate of the words in text."""
+    words = []
+    for word in text.split(" "):
+        roll = rng.random()
+        if roll < rate / 3:
+            words.append(rng.choice(WORDS))
+        elif roll < 2 * rate / 3:
+            continue
+        elif roll < rate:
+            words.extend([word, rng.choice(WORDS)])
+        else:
+            words.append(word)
+    return " ".join(words)
+
+
+def best_time(fn, repeat: int) -> float:
+    """Get the fastest of repeat runs of fn, in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run(paragraph_counts: list[int], rates: list[float], repeat: int, seed: int):
+    """Run the benchmark and return one result per edit rate and section size."""
+    rng = random.Random(seed)
+    results = []
+    for rate, count in itertools.product(rates, paragraph_counts):
+        original = "\n\n".join(make_paragraph(rng) for _ in range(count))
+        edited = edit_text(rng, original, rate)
+        a = MarkupManager._tokenize(original)
+        b = MarkupManager._tokenize(edited)
+
+        difflib_time = best_time(
+            lambda: difflib.SequenceMatcher(None, a, b).get_opcodes(), repeat
+        )
+        myers_time = best_time(lambda: MyersDiff(a, b).get_opcodes(), repeat)
+        results.append(
+            {
+                "rate": rate,
+                "paragraphs": count,
+                "tokens": len(a),
+                "difflib_s": difflib_time,
+                "myers_s": myers_time,
+                "speedup": difflib_time / myers_time,
+            }
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the markup diff engine")
+    parser.add_argument(
+        "--paragraphs",
+        type=int,
+        nargs="+",
+        default=[1, 5, 20, 50, 100],
+        help="Section sizes to benchmark, in paragraphs of about 100 words",
+    )
+    parser.add_argument(
+        "--rates",
+        type=float,
+        nargs="+",
+        default=[0.05, 0.2, 0.5, 1.0],
+        help="Fractions of words edited, 1.0 being a full rewrite",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.paragraphs, args.rates, args.repeat, args.seed)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(
+        f"{'rate':>5} {'paragraphs':>10} {'tokens':>8} {'difflib':>10} {'myers':>10} {'speedup':>8}"
+    )
+    for r in results:
+        print(
+            f"{r['rate']:>5} {r['paragraphs']:>10} {r['tokens']:>8} "
+            f"{r['difflib_s'] * 1000:>8.1f}ms {r['myers_s'] * 1000:>8.1f}ms "
+            f"{r['speedup']:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
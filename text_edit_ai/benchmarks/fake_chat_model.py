@@ -0,0 +1,133 @@
+"""
+Deterministic stand-in for a streaming chat model.
+
+Behaves like a LangChain chat model as far as LangchainManager is concerned:
+stream() yields chunks with content and, on the last chunk, usage_metadata.
+The first chunk arrives after a fixed time to first token and the rest at a
+fixed rate, and a seeded fraction of requests fail with a rate limit error,
+so runs against it are repeatable.
+"""
+
+import random
+import re
+import threading
+import time
+from collections.abc import Callable, Iterator
+from text_edit_ai.cli.token_estimator import TokenEstimator
+
+WRITING_PATTERN = re.compile(r"<writing>(.*)</writing>", re.DOTALL)
+CHUNK_PATTERN = re.compile(r"\S+\s*|\s+")
+
+
+class FakeChunk:
+    """A streamed piece of a response."""
+
+    __slots__ = ("content", "usage_metadata")
+
+    def __init__(self, content: str, usage_metadata: dict | None = None):
+        self.content = content
+        self.usage_metadata = usage_metadata
+
+
+class RateLimitError(Exception):
+    """An injected failure, classified as transient like a provider's 429."""
+
+    status_code = 429
+
+
+def light_edit(text: str) -> str:
+    """
+    Make a small, deterministic copy edit of text.
+
+    Drops every tenth word of each paragraph and capitalizes every seventh,
+    so diffs of the edit have a realistic mix of kept and changed runs.
+    """
+    paragraphs = []
+    for paragraph in text.split("\n\n"):
+        words = []
+        for i, word in enumerate(paragraph.split(" ")):
+            if i % 10 == 9:
+                continue
+            words.append(word.capitalize() if i % 7 == 6 else word)
+        paragraphs.append(" ".join(words))
+    return "\n\n".join(paragraphs)
+
+
+# Edits the fakes can make, by name
+TRANSFORMS: dict[str, Callable[[str], str]] = {
+    "echo": lambda text: text,
+    "upper": str.upper,
+    "light": light_edit,
+}
+
+
+class FakeChatModel:
+    """
+    In-process chat model with configurable latency, speed and error rate.
+
+    Args:
+        ttft: Seconds before the first chunk of each response
+        tokens_per_second: Rate at which chunks (about one word each) follow,
+            or None to send them all at once
+        error_rate: Fraction of requests that fail with a RateLimitError
+        transform: Function computing the edit of the text in <writing>
+        seed: Seed for choosing which requests fail
+    """
+
+    def __init__(
+        self,
+        ttft: float = 0.0,
+        tokens_per_second: float | None = None,
+        error_rate: float = 0.0,
+        transform: Callable[[str], str] = light_edit,
+        seed: int = 0,
+    ):
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.transform = transform
+        self.requests = 0
+        self.errors = 0
+        self.output_tokens = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.sleep = time.sleep
+
+    def stream(self, messages, **kwargs) -> Iterator[FakeChunk]:
+        """Stream the edit of the writing in the last message."""
+        with self._lock:
+            self.requests += 1
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        if failed:
+            raise RateLimitError("429 Too Many Requests (injected)")
+
+        prompt = "\n".join(str(message.content) for message in messages)
+        match = WRITING_PATTERN.search(str(messages[-1].content))
+        edited = self.transform(match.group(1) if match else "")
+        chunks = CHUNK_PATTERN.findall(edited)
+
+        if self.ttft:
+            self.sleep(self.ttft)
+        start = time.perf_counter()
+        for i, chunk in enumerate(chunks):
+            if self.tokens_per_second and i:
+                # Sleep until the chunk is due, so sleep overhead doesn't add up
+                delay = start + i / self.tokens_per_second - time.perf_counter()
+                if delay > 0:
+                    self.sleep(delay)
+            yield FakeChunk(chunk)
+
+        input_tokens = TokenEstimator.estimate(prompt)
+        output_tokens = TokenEstimator.estimate(edited)
+        with self._lock:
+            self.output_tokens += output_tokens
+        yield FakeChunk(
+            "",
+            {
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+        )
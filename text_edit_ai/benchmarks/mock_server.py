@@ -0,0 +1,367 @@
+"""
+Local OpenAI-compatible chat completions server for offline testing.
+
+Serves POST /v1/chat/completions, streamed as server-sent events or as a
+single JSON response, with configurable latency, streaming rate and
+injected 429 and 500 errors, and edits the text in <writing> with a
+deterministic transform. Point an OpenAI client at it to exercise the real
+HTTP and streaming code paths, retries and concurrency without a network:
+
+    python -m text_edit_ai.benchmarks.mock_server --port 8000 --ttft 0.3
+    OPENAI_BASE_URL=http://127.0.0.1:8000/v1 uv run -m text_edit_ai.cli book.txt --batch
+
+with the model set to an OpenAI model name such as gpt-4o-mini (which needs
+the langchain-openai package) and any API key. GET /stats reports the
+number of requests and injected errors.
+
+Whether a request fails and how long it waits are drawn from a generator
+seeded with the request body and the number of times that body was seen,
+so a run is reproducible however requests interleave, and a retried
+request gets a fresh draw.
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from text_edit_ai.benchmarks.fake_chat_model import (
+    CHUNK_PATTERN,
+    TRANSFORMS,
+    WRITING_PATTERN,
+)
+from text_edit_ai.cli.token_estimator import TokenEstimator
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+
+class MockServer:
+    """
+    OpenAI-compatible chat completions server running in a background thread.
+
+    Args:
+        host: The address to listen on
+        port: The port to listen on (0 picks a free one)
+        ttft: Median seconds before the first token
+        latency: How the time to first token varies: "fixed", "uniform"
+            (between 0 and 2 * ttft) or "lognormal" (with sigma spread)
+        spread: Sigma of the lognormal distribution
+        tokens_per_second: Rate at which chunks follow, or None for all at once
+        rate_limit_rate: Fraction of requests answered with 429
+        server_error_rate: Fraction of requests answered with 500
+        transform: Name of the edit to make ("echo", "upper" or "light")
+        seed: Seed for the latencies and injected errors
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        ttft: float = 0.0,
+        latency: str = "fixed",
+        spread: float = 0.5,
+        tokens_per_second: float | None = None,
+        rate_limit_rate: float = 0.0,
+        server_error_rate: float = 0.0,
+        transform: str = "light",
+        seed: int = 0,
+    ):
+        if latency not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {latency}")
+        self.ttft = ttft
+        self.latency = latency
+        self.spread = spread
+        self.tokens_per_second = tokens_per_second
+        self.rate_limit_rate = rate_limit_rate
+        self.server_error_rate = server_error_rate
+        self.transform = TRANSFORMS[transform]
+        self.seed = seed
+        self.stats: Counter[str] = Counter()
+        self._seen: Counter[bytes] = Counter()
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.mock = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """Base URL of the API, for OPENAI_BASE_URL."""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockServer":
+        """Start serving in a background thread."""
+        self._thread = threading.Thread(
+            target=self.httpd.serve_forever,
+            # Poll often, so stop() returns promptly
+            kwargs={"poll_interval": 0.05},
+            name="mock-server",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "MockServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def draw(self, body: bytes) -> random.Random:
+        """Get the random generator deciding the fate of a request."""
+        digest = hashlib.sha256(body).digest()
+        with self._lock:
+            self._seen[digest] += 1
+            attempt = self._seen[digest]
+        return random.Random(f"{self.seed}:{digest.hex()}:{attempt}")
+
+    def first_token_delay(self, rng: random.Random) -> float:
+        """Draw the time to first token of a request."""
+        if not self.ttft or self.latency == "fixed":
+            return self.ttft
+        if self.latency == "uniform":
+            return rng.uniform(0, 2 * self.ttft)
+        return rng.lognormvariate(0, self.spread) * self.ttft
+
+    def count(self, key: str) -> None:
+        """Add one to a statistic."""
+        with self._lock:
+            self.stats[key] += 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Request handler for MockServer."""
+
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def mock(self) -> MockServer:
+        return self.server.mock
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "mock"}]})
+        elif self.path.rstrip("/") == "/stats":
+            self._send_json(200, dict(self.mock.stats))
+        else:
+            self._send_error(404, "Not found", "not_found_error")
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_error(404, "Not found", "not_found_error")
+            return
+
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            request = json.loads(body)
+            messages = request["messages"]
+        except (ValueError, KeyError, TypeError):
+            self._send_error(400, "Invalid request body", "invalid_request_error")
+            return
+
+        mock = self.mock
+        mock.count("requests")
+        rng = mock.draw(body)
+        roll = rng.random()
+        if roll < mock.rate_limit_rate:
+            mock.count("rate_limited")
+            self._send_error(
+                429, "Rate limit reached (injected)", "rate_limit_error", retry_after=1
+            )
+            return
+        if roll < mock.rate_limit_rate + mock.server_error_rate:
+            mock.count("server_errors")
+            self._send_error(500, "Internal server error (injected)", "server_error")
+            return
+
+        prompt = "\n".join(_text(message.get("content")) for message in messages)
+        last = _text(messages[-1].get("content")) if messages else ""
+        match = WRITING_PATTERN.search(last)
+        edited = mock.transform(match.group(1) if match else last)
+        usage = {
+            "prompt_tokens": TokenEstimator.estimate(prompt),
+            "completion_tokens": TokenEstimator.estimate(edited),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        completion_id = f"chatcmpl-mock{mock.stats['requests']}"
+        model = request.get("model", "mock")
+
+        time.sleep(mock.first_token_delay(rng))
+        if request.get("stream"):
+            include_usage = (request.get("stream_options") or {}).get("include_usage")
+            self._stream(completion_id, model, edited, usage if include_usage else None)
+        else:
+            self._send_json(
+                200,
+                {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": edited},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": usage,
+                },
+            )
+        mock.count("completed")
+
+    def _stream(self, completion_id, model, edited, usage):
+        """Send the edit as server-sent events, about one word per chunk."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def send(choices, usage=None):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": choices,
+            }
+            if usage:
+                chunk["usage"] = usage
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+
+        def delta(content=None, finish_reason=None, **fields):
+            if content is not None:
+                fields["content"] = content
+            return [{"index": 0, "delta": fields, "finish_reason": finish_reason}]
+
+        send(delta("", role="assistant"))
+        start = time.perf_counter()
+        rate = self.mock.tokens_per_second
+        for i, piece in enumerate(CHUNK_PATTERN.findall(edited)):
+            if rate and i:
+                # Sleep until the chunk is due, so sleep overhead doesn't add up
+                wait = start + i / rate - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+            send(delta(piece))
+        send(delta(finish_reason="stop"))
+        if usage:
+            # As OpenAI does with stream_options.include_usage
+            send([], usage)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status, message, error_type, retry_after=None):
+        headers = {"Retry-After": str(retry_after)} if retry_after else None
+        self._send_json(
+            status,
+            {"error": {"message": message, "type": error_type, "code": None}},
+            headers,
+        )
+
+
+def _text(content) -> str:
+    """Get the text of a message's content, which may be a list of parts."""
+    if isinstance(content, list):
+        return "".join(
+            part.get("text", "") for part in content if isinstance(part, dict)
+        )
+    return content or ""
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve a mock OpenAI-compatible chat completions API"
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    parser.add_argument(
+        "--ttft", type=float, default=0.2, help="Median time to first token (s)"
+    )
+    parser.add_argument(
+        "--latency",
+        choices=LATENCY_DISTRIBUTIONS,
+        default="lognormal",
+        help="Distribution of the time to first token (default: lognormal)",
+    )
+    parser.add_argument(
+        "--spread", type=float, default=0.5, help="Sigma of the lognormal latency"
+    )
+    parser.add_argument(
+        "--tokens-per-second",
+        type=float,
+        default=100.0,
+        help="Streaming rate (0 for instant)",
+    )
+    parser.add_argument(
+        "--rate-limit-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of requests answered with 429",
+    )
+    parser.add_argument(
+        "--server-error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of requests answered with 500",
+    )
+    parser.add_argument(
+        "--transform",
+        choices=sorted(TRANSFORMS),
+        default="light",
+        help="Edit made to the text in <writing> (default: light)",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    server = MockServer(
+        args.host,
+        args.port,
+        ttft=args.ttft,
+        latency=args.latency,
+        spread=args.spread,
+        tokens_per_second=args.tokens_per_second or None,
+        rate_limit_rate=args.rate_limit_rate,
+        server_error_rate=args.server_error_rate,
+        transform=args.transform,
+        seed=args.seed,
+    )
+    print(f"Serving on {server.url} (Ctrl-C to stop)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(json.dumps(dict(server.stats)))
+
+
+if __name__ == "__main__":
+    main()
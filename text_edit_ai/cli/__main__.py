@@ -1,7 +1,17 @@
+import glob
 import os
+import re
 from .config_manager import ConfigManager
 from .langchain_manager import LangchainManager
 from .file_processor import FileProcessor
+from .batch_processor import BatchProcessor
+from .response_cache import ResponseCache
+from .output_writer import OutputWriter
+from .markup_manager import MarkupManager
+from .session_manager import SessionManager
+from .telemetry import Telemetry
+from .section_classifier import SectionClassifier
+from .profiler import Profiler
 from .colors import Colors
 import argparse
 
@@ -16,14 +26,134 @@ def setup_terminal_colors(config_manager):
     Colors.initialize(config_manager)
 
 
+# Files a run leaves next to the book, never picked up from directories or globs
+GENERATED_SUFFIXES = ("_edited.txt", ".idx", ".journal", ".tmp")
+BOOK_EXTENSIONS = (".txt", ".md")
+
+
+def expand_paths(paths: list[str]) -> list[str]:
+    """
+    Expand the file arguments into the list of books to edit.
+
+    Directories contribute the .txt and .md files directly inside them and
+    glob patterns the files they match; both skip the files a run generates.
+    Plain paths are kept as given. Expanded files are in natural order (so
+    chapter2 comes before chapter10) and each file is listed only once.
+
+    Args:
+        paths: The file, directory and glob arguments
+
+    Returns:
+        The paths of the files to edit
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            matches = [
+                os.path.join(path, name)
+                for name in os.listdir(path)
+                if name.lower().endswith(BOOK_EXTENSIONS)
+            ]
+        elif glob.has_magic(path):
+            matches = glob.glob(path)
+        else:
+            files.append(path)
+            continue
+        matches = [
+            match
+            for match in matches
+            if os.path.isfile(match) and not match.endswith(GENERATED_SUFFIXES)
+        ]
+        files.extend(sorted(matches, key=_natural_key))
+
+    unique = {}
+    for file in files:
+        unique.setdefault(os.path.normpath(file), file)
+    return list(unique.values())
+
+
+def _natural_key(path: str) -> list:
+    """Sort key comparing the numbers in a path by value."""
+    return [
+        int(part) if part.isdigit() else part.lower()
+        for part in re.split(r"(\d+)", path)
+    ]
+
+
+def edit_files(args, config_manager, langchain_manager, files: list[str]) -> None:
+    """Edit the files, interactively or in batch mode, as the arguments say."""
+    # A token budget switches to automatic section sizing
+    paragraphs_per_section = 0 if args.token_budget else 1
+    token_budget = args.token_budget or SessionManager.TOKEN_BUDGET
+    telemetry = Telemetry(args.metrics_file)
+    # Shared, so a section repeated in another file reuses its edit
+    classifier = SectionClassifier(enabled=not args.no_fast_path)
+
+    if args.batch:
+        processors = [
+            BatchProcessor(
+                config_manager,
+                langchain_manager,
+                file,
+                paragraphs_per_section=paragraphs_per_section,
+                token_budget=token_budget,
+                max_workers=args.max_workers,
+                fsync=args.fsync,
+                diff_file=args.diff_file,
+                diff_format=args.diff_format,
+                telemetry=telemetry,
+                classifier=classifier,
+            )
+            for file in files
+        ]
+        BatchProcessor.process_files(processors, args.max_workers)
+    else:
+        candidate_models = [
+            model.strip()
+            for model in (args.candidate_models or "").split(",")
+            if model.strip()
+        ]
+        for file in files:
+            if len(files) > 1:
+                print(f"Editing {file}")
+            processor = FileProcessor(
+                config_manager,
+                langchain_manager,
+                file,
+                paragraphs_per_section=paragraphs_per_section,
+                token_budget=token_budget,
+                prefetch_depth=args.prefetch,
+                fsync=args.fsync,
+                markup_format=args.markup_format,
+                diff_file=args.diff_file,
+                diff_format=args.diff_format,
+                telemetry=telemetry,
+                candidates=args.candidates,
+                candidate_models=candidate_models,
+                classifier=classifier,
+            )
+            if not processor.process():
+                break
+
+    telemetry.close()
+    skipped = classifier.describe()
+    if skipped:
+        print(skipped)
+
+
 def main():
     """Main entry point for the CLI."""
     config_manager = ConfigManager()
     setup_terminal_colors(config_manager)
 
     parser = argparse.ArgumentParser(description="AI Book Editor")
-    parser.add_argument("file", nargs="?", help="The book file to edit")
-    parser.add_argument("--prompt", help="Set the file prompt for this file")
+    parser.add_argument(
+        "files",
+        nargs="*",
+        metavar="file",
+        help="The book files to edit; directories and glob patterns are expanded",
+    )
+    parser.add_argument("--prompt", help="Set the file prompt for these files")
     parser.add_argument(
         "--prompt-file", help="Path to a file containing the prompt to use"
     )
@@ -33,6 +163,103 @@ def main():
         action="store_true",
         help="Specific name of the model (e.g. gemini-2.0-flash)",
     )
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        help="Size sections automatically to about this many tokens each",
+    )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=2,
+        help="Number of upcoming sections to edit in the background (0 disables)",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Edit the whole file without prompts, accepting every AI edit",
+    )
+    parser.add_argument(
+        "--patch",
+        action="store_true",
+        help="Ask the model for find/replace edits instead of the full revised "
+        "text, falling back to the full text when they don't apply",
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=4,
+        help="Maximum number of concurrent model requests in batch mode",
+    )
+    parser.add_argument(
+        "--fsync",
+        choices=OutputWriter.FSYNC_POLICIES,
+        default="close",
+        help="When to sync the output file to disk (default: close)",
+    )
+    parser.add_argument(
+        "--markup-format",
+        choices=MarkupManager.FORMATS,
+        default="ansi",
+        help="Format of the markup view of changes (default: ansi)",
+    )
+    parser.add_argument(
+        "--diff-file", help="Append the diff of every accepted edit to this file"
+    )
+    parser.add_argument(
+        "--diff-format",
+        choices=MarkupManager.FORMATS,
+        default="unified",
+        help="Format of the diffs written to --diff-file (default: unified)",
+    )
+    parser.add_argument(
+        "--candidates",
+        type=int,
+        default=1,
+        help="Number of alternative edits requested in parallel for a section "
+        "prompt, at a spread of temperatures (default: 1)",
+    )
+    parser.add_argument(
+        "--candidate-models",
+        help="Comma-separated models to request one alternative edit each from "
+        "for a section prompt, instead of varying the temperature",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        help="Append per-section performance records to this JSONL file",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile the session (cProfile, tracemalloc and sampled stacks)",
+    )
+    parser.add_argument(
+        "--profile-dir",
+        default=".",
+        help="Directory for the --profile output files (default: current)",
+    )
+    parser.add_argument(
+        "--no-fast-path",
+        action="store_true",
+        help="Send trivial and repeated sections to the model too",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the on-disk response cache",
+    )
+    parser.add_argument(
+        "--clear-cache", action="store_true", help="Clear the response cache"
+    )
+    parser.add_argument(
+        "--cache-stats", action="store_true", help="Show response cache statistics"
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=ResponseCache.MAX_BYTES // (1024 * 1024),
+        help="Maximum size of the response cache in MB",
+    )
 
     args = parser.parse_args()
 
@@ -44,21 +271,50 @@ def main():
         config_manager.set_model(args.model)
         return
 
-    langchain_manager = LangchainManager(config_manager)
+    cache_size = args.cache_size * 1024 * 1024
+    if args.clear_cache or args.cache_stats:
+        cache = ResponseCache(max_bytes=cache_size)
+        if args.clear_cache:
+            cache.clear()
+            print("Response cache cleared.")
+        if args.cache_stats:
+            print(cache.describe())
+        return
+
+    files = expand_paths(args.files)
 
-    if args.prompt and args.file:
-        config_manager.set_file_prompt(args.file, args.prompt)
-        print(f"File prompt set to: '{args.prompt}' for {args.file}")
+    for file in files:
+        if args.prompt:
+            config_manager.set_file_prompt(file, args.prompt)
+            print(f"File prompt set to: '{args.prompt}' for {file}")
 
-    if args.prompt_file and args.file:
-        config_manager.set_file_prompt_from_file(args.file, args.prompt_file)
+        if args.prompt_file:
+            config_manager.set_file_prompt_from_file(file, args.prompt_file)
 
-    if not args.file:
+    if not files:
         print("Please specify a file to edit.")
         return
 
-    processor = FileProcessor(config_manager, langchain_manager, args.file)
-    processor.process()
+    cache = None
+    if not args.no_cache:
+        cache = ResponseCache(max_bytes=cache_size)
+
+    # Built only once there is something to edit, since it loads the provider
+    # package and may prompt for the model or API key
+    langchain_manager = LangchainManager(config_manager, cache, patch_mode=args.patch)
+
+    profiler = Profiler(args.profile_dir) if args.profile else None
+    if profiler:
+        profiler.start()
+    try:
+        edit_files(args, config_manager, langchain_manager, files)
+    finally:
+        if profiler:
+            for path in profiler.stop():
+                print(f"Profile written to {path}")
+
+    if cache is not None:
+        print(cache.describe())
 
 
 if __name__ == "__main__":
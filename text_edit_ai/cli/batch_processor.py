@@ -0,0 +1,223 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from .config_manager import ConfigManager
+from .langchain_manager import LangchainManager
+from .file_processor import FileProcessor
+from .session_manager import SessionManager
+from .telemetry import Telemetry
+from .section_classifier import SectionClassifier
+from .retry_policy import AUTH, BAD_MODEL, classify_error
+
+
+class BatchProcessor(FileProcessor):
+    """
+    Non-interactive file processing.
+
+    Every remaining section is sent to the model concurrently, with at most
+    max_workers requests in flight, and the edits are written to the output
+    file in original order without any prompts. process_files() does the same
+    for several files at once.
+    """
+
+    # Edits kept back per worker, at most, while an earlier section is still
+    # being edited, so one slow section doesn't leave the other workers idle
+    BUFFERED_PER_WORKER = 4
+
+    def __init__(
+        self,
+        config_manager: ConfigManager,
+        langchain_manager: LangchainManager,
+        file: str,
+        paragraphs_per_section: int = 1,
+        token_budget: int = SessionManager.TOKEN_BUDGET,
+        max_workers: int = 4,
+        fsync: str = "close",
+        diff_file: str | None = None,
+        diff_format: str = "unified",
+        telemetry: Telemetry | None = None,
+        classifier: SectionClassifier | None = None,
+    ):
+        super().__init__(
+            config_manager,
+            langchain_manager,
+            file,
+            paragraphs_per_section,
+            token_budget,
+            fsync=fsync,
+            diff_file=diff_file,
+            diff_format=diff_format,
+            telemetry=telemetry,
+            classifier=classifier,
+        )
+        self.max_workers = max(1, max_workers)
+        self.sections = None
+        self.file_prompt = None
+
+    def process(self) -> None:
+        """Edit every remaining section and write the results in order."""
+        self.process_files([self], self.max_workers)
+
+    @classmethod
+    def process_files(
+        cls, processors: list["BatchProcessor"], max_workers: int = 4
+    ) -> None:
+        """
+        Edit several files through one shared, bounded pool of workers.
+
+        The sections of all files are queued one file after another, with at
+        most max_workers requests in flight, so the next file is already being
+        edited while the last sections of the previous one finish. Edits that
+        finish before an earlier section's are held back, up to
+        BUFFERED_PER_WORKER per worker, so the other workers carry on while
+        one section is slow. Each file's edits are written in its own order
+        and its progress is saved in its
+        own config section. Files are opened when the queue reaches them and
+        closed as soon as they are complete.
+        """
+        max_workers = max(1, max_workers)
+        max_buffered = max_workers * cls.BUFFERED_PER_WORKER
+        in_flight: deque[tuple[BatchProcessor, str, Future]] = deque()
+        executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="batch"
+        )
+        started: list[BatchProcessor] = []
+        queuing = None
+
+        def write_next() -> None:
+            processor, section, future = in_flight.popleft()
+            processor._write_result(section, future)
+            # The file being queued is still read from, so it is closed
+            # once all of its sections have been queued instead
+            if processor is not queuing and processor.session_manager.is_complete():
+                processor._finish()
+
+        def make_room() -> None:
+            # Write the edits that are ready in order, and wait until a worker
+            # is free and the buffer has room for one more section
+            while in_flight:
+                if in_flight[0][2].done() or len(in_flight) >= max_buffered:
+                    write_next()
+                    continue
+                running = [future for _, _, future in in_flight if not future.done()]
+                if len(running) < max_workers:
+                    return
+                wait(running, return_when=FIRST_COMPLETED)
+
+        try:
+            for processor in processors:
+                processor._start()
+                started.append(processor)
+                queuing = processor
+                for section in processor.session_manager.iter_sections():
+                    make_room()
+                    future = executor.submit(processor._request, section)
+                    in_flight.append((processor, section, future))
+                queuing = None
+                if processor.session_manager.is_complete():
+                    processor._finish()
+
+            while in_flight:
+                write_next()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            for processor in started:
+                processor._finish()
+
+        if processors:
+            processors[0].ui_manager.show_completion_message(
+                processors[0].telemetry.summary()
+            )
+
+    def _start(self) -> None:
+        """Open the file and its output, ready to queue its sections."""
+        self.sections = self._load_sections()
+        self.session_manager.set_sections(self.sections)
+        self._open_output()
+        self.file_prompt = self.config_manager.get_file_prompt(self.file)
+
+    def _finish(self) -> None:
+        """Save progress and close the file and its output, if still open."""
+        if self.sections is None:
+            return
+        self.config_manager.flush()
+        self._close_output()
+        self.sections.close()
+        self.sections = None
+
+    def _request(self, section: str) -> tuple[str, float | None, float | None]:
+        """
+        Request the edit of a section, timing it only if telemetry is enabled.
+
+        Trivial sections are kept as they are and sections edited before take
+        the earlier edit, without a request.
+
+        Returns:
+            The edited text, the time to the first token and the total time
+            (both None without telemetry or a request)
+        """
+        if self.classifier.is_trivial(section):
+            self.classifier.count(SectionClassifier.TRIVIAL)
+            return section, None, None
+        known = self.classifier.lookup(self.file_prompt, section)
+        if known is not None:
+            self.classifier.count(SectionClassifier.DUPLICATE)
+            return known, None, None
+
+        if not self.telemetry.enabled:
+            edited, first_token, total = (
+                self.langchain_manager.get_response(self.file_prompt, section),
+                None,
+                None,
+            )
+        else:
+            edited, first_token, total = self.langchain_manager.get_timed_response(
+                self.file_prompt, section
+            )
+        self.classifier.remember(self.file_prompt, section, edited)
+        return edited, first_token, total
+
+    def _write_result(self, section: str, future: Future) -> None:
+        """
+        Wait for a section's request, then write its edit and advance.
+
+        A request that failed on a configuration error (rejected API key or
+        unknown model) is repeated here on the main thread, where the user can
+        be asked to fix it. A section whose request fails for good is reported
+        and written unedited, so the rest of the run carries on.
+        """
+        self._record = self.telemetry.start_section(
+            self.file, self.session_manager.current_section, section
+        )
+        try:
+            edited, first_token, total = self._result(section, future)
+        except Exception as e:
+            self.ui_manager.show_section_failed(
+                self.file, self.session_manager.current_section, e
+            )
+            self._write_section(section)
+            self._advance()
+            self.telemetry.finish_section(self._record, "failed")
+        else:
+            if total is not None:
+                self.telemetry.record_response(self._record, first_token, total)
+
+            self._write_section(edited)
+            self._write_diff(section, edited)
+            self._advance()
+            self.telemetry.finish_section(self._record, "accept", edited)
+
+        total = len(self.sections)
+        self.ui_manager.show_progress(
+            min(self.session_manager.current_section, total), total, self.file
+        )
+
+    def _result(
+        self, section: str, future: Future
+    ) -> tuple[str, float | None, float | None]:
+        """Get a section's request result, repeating configuration errors."""
+        try:
+            return future.result()
+        except Exception as e:
+            if classify_error(e) not in (AUTH, BAD_MODEL):
+                raise
+            return self._request(section)
@@ -0,0 +1,118 @@
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .langchain_manager import LangchainManager
+
+
+class CandidateManager:
+    """
+    Requests several alternative edits of a section at once.
+
+    Candidates come either from the current model at a spread of temperatures
+    or, when models are given, from each of those models. All requests run in
+    parallel, so asking for several alternatives takes about as long as one.
+    """
+
+    # Range of temperatures the candidates are spread over
+    MIN_TEMPERATURE = 0.2
+    MAX_TEMPERATURE = 1.0
+
+    def __init__(
+        self,
+        langchain_manager: LangchainManager,
+        count: int = 1,
+        models: list[str] | None = None,
+    ):
+        self.langchain_manager = langchain_manager
+        self.models = models or []
+        self.count = len(self.models) or max(1, count)
+        self.executor = None
+        self._variants: list[tuple[str, LangchainManager]] | None = None
+
+    @property
+    def enabled(self) -> bool:
+        """Check if more than one candidate is requested."""
+        return self.count > 1
+
+    def temperatures(self) -> list[float]:
+        """Get the temperatures of the candidates, evenly spread."""
+        if self.count == 1:
+            return [self.langchain_manager.temperature]
+        step = (self.MAX_TEMPERATURE - self.MIN_TEMPERATURE) / (self.count - 1)
+        return [round(self.MIN_TEMPERATURE + i * step, 2) for i in range(self.count)]
+
+    def generate(
+        self,
+        context: str,
+        writing: str,
+        on_candidate: Callable[[int, str, str], None],
+        on_error: Callable[[int, str, Exception], None] | None = None,
+    ) -> list[str | None]:
+        """
+        Request all candidates in parallel, passing on each as it completes.
+
+        Args:
+            context: The instructions for the edit
+            writing: The text to edit
+            on_candidate: Called on this thread with the candidate's number
+                (from 1), its label and its text, in order of completion
+            on_error: Called with the number, label and error of a failed
+                candidate
+
+        Returns:
+            The candidates in order, None where the request failed
+        """
+        variants = self._get_variants()
+        if not variants:
+            return []
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                max_workers=len(variants), thread_name_prefix="candidate"
+            )
+
+        futures = {
+            self.executor.submit(manager.get_response, context, writing): number
+            for number, (_, manager) in enumerate(variants, 1)
+        }
+        candidates: list[str | None] = [None] * len(variants)
+        for future in as_completed(futures):
+            number = futures[future]
+            label = variants[number - 1][0]
+            try:
+                candidates[number - 1] = future.result()
+            except Exception as e:
+                if on_error:
+                    on_error(number, label, e)
+                continue
+            on_candidate(number, label, candidates[number - 1])
+        return candidates
+
+    def _get_variants(self) -> list[tuple[str, LangchainManager]]:
+        """
+        Create the labeled managers for the candidates on first use.
+
+        Models that can't be created are reported and left out.
+        """
+        if self._variants is None:
+            if self.models:
+                settings = [(model, {"model_name": model}) for model in self.models]
+            else:
+                settings = [
+                    (f"temperature {t}", {"temperature": t})
+                    for t in self.temperatures()
+                ]
+
+            self._variants = []
+            for label, kwargs in settings:
+                try:
+                    manager = self.langchain_manager.variant(**kwargs)
+                except Exception as e:
+                    print(f"Candidate {label} unavailable: {e}")
+                    continue
+                self._variants.append((label, manager))
+        return self._variants
+
+    def shutdown(self) -> None:
+        """Stop the worker pool."""
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
@@ -1,14 +1,25 @@
+import atexit
 import configparser
+import io
 import os
+import tempfile
+import time
 from .colors import Colors
 
 
 class ConfigManager:
     CONFIG_FILE = os.path.join(os.path.expanduser("~"), ".ai_text_editor.cfg")
+    # Minimum number of seconds between writes of the config file
+    FLUSH_INTERVAL = 2.0
 
     def __init__(self):
+        self._dirty = False
+        self._last_flush = float("-inf")
+        # Prompt file path -> (mtime_ns, size, contents)
+        self._prompt_files: dict[str, tuple[int, int, str]] = {}
         self.config = self.get_config()
         self._ensure_color_config()
+        atexit.register(self.flush)
 
     def get_config(self):
         """
@@ -21,6 +32,7 @@ class ConfigManager:
         if "DEFAULT" not in self.config:
             self.config["DEFAULT"] = {}
 
+        self._saved_contents = self._serialize()
         return self.config
 
     def _ensure_color_config(self):
@@ -28,11 +40,14 @@ class ConfigManager:
         if "COLORS" not in self.config:
             self.config["COLORS"] = {}
 
-        for color_name, hex_value in Colors.DEFAULT_COLORS.items():
-            if color_name not in self.config["COLORS"]:
-                self.config["COLORS"][color_name] = hex_value
-
-        self.save_config()
+        missing = {
+            color_name: hex_value
+            for color_name, hex_value in Colors.DEFAULT_COLORS.items()
+            if color_name not in self.config["COLORS"]
+        }
+        if missing:
+            self.config["COLORS"].update(missing)
+            self.save_config()
 
     def get_color(self, color_name):
         """Get a color value from config."""
@@ -53,9 +68,54 @@ class ConfigManager:
     def save_config(self):
         """
         Save the configuration to the file.
+
+        Saves are coalesced: the file is written at most once per
+        FLUSH_INTERVAL, and any change still pending is written by flush()
+        when the session ends.
+        """
+        self._dirty = True
+        if time.monotonic() - self._last_flush >= self.FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        """
+        Write pending changes to the file.
+
+        The file is replaced atomically through a temporary file, so a crash
+        never leaves it truncated, and is not written at all if its contents
+        did not change.
         """
-        with open(self.CONFIG_FILE, "w") as configfile:
-            self.config.write(configfile)
+        if not self._dirty:
+            return
+        self._last_flush = time.monotonic()
+
+        contents = self._serialize()
+        if contents == self._saved_contents:
+            self._dirty = False
+            return
+
+        directory = os.path.dirname(os.path.abspath(self.CONFIG_FILE))
+        fd, temp_path = tempfile.mkstemp(
+            dir=directory, prefix=".ai_text_editor.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w") as configfile:
+                configfile.write(contents)
+                configfile.flush()
+                os.fsync(configfile.fileno())
+            os.replace(temp_path, self.CONFIG_FILE)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        self._saved_contents = contents
+        self._dirty = False
+
+    def _serialize(self):
+        """Render the configuration as it would be written to the file."""
+        buffer = io.StringIO()
+        self.config.write(buffer)
+        return buffer.getvalue()
 
     def get_file_config(self, file):
         """
@@ -95,6 +155,32 @@ class ConfigManager:
         print(f"Model set to: {model}")
         return model
 
+    def get_rate_limits(self, model):
+        """
+        Get the requests-per-minute and tokens-per-minute limits for a model.
+
+        Limits are set in the [RATE_LIMITS] section as "model = rpm/tpm", and
+        either number may be left out (e.g. "gpt-4o = 500/" or "gpt-4o = /30000").
+
+        Returns:
+            The RPM and TPM limits, each None if not set
+        """
+        if "RATE_LIMITS" not in self.config:
+            return None, None
+        value = self.config["RATE_LIMITS"].get(model, "").split("#")[0].strip()
+        if not value:
+            return None, None
+
+        rpm, _, tpm = value.partition("/")
+        try:
+            return (
+                float(rpm) if rpm.strip() else None,
+                float(tpm) if tpm.strip() else None,
+            )
+        except ValueError:
+            print(f"Invalid rate limit for {model}: '{value}'")
+            return None, None
+
     def set_pos(self, file, pos):
         """
         Set the position for the specified file.
@@ -124,13 +210,29 @@ class ConfigManager:
 
             if prompt_file and os.path.exists(prompt_file):
                 try:
-                    with open(prompt_file, "r") as f:
-                        return f.read()
+                    return self._read_prompt_file(prompt_file)
                 except Exception as e:
                     print(f"Error reading prompt file: {e}")
 
             return file_config.get("file_prompt", self.get_file_prompt())
 
+    def _read_prompt_file(self, prompt_file):
+        """
+        Read a prompt file, reusing the last read while the file is unchanged.
+
+        The file is only read again when its modification time or size
+        changes, so it can still be edited between sections.
+        """
+        stat = os.stat(prompt_file)
+        cached = self._prompt_files.get(prompt_file)
+        if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+
+        with open(prompt_file, "r") as f:
+            contents = f.read()
+        self._prompt_files[prompt_file] = (stat.st_mtime_ns, stat.st_size, contents)
+        return contents
+
     def set_file_prompt(self, file=None, file_prompt=None):
         """
         Set the file prompt in config.
@@ -168,10 +270,9 @@ class ConfigManager:
 
         try:
             file_config = self.get_file_config(file)
-            file_config["file_prompt"] = os.path.abspath(prompt_file_path)
-
             if "file_prompt" in file_config:
                 del file_config["file_prompt"]
+            file_config["file_prompt"] = os.path.abspath(prompt_file_path)
 
             self.save_config()
             print(f"File prompt set from '{prompt_file_path}' for {file}.")
@@ -0,0 +1,361 @@
+import difflib
+from collections.abc import Hashable, Iterator, Sequence
+
+
+class MyersDiff:
+    """
+    Token diff using Myers' O(ND) algorithm.
+
+    A replacement for difflib.SequenceMatcher(None, a, b) that produces the
+    same kind of opcode stream. Tokens are interned to integer IDs so every
+    comparison is cheap, common prefixes and suffixes are trimmed up front, and
+    the linear-space variant of the algorithm is used, so the cost grows with
+    the number of changes (D) rather than with the square of the input size.
+
+    That makes heavy edits, such as a rewritten section, slower than difflib.
+    So after MIN_CUTOFF steps, the search for each part of the diff estimates
+    its share of changed tokens from how far it has got. Once that passes
+    CUTOFF_RATIO, the part is handed to difflib.SequenceMatcher instead, and
+    the result is no longer guaranteed to be minimal. Pass fallback=False to
+    always get a minimal diff.
+    """
+
+    MIN_CUTOFF = 32
+    CUTOFF_RATIO = 0.05
+
+    def __init__(
+        self, a: Sequence[Hashable], b: Sequence[Hashable], fallback: bool = True
+    ):
+        ids: dict[Hashable, int] = {}
+        self.a = [ids.setdefault(token, len(ids)) for token in a]
+        self.b = [ids.setdefault(token, len(ids)) for token in b]
+        self.fallback = fallback
+        self._matching_blocks: list[tuple[int, int, int]] | None = None
+
+    def get_matching_blocks(self) -> list[tuple[int, int, int]]:
+        """
+        Get the runs of matching tokens.
+
+        Returns:
+            A list of (i, j, n) triples meaning a[i:i + n] == b[j:j + n], in
+            increasing order and ending with a (len(a), len(b), 0) sentinel,
+            as difflib.SequenceMatcher.get_matching_blocks does
+        """
+        if self._matching_blocks is None:
+            blocks: list[tuple[int, int, int]] = []
+            self._diff(0, 0, len(self.a), len(self.b), blocks, outer=True)
+            blocks.append((len(self.a), len(self.b), 0))
+            self._matching_blocks = blocks
+        return self._matching_blocks
+
+    def get_opcodes(self) -> list[tuple[str, int, int, int, int]]:
+        """
+        Get the edits that turn a into b.
+
+        Returns:
+            A list of (tag, i1, i2, j1, j2) tuples with tags "equal", "delete",
+            "insert" and "replace", as difflib.SequenceMatcher.get_opcodes does
+        """
+        i = j = 0
+        opcodes = []
+        for ai, bj, size in self.get_matching_blocks():
+            if i < ai and j < bj:
+                opcodes.append(("replace", i, ai, j, bj))
+            elif i < ai:
+                opcodes.append(("delete", i, ai, j, bj))
+            elif j < bj:
+                opcodes.append(("insert", i, ai, j, bj))
+
+            i, j = ai + size, bj + size
+            if size:
+                opcodes.append(("equal", ai, i, bj, j))
+        return opcodes
+
+    def get_grouped_opcodes(
+        self, n: int = 3
+    ) -> list[list[tuple[str, int, int, int, int]]]:
+        """
+        Group the opcodes into hunks with up to n tokens of context.
+
+        Returns:
+            A list of opcode lists, as difflib.SequenceMatcher.get_grouped_opcodes
+            does
+        """
+        opcodes = self.get_opcodes()
+        if not opcodes:
+            opcodes = [("equal", 0, 1, 0, 1)]
+
+        # Trim the leading and trailing context down to n
+        if opcodes[0][0] == "equal":
+            tag, i1, i2, j1, j2 = opcodes[0]
+            opcodes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+        if opcodes[-1][0] == "equal":
+            tag, i1, i2, j1, j2 = opcodes[-1]
+            opcodes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+
+        groups = []
+        group = []
+        for tag, i1, i2, j1, j2 in opcodes:
+            # Split the hunk at long runs of unchanged tokens
+            if tag == "equal" and i2 - i1 > 2 * n:
+                group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+                groups.append(group)
+                group = []
+                i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+            group.append((tag, i1, i2, j1, j2))
+        if group and not (len(group) == 1 and group[0][0] == "equal"):
+            groups.append(group)
+        return groups
+
+    @staticmethod
+    def _add_block(blocks: list[tuple[int, int, int]], i: int, j: int, n: int):
+        """Append a matching run, merging it with the previous run if adjacent."""
+        if not n:
+            return
+        if blocks:
+            pi, pj, pn = blocks[-1]
+            if pi + pn == i and pj + pn == j:
+                blocks[-1] = (pi, pj, pn + n)
+                return
+        blocks.append((i, j, n))
+
+    def _diff(
+        self,
+        left: int,
+        top: int,
+        right: int,
+        bottom: int,
+        blocks: list[tuple[int, int, int]],
+        outer: bool = False,
+    ) -> None:
+        """Find the matching runs between a[left:right] and b[top:bottom]."""
+        a, b = self.a, self.b
+
+        start = left
+        while left < right and top < bottom and a[left] == b[top]:
+            left += 1
+            top += 1
+        self._add_block(blocks, start, top - (left - start), left - start)
+
+        suffix = 0
+        while right > left and bottom > top and a[right - 1] == b[bottom - 1]:
+            right -= 1
+            bottom -= 1
+            suffix += 1
+
+        if left < right and top < bottom:
+            snake = self._middle_snake(left, top, right, bottom)
+            if snake is None:
+                if outer:
+                    # Give difflib all of both sequences, as its autojunk
+                    # heuristic only kicks in for 200 tokens or more
+                    left, top, right, bottom, suffix = 0, 0, len(a), len(b), 0
+                    blocks.clear()
+                self._diff_difflib(left, top, right, bottom, blocks)
+            else:
+                (x1, y1), (x2, y2) = snake
+                self._diff(left, top, x1, y1, blocks)
+                self._walk_snake(x1, y1, x2, y2, blocks)
+                self._diff(x2, y2, right, bottom, blocks)
+
+        self._add_block(blocks, right, bottom, suffix)
+
+    def _diff_difflib(
+        self,
+        left: int,
+        top: int,
+        right: int,
+        bottom: int,
+        blocks: list[tuple[int, int, int]],
+    ) -> None:
+        """Find the matching runs of a heavily edited box with difflib."""
+        matcher = difflib.SequenceMatcher(None, self.a[left:right], self.b[top:bottom])
+        for i, j, n in matcher.get_matching_blocks():
+            self._add_block(blocks, left + i, top + j, n)
+
+    def _walk_snake(
+        self, x1: int, y1: int, x2: int, y2: int, blocks: list[tuple[int, int, int]]
+    ) -> None:
+        """Record the matching runs of a snake: at most one edit between diagonals."""
+        a, b = self.a, self.b
+        for _ in range(2):
+            start = x1
+            while x1 < x2 and y1 < y2 and a[x1] == b[y1]:
+                x1 += 1
+                y1 += 1
+            self._add_block(blocks, start, y1 - (x1 - start), x1 - start)
+
+            if x2 - x1 < y2 - y1:
+                y1 += 1
+            elif x2 - x1 > y2 - y1:
+                x1 += 1
+
+    def _middle_snake(
+        self, left: int, top: int, right: int, bottom: int
+    ) -> tuple[tuple[int, int], tuple[int, int]] | None:
+        """
+        Find the middle snake of the box from (left, top) to (right, bottom).
+
+        Searches forwards from the top left and backwards from the bottom right
+        at the same time, until the two paths overlap.
+
+        Returns:
+            The start and end points of the snake, or None if the box looks
+            too heavily edited to finish the search
+        """
+        a, b = self.a, self.b
+        width = right - left
+        height = bottom - top
+        delta = width - height
+        odd = delta % 2 == 1
+        max_d = (width + height + 1) // 2
+        offset = max_d + 1
+        # Each step is one change, so steps over tokens covered estimates
+        # the share of tokens changed
+        min_covered = 2 / self.CUTOFF_RATIO
+        forward = left + top
+        backward = right + bottom
+
+        # vf[k] is the furthest x on forward diagonal k = x - y,
+        # vb[c] the furthest-back y on backward diagonal c = k - delta
+        vf = [0] * (2 * offset + 1)
+        vb = [0] * (2 * offset + 1)
+        vf[offset + 1] = left
+        vb[offset + 1] = bottom
+
+        for d in range(max_d + 1):
+            if (
+                self.fallback
+                and d >= self.MIN_CUTOFF
+                and forward - left - top + right + bottom - backward < min_covered * d
+            ):
+                return None
+            for k in range(d, -d - 1, -2):
+                c = k - delta
+                if k == -d or (k != d and vf[offset + k - 1] < vf[offset + k + 1]):
+                    px = x = vf[offset + k + 1]
+                else:
+                    px = vf[offset + k - 1]
+                    x = px + 1
+                y = top + (x - left) - k
+                py = y if d == 0 or x != px else y - 1
+                while x < right and y < bottom and a[x] == b[y]:
+                    x += 1
+                    y += 1
+                vf[offset + k] = x
+                if x + y > forward:
+                    forward = x + y
+                if odd and -(d - 1) <= c <= d - 1 and y >= vb[offset + c]:
+                    return (px, py), (x, y)
+
+            for c in range(d, -d - 1, -2):
+                k = c + delta
+                if c == -d or (c != d and vb[offset + c - 1] > vb[offset + c + 1]):
+                    py = y = vb[offset + c + 1]
+                else:
+                    py = vb[offset + c - 1]
+                    y = py - 1
+                x = left + (y - top) + k
+                px = x if d == 0 or y != py else x + 1
+                while x > left and y > top and a[x - 1] == b[y - 1]:
+                    x -= 1
+                    y -= 1
+                vb[offset + c] = y
+                if x + y < backward:
+                    backward = x + y
+                if not odd and -d <= k <= d and x <= vf[offset + k]:
+                    return (x, y), (px, py)
+
+        raise AssertionError("no middle snake found")
+
+
+class DiffOp:
+    """
+    One edit in a diff: a tag and the spans it covers in each token list.
+
+    The tag is "equal", "delete", "insert" or "replace", and
+    original[original_start:original_end] became
+    edited[edited_start:edited_end]. Unpacks like a difflib opcode tuple.
+    """
+
+    __slots__ = ("tag", "original_start", "original_end", "edited_start", "edited_end")
+
+    def __init__(
+        self,
+        tag: str,
+        original_start: int,
+        original_end: int,
+        edited_start: int,
+        edited_end: int,
+    ):
+        self.tag = tag
+        self.original_start = original_start
+        self.original_end = original_end
+        self.edited_start = edited_start
+        self.edited_end = edited_end
+
+    def __iter__(self) -> Iterator[str | int]:
+        yield self.tag
+        yield self.original_start
+        yield self.original_end
+        yield self.edited_start
+        yield self.edited_end
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, DiffOp):
+            return NotImplemented
+        return tuple(self) == tuple(other)
+
+    def __repr__(self) -> str:
+        return (
+            f"DiffOp({self.tag!r}, {self.original_start}, {self.original_end}, "
+            f"{self.edited_start}, {self.edited_end})"
+        )
+
+
+class DiffResult:
+    """
+    The result of diffing two token lists.
+
+    Holds both token lists, the DiffOps that turn one into the other and
+    summary counts, so a diff is computed once and shared by every renderer
+    and anything else that needs to know what changed.
+    """
+
+    __slots__ = ("original", "edited", "ops", "inserted", "deleted", "kept")
+
+    def __init__(self, original: list[str], edited: list[str], ops: list[DiffOp]):
+        self.original = original
+        self.edited = edited
+        self.ops = ops
+        self.inserted = self.deleted = self.kept = 0
+        for op in ops:
+            if op.tag == "equal":
+                self.kept += op.original_end - op.original_start
+            else:
+                self.deleted += op.original_end - op.original_start
+                self.inserted += op.edited_end - op.edited_start
+
+    @classmethod
+    def compute(cls, original: list[str], edited: list[str]) -> "DiffResult":
+        """Diff two token lists."""
+        ops = [DiffOp(*opcode) for opcode in MyersDiff(original, edited).get_opcodes()]
+        return cls(original, edited, ops)
+
+    @property
+    def change_ratio(self) -> float:
+        """
+        Get the share of tokens that changed, from 0.0 (identical) to 1.0.
+
+        The inserted and deleted tokens are counted over the tokens of both
+        texts together. That is the formula of 1 - SequenceMatcher.ratio(), but
+        the two only agree when they find the same matches: this diff usually
+        finds more than difflib, which makes its change ratio lower.
+        """
+        total = len(self.original) + len(self.edited)
+        return (self.inserted + self.deleted) / total if total else 0.0
+
+    @property
+    def changed(self) -> bool:
+        """Check if there are any differences."""
+        return bool(self.inserted or self.deleted)
@@ -1,8 +1,17 @@
+import os
+import time
+from functools import partial
 from .config_manager import ConfigManager
 from .langchain_manager import LangchainManager
 from .markup_manager import MarkupManager
 from .ui_manager import UIManager
 from .session_manager import SessionManager
+from .prefetch_manager import PrefetchManager
+from .paragraph_reader import ParagraphReader
+from .output_writer import OutputWriter
+from .telemetry import Telemetry
+from .candidate_manager import CandidateManager
+from .section_classifier import SectionClassifier
 
 
 class FileProcessor:
@@ -14,93 +23,304 @@ class FileProcessor:
         langchain_manager: LangchainManager,
         file: str,
         paragraphs_per_section: int = 1,
+        token_budget: int = SessionManager.TOKEN_BUDGET,
+        prefetch_depth: int = 0,
+        fsync: str = "close",
+        markup_format: str = "ansi",
+        diff_file: str | None = None,
+        diff_format: str = "unified",
+        telemetry: Telemetry | None = None,
+        candidates: int = 1,
+        candidate_models: list[str] | None = None,
+        classifier: SectionClassifier | None = None,
     ):
         self.config_manager = config_manager
         self.langchain_manager = langchain_manager
-        self.markup_manager = MarkupManager()
+        self.markup_manager = MarkupManager(markup_format)
         self.file = file
-        self.output_file = file.split(".")[0] + "_edited.txt"
+        self.output_file = os.path.splitext(file)[0] + "_edited.txt"
+        self.fsync = fsync
+        self.output_writer = None
+        self.diff_file = diff_file
+        self.diff_format = diff_format
+        self.diff_stream = None
+        self.telemetry = telemetry if telemetry is not None else Telemetry()
+        # The telemetry record of the section being processed
+        self._record = None
+        self.classifier = classifier if classifier is not None else SectionClassifier()
 
         self.session_manager = SessionManager(
-            config_manager, file, paragraphs_per_section
+            config_manager, file, paragraphs_per_section, token_budget
         )
         self.ui_manager = UIManager()
+        self.prefetch_manager = PrefetchManager(langchain_manager, prefetch_depth)
+        self.candidate_manager = CandidateManager(
+            langchain_manager, candidates, candidate_models
+        )
+
+    def process(self) -> bool:
+        """
+        Process the file section by section.
 
-    def process(self) -> None:
-        """Process the file section by section."""
-        content = self._load_file()
-        sections = self._split_into_sections(content)
+        Returns:
+            True if the end of the file was reached, False if the user exited
+        """
+        sections = self._load_sections()
         self.session_manager.set_sections(sections)
+        self._open_output()
 
-        while not self.session_manager.is_complete():
-            section = self.session_manager.get_current_section()
+        try:
+            while not self.session_manager.is_complete():
+                section = self.session_manager.get_current_section()
+                self._record = self.telemetry.start_section(
+                    self.file, self.session_manager.current_section, section
+                )
+                if self.classifier.is_trivial(section):
+                    self._pass_through(section)
+                    continue
 
-            action = self.ui_manager.get_initial_action(section)
+                with self.telemetry.timer(self._record, "think_s"):
+                    action = self.ui_manager.get_initial_action(section)
 
-            if action == "continue":
-                self._process_with_ai(section)
-            elif action == "skip":
-                self._write_section(section)
-                self.session_manager.advance()
-            elif action == "size":
-                new_size = self.ui_manager.get_section_size()
-                self.session_manager.set_paragraphs_per_section(new_size)
-            elif action == "exit":
-                return
+                if action == "continue":
+                    if self._process_with_ai(section) == "exit":
+                        return False
+                elif action == "skip":
+                    self._skip_section(section)
+                elif action == "size":
+                    with self.telemetry.timer(self._record, "think_s"):
+                        new_size = self.ui_manager.get_section_size()
+                    self.session_manager.set_paragraphs_per_section(new_size)
+                    self.telemetry.finish_section(self._record, "size")
+                elif action == "exit":
+                    self.telemetry.finish_section(self._record, "exit")
+                    return False
+        finally:
+            self.prefetch_manager.shutdown()
+            self.candidate_manager.shutdown()
+            self.config_manager.flush()
+            self._close_output()
+            sections.close()
+
+        self.ui_manager.show_completion_message(self.telemetry.summary())
+        return True
+
+    def _pass_through(self, section: str) -> None:
+        """Keep a trivial section as it is, without asking the model or user."""
+        self.classifier.count(SectionClassifier.TRIVIAL)
+        self.ui_manager.show_passed_through(section)
+        self._write_section(section)
+        self._advance()
+        self.telemetry.finish_section(self._record, "pass")
 
-        self.ui_manager.show_completion_message()
+    def _load_sections(self) -> ParagraphReader:
+        """Open the file for lazy, paragraph-by-paragraph reading."""
+        return ParagraphReader(self.file)
 
-    def _load_file(self) -> str:
-        """Load the file content."""
-        with open(self.file, "r") as f:
-            return f.read()
+    def _open_output(self) -> None:
+        """
+        Open the output file, resuming after its last committed section.
 
-    def _split_into_sections(self, content: str) -> list[str]:
-        """Split content into sections based on paragraphs."""
-        content = content.replace("\n\n", "\n").replace("\n", "\n\n")
-        return [p.strip() for p in content.split("\n\n") if p.strip()]
+        The output journal is authoritative: it is written with every section,
+        so it can be ahead of the position saved in the config after a crash.
+        """
+        self.output_writer = OutputWriter(self.output_file, self.fsync)
+        next_section = self.output_writer.next_section
+        if next_section is not None:
+            self.session_manager.set_current_section(next_section)
+        if self.diff_file:
+            self.diff_stream = open(self.diff_file, "a", encoding="utf-8")
+
+    def _close_output(self) -> None:
+        """Close the output file and diff file if they are open."""
+        if self.output_writer:
+            self.output_writer.close()
+            self.output_writer = None
+        if self.diff_stream:
+            self.diff_stream.close()
+            self.diff_stream = None
 
     def _write_section(self, content: str) -> None:
-        """Write content to the output file."""
-        with open(self.output_file, "a") as out_f:
-            out_f.write(content + "\n\n")
+        """Write content to the output file, tagged with the next section index."""
+        with self.telemetry.timer(self._record, "io_s"):
+            self.output_writer.write(content, self.session_manager.next_section())
+
+    def _advance(self) -> None:
+        """Move to the next section, saving the position."""
+        with self.telemetry.timer(self._record, "config_s"):
+            self.session_manager.advance()
+
+    def _write_diff(self, section: str, edited: str) -> None:
+        """Append the diff of an accepted edit to the diff file, if there is one."""
+        if not self.diff_stream:
+            return
+        with self.telemetry.timer(self._record, "io_s"):
+            self.markup_manager.write_diff(
+                section, edited, self.diff_stream, self.diff_format
+            )
+            if self.diff_format in {"ansi", "plain"}:
+                # Inline markup doesn't end its own line like the other formats
+                self.diff_stream.write("\n\n")
+            # Several files may share the diff file; keep each diff in one piece
+            self.diff_stream.flush()
+
+    def _stream_edit(self, request, context: str, section: str) -> str | None:
+        """
+        Request an edit, displaying it as it streams in, followed by timings.
+
+        A request that fails, e.g. after running out of retries, is reported
+        and the user asked whether to retry it or skip the section.
+
+        Returns:
+            The edited text, or None if the request failed and the user chose
+            to skip
+        """
+        while True:
+            self.ui_manager.start_stream()
+            try:
+                edited, first_token, total = request(
+                    context, section, on_token=self.ui_manager.display_token
+                )
+            except Exception as e:
+                with self.telemetry.timer(self._record, "think_s"):
+                    action = self.ui_manager.get_failure_action(e)
+                if action == "retry":
+                    continue
+                return None
+            self.ui_manager.end_stream(first_token, total)
+            self.telemetry.record_response(self._record, first_token, total)
+            return edited
+
+    def _skip_section(self, section: str) -> None:
+        """Keep a section unedited and move on."""
+        self._write_section(section)
+        self._advance()
+        self.telemetry.finish_section(self._record, "skip")
+
+    def _choose_candidate(self, context: str, section: str) -> str | None:
+        """
+        Request alternative edits in parallel, showing each as it completes.
+
+        Returns:
+            The edit the user chose, or None if none was chosen
+        """
+        start = time.perf_counter()
+        candidates = self.candidate_manager.generate(
+            context,
+            section,
+            on_candidate=self.ui_manager.display_candidate,
+            on_error=self.ui_manager.display_candidate_error,
+        )
+        self.telemetry.record_response(self._record, None, time.perf_counter() - start)
+        numbers = [i for i, text in enumerate(candidates, 1) if text is not None]
+        if not numbers:
+            return None
+
+        with self.telemetry.timer(self._record, "think_s"):
+            number = self.ui_manager.choose_candidate(numbers)
+        return candidates[number - 1] if number is not None else None
+
+    def _timed_diff(self, get_diff) -> str:
+        """Get the markup diff, counting its time as diff rather than think time."""
+        start = time.perf_counter()
+        diff = get_diff()
+        elapsed = time.perf_counter() - start
+        self.telemetry.add(self._record, "diff_s", elapsed)
+        self.telemetry.add(self._record, "think_s", -elapsed)
+        return diff
 
     def _process_with_ai(self, section: str) -> None:
         """Process a section with AI assistance."""
         file_prompt = self.config_manager.get_file_prompt(self.file)
-        edited = self.langchain_manager.get_response(file_prompt, section)
-        diff = self.markup_manager.generate_diff(section, edited)
+        known = self.classifier.lookup(file_prompt, section)
+        if self.prefetch_manager.depth:
+            upcoming = [
+                upcoming_section
+                for upcoming_section in self.session_manager.get_upcoming_sections(
+                    self.prefetch_manager.depth
+                )
+                if not self.classifier.is_trivial(upcoming_section)
+            ]
+            self.prefetch_manager.prefetch(file_prompt, upcoming, current=section)
+        if known is not None:
+            # The same text was edited before; reuse that edit
+            self.classifier.count(SectionClassifier.DUPLICATE)
+            self.ui_manager.show_reused_edit()
+            edited = known
+            streamed = False
+        else:
+            edited = self._stream_edit(
+                self.prefetch_manager.get_timed_response, file_prompt, section
+            )
+            if edited is None:
+                self._skip_section(section)
+                return
+            streamed = True
+        self.markup_manager.prepare_diff(section, edited)
 
         while True:
-            action = self.ui_manager.get_ai_action(edited, diff)
+            get_diff = partial(self.markup_manager.generate_diff, section, edited)
+            if self._record is not None:
+                get_diff = partial(self._timed_diff, get_diff)
+            with self.telemetry.timer(self._record, "think_s"):
+                action = self.ui_manager.get_ai_action(edited, get_diff, streamed)
+            streamed = False
 
             if action == "accept":
+                self.classifier.remember(file_prompt, section, edited)
                 self._write_section(edited)
-                self.session_manager.advance()
+                self._write_diff(section, edited)
+                self._advance()
+                self.telemetry.finish_section(self._record, "accept", edited)
                 break
             elif action == "skip":
-                self._write_section(section)
-                self.session_manager.advance()
+                self._skip_section(section)
                 break
             elif action == "section_prompt":
-                prompt = self.ui_manager.get_section_prompt()
+                with self.telemetry.timer(self._record, "think_s"):
+                    prompt = self.ui_manager.get_section_prompt()
                 if not prompt:  # Canceled
                     continue
 
                 combined_prompt = f"{file_prompt}\n{prompt}"
-                edited = self.langchain_manager.get_response(combined_prompt, section)
-                diff = self.markup_manager.generate_diff(section, edited)
+                if self.candidate_manager.enabled:
+                    chosen = self._choose_candidate(combined_prompt, section)
+                    if chosen is None:  # Canceled or all failed
+                        continue
+                    # Already shown while the candidates came in
+                    edited = chosen
+                else:
+                    edited = self._stream_edit(
+                        self.langchain_manager.get_timed_response,
+                        combined_prompt,
+                        section,
+                    )
+                    if edited is None:
+                        self._skip_section(section)
+                        return
+                self.markup_manager.prepare_diff(section, edited)
+                streamed = True
             elif action == "file_prompt":
-                prompt = self.ui_manager.get_file_prompt()
+                with self.telemetry.timer(self._record, "think_s"):
+                    prompt = self.ui_manager.get_file_prompt()
                 if not prompt:  # Canceled
                     continue
 
                 self.config_manager.set_file_prompt(self.file, prompt)
-                edited = self.langchain_manager.get_response(prompt, section)
-                diff = self.markup_manager.generate_diff(section, edited)
+                edited = self._stream_edit(
+                    self.langchain_manager.get_timed_response, prompt, section
+                )
+                if edited is None:
+                    self._skip_section(section)
+                    return
+                self.markup_manager.prepare_diff(section, edited)
+                streamed = True
             elif action == "size":
-                new_size = self.ui_manager.get_section_size()
+                with self.telemetry.timer(self._record, "think_s"):
+                    new_size = self.ui_manager.get_section_size()
                 self.session_manager.set_paragraphs_per_section(new_size)
+                self.telemetry.finish_section(self._record, "size", edited)
                 return
             elif action == "exit":
+                self.telemetry.finish_section(self._record, "exit", edited)
                 return "exit"
@@ -1,61 +1,306 @@
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.chat_models import init_chat_model
+import copy
+import threading
+import time
+from collections.abc import Callable
+from .response_cache import ResponseCache
+from .prompt_cache import PromptCache
+from .rate_limiter import RateLimiter
+from .token_estimator import TokenEstimator
+from .patch_applier import PatchApplier, PatchError
+from .retry_policy import AUTH, BAD_MODEL, CircuitBreaker, RetryPolicy, classify_error
 
 
 SYSTEM_PROMPT = """You are a writing editor. Edit the section of text in <writing> based on the instructions in <context>. Respond only with the revised text."""
 
+PATCH_SYSTEM_PROMPT = """You are a writing editor. Edit the section of text in <writing> based on the instructions in <context>. Respond only with your changes, each in the form:
+<edit><find>original text</find><replace>revised text</replace></edit>
+Copy each find exactly from the section, with enough surrounding words that it occurs only once, and do not let edits overlap. Do not repeat unchanged text. If nothing needs to change, respond with <unchanged/>."""
+
 
 class LangchainManager:
-    def __init__(self, config_manager):
-        self.system_prompt = SYSTEM_PROMPT
+    # Sampling temperature of the model; variant() makes copies with others
+    temperature = 0.0
+
+    def __init__(
+        self,
+        config_manager,
+        cache: ResponseCache | None = None,
+        prompt_cache: PromptCache | None = None,
+        retry_policy: RetryPolicy | None = None,
+        patch_mode: bool = False,
+    ):
+        # In patch mode the model returns find/replace edits instead of the
+        # full text, which are applied to the section locally
+        self.patch_mode = patch_mode
+        self.system_prompt = PATCH_SYSTEM_PROMPT if patch_mode else SYSTEM_PROMPT
         self.config_manager = config_manager
+        self.cache = cache
+        self.prompt_cache = prompt_cache if prompt_cache is not None else PromptCache()
+        self.retry_policy = retry_policy or RetryPolicy(
+            circuit_breaker=CircuitBreaker()
+        )
         self.api_key = self.config_manager.get_api_key()
         self.model_name = self.config_manager.get_model()
         self.model = self.get_model()
+        self.rate_limiter = RateLimiter(
+            *self.config_manager.get_rate_limits(self.model_name)
+        )
 
     def get_model(self):
         """Get appropriate chat model based on model name.
 
         Uses ChatGoogleGenerativeAI directly for Google models,
-        and init_chat_model for other providers.
+        and init_chat_model for other providers. Provider packages are
+        imported here rather than at module level, so only the provider in use
+        is loaded and commands that never build a model start quickly.
         """
+        while True:
+            try:
+                return self._create_model()
+            except Exception as e:
+                print(f"Error initializing model: {e}")
+                print("Model name invalid. Please set another model.")
+                self.model_name = self.config_manager.set_model()
+
+    def _create_model(self):
+        """Create the chat model for model_name and temperature."""
         # Handle Google models directly (which had issues with init_chat_model)
-        try:
-            if self.model_name.startswith("gemini"):
-                return ChatGoogleGenerativeAI(
-                    model=self.model_name, google_api_key=self.api_key, temperature=0
-                )
-            return init_chat_model(self.model_name, api_key=self.api_key, temperature=0)
-        except Exception as e:
-            print(f"Error initializing model: {e}")
-            print("Model name invalid. Please set another model.")
-            self.config_manager.set_model()
-            self.__init__(self.config_manager)
-            return self.get_model()
+        if self.model_name.startswith("gemini"):
+            from langchain_google_genai import ChatGoogleGenerativeAI
 
-    def get_response(self, context, writing):
-        try:
-            prompt = ChatPromptTemplate.from_messages(
-                [
-                    ("system", self.system_prompt),
-                    (
-                        "user",
-                        f"<context>{context}</context><writing>{writing}</writing>",
-                    ),
-                ]
+            return ChatGoogleGenerativeAI(
+                model=self.model_name,
+                google_api_key=self.api_key,
+                temperature=self.temperature,
             )
-            messages = prompt.format_messages()
+        from langchain.chat_models import init_chat_model
 
-            response = ""
-            for token in self.model.stream(messages):
-                content = token.content
-                response += content
+        return init_chat_model(
+            self.model_name, api_key=self.api_key, temperature=self.temperature
+        )
 
+    def variant(
+        self, model_name: str | None = None, temperature: float | None = None
+    ) -> "LangchainManager":
+        """
+        Get a manager sending the same requests to another model or temperature.
+
+        The variant shares the retry policy and prompt cache, and the rate
+        limits too when the model is the same. It bypasses the response cache,
+        which is keyed by model but not temperature.
+
+        Raises:
+            Exception: If the model can't be created
+        """
+        other = copy.copy(self)
+        other.cache = None
+        if temperature is not None:
+            other.temperature = temperature
+        if model_name and model_name != self.model_name:
+            other.model_name = model_name
+            other.rate_limiter = RateLimiter(
+                *self.config_manager.get_rate_limits(model_name)
+            )
+        other.model = other._create_model()
+        return other
+
+    def get_response(self, context, writing, on_token=None):
+        """Get the edited writing, from the response cache when possible."""
+        return self.get_timed_response(context, writing, on_token)[0]
+
+    def get_timed_response(
+        self, context, writing, on_token: Callable[[str], None] | None = None
+    ) -> tuple[str, float | None, float]:
+        """
+        Get the edited writing along with how long it took to generate.
+
+        Args:
+            context: The instructions for the edit
+            writing: The text to edit
+            on_token: Optional callback receiving each chunk of text as it arrives
+
+        Returns:
+            The edited text, the time to the first token (None if the response
+            was empty) and the total time, in seconds
+        """
+        start = time.perf_counter()
+        first_token = None
+
+        def receive(token):
+            nonlocal first_token
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            if on_token:
+                on_token(token)
+
+        response = self._get_response(context, writing, receive)
+        return response, first_token, time.perf_counter() - start
+
+    def _get_response(self, context, writing, on_token):
+        """Get the edited writing from the cache or the model."""
+        if self.cache is None:
+            return self._generate(context, writing, on_token)
+
+        paragraphs = writing.split("\n\n")
+        section_key = self._cache_key(context, writing)
+        paragraph_keys = [self._cache_key(context, p) for p in paragraphs]
+
+        # A section made of individually cached paragraphs is also a hit, so
+        # changing the section size does not invalidate earlier edits
+        cached = self.cache.lookup([section_key], paragraph_keys)
+        if cached is not None:
+            response = "\n\n".join(cached)
+            on_token(response)
             return response
-        except Exception as e:
-            print(f"Error initializing model: {e}")
+
+        response = self._generate(context, writing, on_token)
+        self.cache.put(section_key, response)
+
+        edited_paragraphs = response.split("\n\n")
+        if len(paragraphs) > 1 and len(edited_paragraphs) == len(paragraphs):
+            for key, edited in zip(paragraph_keys, edited_paragraphs):
+                self.cache.put(key, edited)
+
+        return response
+
+    def _cache_key(self, context, writing):
+        """Build the response cache key for a request."""
+        return ResponseCache.make_key(
+            self.model_name, self.system_prompt, context, writing
+        )
+
+    def _build_messages(self, context, writing, system_prompt=None):
+        """
+        Build the messages for a request.
+
+        The system prompt and file prompt form a static prefix that is the
+        same for every section, followed by the section. When the prefix is
+        held in the provider's context cache, only the section is sent.
+
+        Returns:
+            The messages and any extra arguments for the model
+        """
+        from langchain_core.messages import HumanMessage, SystemMessage
+
+        prefix = (
+            f"{system_prompt or self.system_prompt}\n\n<context>{context}</context>"
+        )
+        section = HumanMessage(f"<writing>{writing}</writing>")
+
+        cached_content = self.prompt_cache.get(self.model, self.model_name, prefix)
+        if cached_content:
+            return [section], {"cached_content": cached_content}
+        return [SystemMessage(prefix), section], {}
+
+    def _generate(self, context, writing, on_token):
+        """
+        Request an edit from the model, passing on each chunk as it arrives.
+
+        In patch mode the patch is applied once complete and the edited text
+        passed on in one piece. A patch that doesn't apply cleanly is
+        discarded and the full text requested instead.
+        """
+        if not self.patch_mode:
+            return self._request(context, writing, on_token)
+
+        patch = self._request(context, writing, lambda token: None)
+        try:
+            edited = PatchApplier.apply(writing, patch)
+        except PatchError as e:
+            if self._is_main_thread():
+                print(f"\nPatch could not be applied ({e}), requesting the full text")
+            return self._request(context, writing, on_token, SYSTEM_PROMPT)
+        on_token(edited)
+        return edited
+
+    def _request(self, context, writing, on_token, system_prompt=None):
+        """
+        Make a request, passing on each chunk as it arrives.
+
+        Transient failures are retried by the retry policy. A rejected API key
+        or unknown model is a configuration error: on the main thread the user
+        is asked to fix it and the request is repeated, while background
+        requests raise it, so the foreground retry can prompt instead.
+        """
+        while True:
+            try:
+                return self.retry_policy.call(
+                    self._stream,
+                    context,
+                    writing,
+                    on_token,
+                    system_prompt,
+                    on_retry=self._report_retry,
+                )
+            except Exception as e:
+                kind = classify_error(e)
+                if kind not in (AUTH, BAD_MODEL) or not self._is_main_thread():
+                    raise
+                self._fix_configuration(kind, e)
+
+    def _stream(self, context, writing, on_token, system_prompt=None):
+        """
+        Make one streaming request to the model.
+
+        The request first waits for room in the rate limits, using an estimate
+        of its tokens: the prompt, plus an edit about as long as the writing.
+        The estimate is corrected from the usage the provider reports.
+        """
+        system_prompt = system_prompt or self.system_prompt
+        messages, kwargs = self._build_messages(context, writing, system_prompt)
+        writing_tokens = TokenEstimator.estimate(writing)
+        estimated = (
+            TokenEstimator.estimate(system_prompt)
+            + TokenEstimator.estimate(context)
+            + 2 * writing_tokens
+        )
+        self.rate_limiter.acquire(estimated)
+
+        chunks = []
+        used = 0
+        for token in self.model.stream(messages, **kwargs):
+            content = token.content
+            if content:
+                chunks.append(content)
+                on_token(content)
+            usage = getattr(token, "usage_metadata", None)
+            if isinstance(usage, dict):
+                used += usage.get("total_tokens", 0)
+
+        if used:
+            self.rate_limiter.correct(estimated, used)
+        return "".join(chunks)
+
+    def _fix_configuration(self, kind, error):
+        """Ask the user to fix the API key or model after it was rejected."""
+        print(f"Request failed: {error}")
+        if kind == AUTH:
+            print("API key rejected. Please set another API key.")
+            self.api_key = self.config_manager.set_api_key()
+        else:
             print("Model name invalid. Please set another model.")
-            self.config_manager.set_model()
-            self.__init__(self.config_manager)
-            return self.get_response(context, writing)
+            self.model_name = self.config_manager.set_model()
+            self.rate_limiter = RateLimiter(
+                *self.config_manager.get_rate_limits(self.model_name)
+            )
+        self.model = self.get_model()
+
+    def _report_retry(self, error, attempt, delay):
+        """Tell the user about a retry, unless the request runs in the background."""
+        if not self._is_main_thread():
+            return
+        print(
+            f"\nRequest failed ({error}), retrying in {delay:.1f}s "
+            f"(attempt {attempt + 1}/{self.retry_policy.max_attempts})"
+        )
+        breaker = self.retry_policy.circuit_breaker
+        if breaker and breaker.state == CircuitBreaker.OPEN:
+            print(
+                f"Provider unavailable, pausing all requests for "
+                f"{breaker.reset_timeout:.0f}s"
+            )
+
+    @staticmethod
+    def _is_main_thread():
+        """Check if the caller can prompt the user."""
+        return threading.current_thread() is threading.main_thread()
@@ -1,6 +1,13 @@
-import difflib
+import hashlib
+import html
+import io
 import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TextIO
 from .colors import Colors
+from .diff_engine import DiffResult, MyersDiff
 
 
 class MarkupManager:
@@ -8,20 +15,136 @@ class MarkupManager:
     Manages the markup of diffs between original and edited text.
 
     This class provides utilities for tokenizing text, calculating diffs,
-    and formatting differences between original and edited content.
+    and formatting differences between original and edited content, as ANSI
+    colors for the terminal, plain "[-deleted-]{+inserted+}" text, HTML or a
+    unified diff.
+
+    Each diff is computed once, as a DiffResult that all formats render from.
+    Diffs are only computed when needed: prepare_diff() starts one on a
+    background thread while the edit is being read, and get_diff_result()
+    returns it, memoized by a hash of the original and edited text.
     """
 
-    def generate_diff(self, original_text: str, edited_text: str) -> str:
+    FORMATS = ("ansi", "plain", "html", "unified")
+    CACHE_SIZE = 32
+    UNIFIED_CONTEXT = 3
+
+    def __init__(self, markup_format: str = "ansi"):
+        if markup_format not in self.FORMATS:
+            raise ValueError(f"Unknown markup format: {markup_format}")
+
+        self.markup_format = markup_format
+        self._diffs: OrderedDict[bytes, Future] = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="markup")
+
+    def prepare_diff(self, original_text: str, edited_text: str) -> None:
+        """Start computing a diff in the background so it is ready when needed."""
+        self._get_future(original_text, edited_text, background=True)
+
+    def get_diff_result(self, original_text: str, edited_text: str) -> DiffResult:
+        """
+        Get the structured diff between original and edited text.
+
+        Reuses a diff that was already computed or is being computed in the
+        background, and computes it now otherwise.
+        """
+        return self._get_future(original_text, edited_text).result()
+
+    def compute_diff(self, original_text: str, edited_text: str) -> DiffResult:
+        """Diff the tokens of original and edited text, without memoizing."""
+        return DiffResult.compute(
+            self._tokenize(original_text), self._tokenize(edited_text)
+        )
+
+    def _get_future(
+        self, original_text: str, edited_text: str, background: bool = False
+    ) -> Future:
+        """Get the memoized diff future for a pair of texts, creating it if needed."""
+        key = self._diff_key(original_text, edited_text)
+        with self._lock:
+            future = self._diffs.get(key)
+            if future is not None:
+                self._diffs.move_to_end(key)
+                return future
+
+            if background:
+                future = self._executor.submit(
+                    self.compute_diff, original_text, edited_text
+                )
+            else:
+                future = Future()
+            self._diffs[key] = future
+            if len(self._diffs) > self.CACHE_SIZE:
+                self._diffs.popitem(last=False)
+
+        if not background:
+            try:
+                future.set_result(self.compute_diff(original_text, edited_text))
+            except Exception as e:
+                future.set_exception(e)
+        return future
+
+    @staticmethod
+    def _diff_key(original_text: str, edited_text: str) -> bytes:
+        """Hash a pair of texts for memoizing their diff."""
+        digest = hashlib.blake2b(digest_size=16)
+        original = original_text.encode()
+        digest.update(len(original).to_bytes(8, "little"))
+        digest.update(original)
+        digest.update(edited_text.encode())
+        return digest.digest()
+
+    def generate_diff(
+        self, original_text: str, edited_text: str, markup_format: str | None = None
+    ) -> str:
         """
         Generate a word-level diff showing specific changes.
         """
-        original_tokens = self._tokenize(original_text)
-        edited_tokens = self._tokenize(edited_text)
-        diff_tokens = self._calculate_diff(original_tokens, edited_tokens)
+        stream = io.StringIO()
+        self.write_diff(original_text, edited_text, stream, markup_format)
+        return stream.getvalue()
+
+    def write_diff(
+        self,
+        original_text: str,
+        edited_text: str,
+        stream: TextIO,
+        markup_format: str | None = None,
+    ) -> None:
+        """
+        Write a diff between original and edited text to a stream.
+
+        Args:
+            original_text: The original text
+            edited_text: The edited text
+            stream: The text stream to write to
+            markup_format: One of FORMATS (default: the manager's format)
+        """
+        self.render_diff(
+            self.get_diff_result(original_text, edited_text), stream, markup_format
+        )
 
-        diff_text = "".join(diff_tokens)
+    def render_diff(
+        self, result: DiffResult, stream: TextIO, markup_format: str | None = None
+    ) -> None:
+        """
+        Write a computed diff to a stream.
 
-        return diff_text
+        Args:
+            result: The diff to render
+            stream: The text stream to write to
+            markup_format: One of FORMATS (default: the manager's format)
+        """
+        markup_format = markup_format or self.markup_format
+        if markup_format == "unified":
+            self._write_unified(result, stream)
+        elif markup_format == "html":
+            stream.write('<pre class="diff">')
+            self._write_markup(result, stream, markup_format)
+            stream.write("</pre>\n")
+        else:
+            self._write_markup(result, stream, markup_format)
 
     @staticmethod
     def _tokenize(text: str) -> list[str]:
@@ -36,35 +159,93 @@ class MarkupManager:
         """
         return re.findall(r"\w+|\S+|\s+", text)
 
-    def _calculate_diff(
-        self, original_tokens: list[str], edited_tokens: list[str]
-    ) -> list[str]:
+    @staticmethod
+    def _markers(markup_format: str) -> tuple[str, str, str, str]:
+        """Get the (delete start, delete end, insert start, insert end) markers."""
+        if markup_format == "ansi":
+            return (
+                f"{Colors.red}{Colors.strike}",
+                Colors.reset,
+                Colors.green,
+                Colors.reset,
+            )
+        if markup_format == "plain":
+            return "[-", "-]", "{+", "+}"
+        if markup_format == "html":
+            return "<del>", "</del>", "<ins>", "</ins>"
+        raise ValueError(f"Unknown markup format: {markup_format}")
+
+    def _write_markup(
+        self, result: DiffResult, stream: TextIO, markup_format: str = "ansi"
+    ) -> None:
         """
-        Calculate differences between token lists and produce formatted diff tokens.
+        Write a token diff as inline markup.
 
-        Args:
-            original_tokens: List of tokens from the original text
-            edited_tokens: List of tokens from the edited text
+        Each run of deleted or inserted tokens is wrapped in a single pair of
+        markers rather than one pair per token.
 
-        Returns:
-            List of formatted tokens with diff markup
+        Args:
+            result: The diff to render
+            stream: The text stream to write to
+            markup_format: "ansi", "plain" or "html"
         """
-        matcher = difflib.SequenceMatcher(None, original_tokens, edited_tokens)
-        result = []
+        delete_start, delete_end, insert_start, insert_end = self._markers(
+            markup_format
+        )
+        escape = html.escape if markup_format == "html" else str
+        original_tokens, edited_tokens = result.original, result.edited
 
-        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        for tag, i1, i2, j1, j2 in result.ops:
             if tag == "equal":
-                result.extend(original_tokens[i1:i2])
-            elif tag == "delete":
-                for token in original_tokens[i1:i2]:
-                    result.append(f"{Colors.red}{Colors.strike}{token}{Colors.reset}")
-            elif tag == "insert":
-                for token in edited_tokens[j1:j2]:
-                    result.append(f"{Colors.green}{token}{Colors.reset}")
-            elif tag == "replace":
-                for token in original_tokens[i1:i2]:
-                    result.append(f"{Colors.red}{Colors.strike}{token}{Colors.reset}")
-                for token in edited_tokens[j1:j2]:
-                    result.append(f"{Colors.green}{token}{Colors.reset}")
-
-        return result
+                stream.write(escape("".join(original_tokens[i1:i2])))
+                continue
+            if i1 < i2:
+                deleted = escape("".join(original_tokens[i1:i2]))
+                stream.write(f"{delete_start}{deleted}{delete_end}")
+            if j1 < j2:
+                inserted = escape("".join(edited_tokens[j1:j2]))
+                stream.write(f"{insert_start}{inserted}{insert_end}")
+
+    def _write_unified(self, result: DiffResult, stream: TextIO) -> None:
+        """
+        Write a line-based unified diff, as produced by diff -u.
+
+        Nothing is written if the texts are the same. Line numbers in the hunk
+        headers are relative to the section.
+        """
+        if not result.changed:
+            return
+
+        original_lines = "".join(result.original).splitlines()
+        edited_lines = "".join(result.edited).splitlines()
+        groups = MyersDiff(original_lines, edited_lines).get_grouped_opcodes(
+            self.UNIFIED_CONTEXT
+        )
+
+        if groups:
+            stream.write("--- original\n+++ edited\n")
+        for group in groups:
+            i1, j1 = group[0][1], group[0][3]
+            i2, j2 = group[-1][2], group[-1][4]
+            stream.write(
+                f"@@ -{self._hunk_range(i1, i2)} +{self._hunk_range(j1, j2)} @@\n"
+            )
+            for tag, i1, i2, j1, j2 in group:
+                if tag == "equal":
+                    for line in original_lines[i1:i2]:
+                        stream.write(f" {line}\n")
+                    continue
+                for line in original_lines[i1:i2]:
+                    stream.write(f"-{line}\n")
+                for line in edited_lines[j1:j2]:
+                    stream.write(f"+{line}\n")
+
+    @staticmethod
+    def _hunk_range(start: int, end: int) -> str:
+        """Format a unified diff hunk range, as difflib does."""
+        length = end - start
+        if length == 1:
+            return str(start + 1)
+        if not length:
+            start -= 1
+        return f"{start + 1},{length}"
@@ -0,0 +1,117 @@
+import os
+
+
+class OutputWriter:
+    """
+    Long-lived, buffered writer for the edited output file.
+
+    Every section is written together with an entry in a journal file
+    ("<output>.journal") recording the section index the output now reaches
+    and the output size at that point. On reopening, anything written past the
+    last journal entry (a section interrupted by a crash) is truncated, and
+    next_section says exactly where to resume, so sections are never
+    duplicated or lost.
+
+    The output and journal files are only created when the first section is
+    written, so a session that writes nothing leaves no files behind.
+
+    The fsync policy controls durability against power loss: "always" syncs
+    after every section, "close" when the writer is closed and "never" leaves
+    it to the operating system.
+    """
+
+    FSYNC_POLICIES = ("never", "close", "always")
+
+    def __init__(self, path: str, fsync: str = "close"):
+        if fsync not in self.FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.fsync = fsync
+        self.next_section = self._recover()
+        self._file = None
+        self._journal = None
+
+    def write(self, content: str, next_section: int) -> None:
+        """
+        Write a section and record that the output reaches next_section.
+
+        The section is flushed to the operating system before its journal
+        entry, so the journal never points past data that was not written.
+        """
+        if self._file is None:
+            self._file = open(self.path, "ab")
+            self._journal = open(self.journal_path, "a")
+
+        self._file.write((content + "\n\n").encode())
+        self._file.flush()
+        if self.fsync == "always":
+            os.fsync(self._file.fileno())
+
+        self._journal.write(f"{next_section} {self._file.tell()}\n")
+        self._journal.flush()
+        if self.fsync == "always":
+            os.fsync(self._journal.fileno())
+
+        self.next_section = next_section
+
+    def close(self) -> None:
+        """Flush and close the output and journal files, removing an empty journal."""
+        for f in (self._file, self._journal):
+            if f is None or f.closed:
+                continue
+            f.flush()
+            if self.fsync != "never":
+                os.fsync(f.fileno())
+            f.close()
+
+        if os.path.exists(self.journal_path) and not os.path.getsize(self.journal_path):
+            os.unlink(self.journal_path)
+
+    def _recover(self) -> int | None:
+        """
+        Truncate uncommitted output and find the section to resume from.
+
+        Returns:
+            The section index after the last committed section, or None if
+            there is no usable journal
+        """
+        entry = self._last_journal_entry()
+        if entry is None:
+            return None
+
+        next_section, committed_size = entry
+        output_size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if output_size < committed_size:
+            # The output was replaced or removed, so the journal no longer applies
+            os.unlink(self.journal_path)
+            return None
+
+        if output_size > committed_size:
+            with open(self.path, "r+b") as f:
+                f.truncate(committed_size)
+
+        # Compact the journal down to its last entry
+        with open(self.journal_path, "w") as journal:
+            journal.write(f"{next_section} {committed_size}\n")
+
+        return next_section
+
+    def _last_journal_entry(self) -> tuple[int, int] | None:
+        """Get the last complete journal entry, if any."""
+        try:
+            with open(self.journal_path) as journal:
+                lines = journal.readlines()
+        except FileNotFoundError:
+            return None
+
+        for line in reversed(lines):
+            # A crash can leave a partial last line; skip it
+            parts = line.split()
+            if line.endswith("\n") and len(parts) == 2:
+                try:
+                    return int(parts[0]), int(parts[1])
+                except ValueError:
+                    continue
+        return None
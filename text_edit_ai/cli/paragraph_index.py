@@ -0,0 +1,105 @@
+import hashlib
+import os
+import struct
+
+
+class ParagraphIndex:
+    """
+    Sidecar index of the paragraphs in a text file.
+
+    Stored next to the file as "<file>.idx", it maps each paragraph number to
+    its byte offset, length and content hash. The header records the size and
+    modification time of the file it was built from, so a stale index is
+    detected and ignored. Entries are fixed-size records read straight from
+    disk, so looking up any paragraph costs the same regardless of position.
+    """
+
+    MAGIC = b"TEAIIDX1"
+    HEADER = struct.Struct("<8sQQQ")
+    RECORD = struct.Struct("<QQ8s")
+
+    def __init__(self, index_path: str, count: int):
+        self.index_path = index_path
+        self.count = count
+        self._file = open(index_path, "rb")
+
+    def __len__(self) -> int:
+        return self.count
+
+    @staticmethod
+    def index_path(path: str) -> str:
+        """Get the sidecar index path for a text file."""
+        return path + ".idx"
+
+    @staticmethod
+    def hash(data: bytes) -> bytes:
+        """Hash a paragraph's raw bytes."""
+        return hashlib.blake2b(data, digest_size=8).digest()
+
+    @classmethod
+    def load(cls, path: str) -> "ParagraphIndex | None":
+        """
+        Open the index for a text file.
+
+        Returns:
+            The index, or None if there is none or it does not match the
+            file's current size and modification time
+        """
+        index_path = cls.index_path(path)
+        try:
+            stat = os.stat(path)
+            with open(index_path, "rb") as f:
+                header = f.read(cls.HEADER.size)
+            index_size = os.path.getsize(index_path)
+        except OSError:
+            return None
+
+        if len(header) != cls.HEADER.size:
+            return None
+        magic, size, mtime_ns, count = cls.HEADER.unpack(header)
+        if (
+            magic != cls.MAGIC
+            or size != stat.st_size
+            or mtime_ns != stat.st_mtime_ns
+            or index_size != cls.HEADER.size + count * cls.RECORD.size
+        ):
+            return None
+
+        return cls(index_path, count)
+
+    @classmethod
+    def save(
+        cls, path: str, offsets: list[int], lengths: list[int], hashes: bytes
+    ) -> None:
+        """
+        Write the index for a text file.
+
+        The index is written to a temporary file and renamed into place.
+        Failures (e.g. a read-only directory) are ignored, since the index is
+        only an optimization.
+        """
+        index_path = cls.index_path(path)
+        temp_path = index_path + ".tmp"
+        try:
+            stat = os.stat(path)
+            with open(temp_path, "wb") as f:
+                f.write(
+                    cls.HEADER.pack(
+                        cls.MAGIC, stat.st_size, stat.st_mtime_ns, len(offsets)
+                    )
+                )
+                for i, (offset, length) in enumerate(zip(offsets, lengths)):
+                    f.write(cls.RECORD.pack(offset, length, hashes[i * 8 : i * 8 + 8]))
+            os.replace(temp_path, index_path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+    def entry(self, index: int) -> tuple[int, int, bytes]:
+        """Get the byte offset, length and content hash of a paragraph."""
+        self._file.seek(self.HEADER.size + index * self.RECORD.size)
+        return self.RECORD.unpack(self._file.read(self.RECORD.size))
+
+    def close(self) -> None:
+        """Close the index file."""
+        self._file.close()
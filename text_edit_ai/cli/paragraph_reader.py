@@ -0,0 +1,154 @@
+from array import array
+from collections import OrderedDict
+from collections.abc import Iterator
+from .paragraph_index import ParagraphIndex
+
+
+class ParagraphReader:
+    """
+    Lazily reads the paragraphs of a text file.
+
+    Every non-blank line of the file is a paragraph, with surrounding
+    whitespace stripped. The file is scanned with buffered binary reads and only
+    the byte offset, length and hash of each paragraph are kept; paragraph text
+    is read back on demand and only a window of recently used paragraphs is
+    held in memory, so very large files open quickly and use flat memory.
+
+    Once the whole file has been scanned, the offsets are saved to a
+    ParagraphIndex next to it. Later sessions reuse that index instead of
+    scanning, so resuming deep into a large file seeks straight to the right
+    paragraph.
+
+    Supports len(), indexing and slicing like the list of paragraphs it stands
+    in for. len() has to scan the whole file, so has() is the cheap way to
+    check whether a paragraph exists.
+    """
+
+    ENCODING = "utf-8"
+    WINDOW_SIZE = 256
+    BUFFER_SIZE = 1024 * 1024
+
+    def __init__(self, path: str, window_size: int = WINDOW_SIZE):
+        self.path = path
+        self.window_size = window_size
+        self.index = ParagraphIndex.load(path)
+        self.offsets = array("q")
+        self.lengths = array("q")
+        self.hashes = bytearray()
+        self._file = open(path, "rb", buffering=self.BUFFER_SIZE)
+        self._scan_position = 0
+        self._scanned = self.index is not None
+        self._window: OrderedDict[int, str] = OrderedDict()
+
+    def __len__(self) -> int:
+        self._scan()
+        return self._count()
+
+    def __getitem__(self, index: int | slice) -> str | list[str]:
+        if isinstance(index, slice):
+            if index.step is None and (index.start or 0) >= 0 and index.stop:
+                # Plain forward slices only need the file scanned up to stop
+                self._scan(index.stop - 1)
+                stop = min(index.stop, self._count())
+                return [self[i] for i in range(index.start or 0, stop)]
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        self._scan(index)
+        if not 0 <= index < self._count():
+            raise IndexError("paragraph index out of range")
+
+        if index in self._window:
+            self._window.move_to_end(index)
+            return self._window[index]
+
+        paragraph = self._read(index)
+        self._window[index] = paragraph
+        if len(self._window) > self.window_size:
+            self._window.popitem(last=False)
+        return paragraph
+
+    def __iter__(self) -> Iterator[str]:
+        index = 0
+        while True:
+            self._scan(index)
+            if index >= self._count():
+                return
+            yield self[index]
+            index += 1
+
+    def has(self, index: int) -> bool:
+        """Check if there is a paragraph at index, scanning only up to it."""
+        self._scan(index)
+        return 0 <= index < self._count()
+
+    def close(self) -> None:
+        """Close the underlying files."""
+        self._file.close()
+        if self.index is not None:
+            self.index.close()
+
+    def _count(self) -> int:
+        """Get the number of paragraphs known so far."""
+        return len(self.index) if self.index is not None else len(self.offsets)
+
+    def _entry(self, index: int) -> tuple[int, int, bytes]:
+        """Get the byte offset, length and hash of a paragraph."""
+        if self.index is not None:
+            return self.index.entry(index)
+        return (
+            self.offsets[index],
+            self.lengths[index],
+            bytes(self.hashes[index * 8 : index * 8 + 8]),
+        )
+
+    def _read(self, index: int) -> str:
+        """Read a paragraph's text from the file."""
+        offset, length, digest = self._entry(index)
+        self._file.seek(offset)
+        data = self._file.read(length)
+
+        if self.index is not None and ParagraphIndex.hash(data) != digest:
+            # The file changed without its size or mtime changing; rescan
+            self._discard_index()
+            return self[index]
+
+        return data.decode(self.ENCODING).strip()
+
+    def _discard_index(self) -> None:
+        """Stop using a stale index and fall back to scanning the file."""
+        self.index.close()
+        self.index = None
+        self._scanned = False
+        self._window.clear()
+
+    def _scan(self, index: int | None = None) -> None:
+        """
+        Record paragraph offsets until paragraph index is known.
+
+        Scans to the end of the file if index is None, and saves the index
+        once the end of the file is reached.
+        """
+        if self._scanned or (index is not None and index < len(self.offsets)):
+            return
+
+        position = self._scan_position
+        self._file.seek(position)
+        while index is None or len(self.offsets) <= index:
+            line = self._file.readline()
+            if not line:
+                self._scanned = True
+                # A file without paragraphs needs no index
+                if self.offsets:
+                    ParagraphIndex.save(
+                        self.path, self.offsets, self.lengths, self.hashes
+                    )
+                break
+            # Lines never split a UTF-8 sequence, so each decodes on its own
+            if line.decode(self.ENCODING).strip():
+                self.offsets.append(position)
+                self.lengths.append(len(line))
+                self.hashes += ParagraphIndex.hash(line)
+            position += len(line)
+        self._scan_position = position
@@ -0,0 +1,88 @@
+import re
+
+# One anchored edit: the exact original text and what replaces it
+EDIT_PATTERN = re.compile(
+    r"<edit>\s*<find>(.*?)</find>\s*<replace>(.*?)</replace>\s*</edit>", re.DOTALL
+)
+# Response meaning the section needs no changes
+UNCHANGED = "<unchanged/>"
+
+
+class PatchError(ValueError):
+    """A patch response that can't be applied cleanly to its section."""
+
+
+class PatchApplier:
+    """
+    Applies patch-format responses to the sections they edit.
+
+    A patch lists only the changes to a section, each as an <edit> holding
+    a <find> copied from the section and the <replace> that takes its place,
+    so a light edit of a long section costs a fraction of the output tokens
+    of the full revised text. A patch only applies if every find occurs
+    exactly once in the section and no two edits overlap; anything else is
+    rejected rather than guessed at.
+    """
+
+    @staticmethod
+    def parse(response: str) -> list[tuple[str, str]]:
+        """
+        Get the edits in a patch response.
+
+        Args:
+            response: The model's response
+
+        Returns:
+            The (find, replace) pairs, in order
+
+        Raises:
+            PatchError: If the response is not a well-formed patch
+        """
+        response = response.strip()
+        if response == UNCHANGED:
+            return []
+
+        edits = EDIT_PATTERN.findall(response)
+        if not edits:
+            raise PatchError("no edits in response")
+        if EDIT_PATTERN.sub("", response).strip():
+            raise PatchError("text outside of edits")
+        return edits
+
+    @classmethod
+    def apply(cls, original: str, response: str) -> str:
+        """
+        Apply a patch response to the section it edits.
+
+        Args:
+            original: The section sent to the model
+            response: The model's patch
+
+        Returns:
+            The edited section
+
+        Raises:
+            PatchError: If the patch is malformed or doesn't match the section
+        """
+        spans = []
+        for find, replace in cls.parse(response):
+            if not find:
+                raise PatchError("empty find")
+            start = original.find(find)
+            if start == -1:
+                raise PatchError(f"find not in section: {find[:40]!r}")
+            if original.find(find, start + 1) != -1:
+                raise PatchError(f"find not unique: {find[:40]!r}")
+            spans.append((start, start + len(find), replace))
+
+        spans.sort()
+        parts = []
+        position = 0
+        for start, end, replace in spans:
+            if start < position:
+                raise PatchError("overlapping edits")
+            parts.append(original[position:start])
+            parts.append(replace)
+            position = end
+        parts.append(original[position:])
+        return "".join(parts)
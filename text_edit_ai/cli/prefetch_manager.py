@@ -0,0 +1,104 @@
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from .langchain_manager import LangchainManager
+
+
+class PrefetchManager:
+    """
+    Requests AI edits for upcoming sections in the background.
+
+    While the reviewer reads one section, edits for the next few sections are
+    already in flight on a worker pool, so (c)ontinue rarely has to wait for a
+    full model round-trip.
+    """
+
+    def __init__(self, langchain_manager: LangchainManager, depth: int = 0):
+        self.langchain_manager = langchain_manager
+        self.depth = depth
+        self.executor = (
+            ThreadPoolExecutor(max_workers=depth, thread_name_prefix="prefetch")
+            if depth > 0
+            else None
+        )
+        self.pending: dict[tuple[str, str], Future] = {}
+
+    def prefetch(
+        self, context: str, sections: list[str], current: str | None = None
+    ) -> None:
+        """
+        Start requests for the given upcoming sections.
+
+        A request already made for the current section is kept, but none is
+        started for it, so that it is requested directly and streams.
+        Requests for other sections that are no longer upcoming (e.g. after a
+        size or file prompt change) are cancelled if they have not started yet.
+        """
+        if not self.executor:
+            return
+
+        wanted = {(context, section) for section in sections}
+        if current is not None:
+            wanted.add((context, current))
+        for key in list(self.pending):
+            if key not in wanted:
+                self.pending.pop(key).cancel()
+
+        for section in sections:
+            key = (context, section)
+            if key not in self.pending:
+                self.pending[key] = self.executor.submit(
+                    self.langchain_manager.get_timed_response, context, section
+                )
+
+    def get_timed_response(
+        self,
+        context: str,
+        writing: str,
+        on_token: Callable[[str], None] | None = None,
+    ) -> tuple[str, float | None, float]:
+        """
+        Get the edit for a section, using a prefetched request when available.
+
+        A prefetched edit is passed to on_token in one piece. Falls back to a
+        direct, streamed request if nothing was prefetched or the background
+        request failed.
+
+        Returns:
+            The edited text, and how long the caller waited for its first
+            token and for all of it, in seconds. For a prefetched edit these
+            are the wait for the background request to finish, not the
+            request's own timings.
+        """
+        future = self.pending.pop((context, writing), None)
+        if future is None or future.cancelled():
+            return self.langchain_manager.get_timed_response(context, writing, on_token)
+
+        start = time.perf_counter()
+        try:
+            edited = future.result()[0]
+        except Exception as e:
+            print(f"Background request failed, retrying: {e}")
+        else:
+            if on_token:
+                on_token(edited)
+            waited = time.perf_counter() - start
+            return edited, waited, waited
+
+        # The wait for the failed request counts too
+        waited = time.perf_counter() - start
+        edited, first_token, total = self.langchain_manager.get_timed_response(
+            context, writing, on_token
+        )
+        if first_token is not None:
+            first_token += waited
+        return edited, first_token, total + waited
+
+    def shutdown(self) -> None:
+        """Cancel outstanding requests and stop the worker pool."""
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,125 @@
+import cProfile
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+
+class Profiler:
+    """
+    Profiles a session with cProfile, tracemalloc and a stack sampler.
+
+    cProfile gives exact call counts and times for the main thread, where the
+    reviewer's session runs. tracemalloc records where memory is allocated.
+    Since cProfile only sees the thread it was started in and keeps no full
+    stacks, a sampler thread also records the stack of every thread (prefetch
+    and batch workers included) at a fixed interval, which is written in the
+    collapsed format read by flamegraph.pl and speedscope.
+    """
+
+    # Seconds between stack samples
+    INTERVAL = 0.005
+    # Number of allocation sites reported
+    TOP_ALLOCATIONS = 25
+
+    def __init__(self, directory: str = ".", interval: float = INTERVAL):
+        self.directory = directory
+        self.interval = interval
+        self.prefix = os.path.join(
+            directory, time.strftime("text_edit_ai-%Y%m%d-%H%M%S")
+        )
+        self.samples: Counter[str] = Counter()
+        self._profile = cProfile.Profile()
+        self._stop = threading.Event()
+        self._sampler = None
+        self._thread_names: dict[int, str] = {}
+
+    def start(self) -> None:
+        """Start profiling."""
+        tracemalloc.start()
+        self._sampler = threading.Thread(
+            target=self._sample, name="profiler", daemon=True
+        )
+        self._sampler.start()
+        self._profile.enable()
+
+    def stop(self) -> list[str]:
+        """
+        Stop profiling and write the results.
+
+        Returns:
+            The paths of the pstats file, the allocation report and the
+            collapsed stacks
+        """
+        self._profile.disable()
+        self._stop.set()
+        self._sampler.join()
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        os.makedirs(self.directory, exist_ok=True)
+        paths = [
+            self.prefix + ".pstats",
+            self.prefix + ".alloc.txt",
+            self.prefix + ".collapsed",
+        ]
+        self._profile.dump_stats(paths[0])
+        self._write_allocations(snapshot, peak, paths[1])
+        self._write_collapsed(paths[2])
+        return paths
+
+    def _sample(self) -> None:
+        """Record the stacks of all other threads until stopped."""
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    self.samples[self._collapse(ident, frame)] += 1
+
+    def _collapse(self, ident: int, frame) -> str:
+        """Format a thread's stack as semicolon-separated frames, root first."""
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            filename = os.path.basename(code.co_filename)
+            frames.append(f"{code.co_name} ({filename}:{code.co_firstlineno})")
+            frame = frame.f_back
+        frames.append(self._thread_name(ident))
+        return ";".join(reversed(frames))
+
+    def _thread_name(self, ident: int) -> str:
+        """Get the name of a thread, caching it while the thread exists."""
+        name = self._thread_names.get(ident)
+        if name is None:
+            self._thread_names = {t.ident: t.name for t in threading.enumerate()}
+            name = self._thread_names.get(ident, f"thread-{ident}")
+        return name
+
+    def _write_allocations(
+        self, snapshot: tracemalloc.Snapshot, peak: int, path: str
+    ) -> None:
+        """Write the peak memory use and the allocation sites holding the most."""
+        snapshot = snapshot.filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+        stats = snapshot.statistics("lineno")
+        total = sum(stat.size for stat in stats)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"Peak traced memory: {peak / 1024:.1f} KiB\n")
+            f.write(f"Allocated at exit: {total / 1024:.1f} KiB\n")
+            f.write(f"Top {self.TOP_ALLOCATIONS} allocation sites:\n")
+            for stat in stats[: self.TOP_ALLOCATIONS]:
+                frame = stat.traceback[0]
+                f.write(
+                    f"{stat.size / 1024:>10.1f} KiB {stat.count:>8} blocks  "
+                    f"{frame.filename}:{frame.lineno}\n"
+                )
+
+    def _write_collapsed(self, path: str) -> None:
+        """Write the sampled stacks in the collapsed stack format."""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
@@ -0,0 +1,102 @@
+import hashlib
+import threading
+import time
+from .token_estimator import TokenEstimator
+
+
+class PromptCache:
+    """
+    Provider-side cache of the static prompt prefix.
+
+    Every request starts with the same system prompt and file prompt, which
+    can be a long style guide. For models that support explicit context
+    caching (Gemini's cached content), the prefix is uploaded once and later
+    requests refer to it by name, so only the section itself is sent and the
+    prefix is billed at the cached rate. Prefixes too short for the provider to
+    cache, and models without explicit caching, are sent in full as usual
+    (providers such as OpenAI then cache the identical leading prefix on their
+    own).
+    """
+
+    # Providers refuse to cache prefixes shorter than this
+    MIN_TOKENS = 1024
+    # Lifetime of cached content, in seconds; entries are renewed shortly
+    # before they expire
+    TTL = 3600
+    RENEW_MARGIN = 60
+
+    def __init__(self, min_tokens: int = MIN_TOKENS):
+        self.min_tokens = min_tokens
+        self._entries: dict[tuple[str, bytes], tuple[str | None, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, model, model_name: str, prefix: str) -> str | None:
+        """
+        Get the name of the cached content holding prefix, creating it if needed.
+
+        Args:
+            model: The chat model the prefix is for
+            model_name: The model's name
+            prefix: The system instructions to cache
+
+        Returns:
+            The cached content name to send with the request, or None if the
+            prefix is not cached and must be sent in full
+        """
+        if (
+            not self.supports(model)
+            or TokenEstimator.estimate(prefix) < self.min_tokens
+        ):
+            return None
+
+        key = (model_name, hashlib.sha256(prefix.encode()).digest())
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                return entry[0]
+
+            try:
+                name = self._create(model, prefix)
+            except Exception as e:
+                # Remember the failure so the prefix is simply sent in full
+                # until the entry would have expired
+                print(f"Prompt caching unavailable: {e}")
+                name = None
+            self._entries[key] = (
+                name,
+                time.monotonic() + self.TTL - self.RENEW_MARGIN,
+            )
+            return name
+
+    def supports(self, model) -> bool:
+        """Check if a chat model supports explicit context caching."""
+        return hasattr(model, "create_cached_content")
+
+    def _create(self, model, prefix: str) -> str:
+        """Upload prefix to the provider and get the cached content name."""
+        from langchain_core.messages import SystemMessage
+
+        return model.create_cached_content([SystemMessage(prefix)], ttl=self.TTL)
+
+
+class LocalPromptCache(PromptCache):
+    """
+    Stand-in for PromptCache that never contacts a provider.
+
+    Hands out deterministic cached content names for any model and keeps the
+    cached prefixes in memory, for tests and benchmarks.
+    """
+
+    def __init__(self, min_tokens: int = PromptCache.MIN_TOKENS):
+        super().__init__(min_tokens)
+        self.contents: dict[str, str] = {}
+
+    def supports(self, model) -> bool:
+        return True
+
+    def _create(self, model, prefix: str) -> str:
+        name = (
+            "cachedContents/local-" + hashlib.sha256(prefix.encode()).hexdigest()[:16]
+        )
+        self.contents[name] = prefix
+        return name
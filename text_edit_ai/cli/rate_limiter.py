@@ -0,0 +1,100 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    A token bucket refilled continuously at rate units per second.
+
+    Callers reserve what they need up front, which may take the level below
+    zero, and wait until the bucket would have refilled that far. Waiting
+    callers are therefore served in order and never starve each other.
+    """
+
+    def __init__(self, per_minute: float, now: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.level = per_minute
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """
+        Take amount from the bucket.
+
+        Returns:
+            The number of seconds to wait before using it
+        """
+        self._refill(now)
+        self.level -= amount
+        return max(0.0, -self.level / self.rate)
+
+    def adjust(self, amount: float, now: float) -> None:
+        """Take a further amount (or give some back, if negative)."""
+        self._refill(now)
+        self.level = min(self.capacity, self.level - amount)
+
+    def _refill(self, now: float) -> None:
+        """Add what was refilled since the last update."""
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class RateLimiter:
+    """
+    Client-side limiter for requests per minute (RPM) and tokens per minute (TPM).
+
+    Schedules requests to stay just under the provider's quotas instead of
+    running into 429 errors. Each request reserves one request and its
+    estimated token count; once the real usage is known, correct() settles
+    the difference. Either limit may be None for no limit. Shared by all
+    threads.
+    """
+
+    # Fraction of the quota to use, leaving room for clock differences
+    HEADROOM = 0.95
+
+    def __init__(self, rpm: float | None = None, tpm: float | None = None):
+        now = time.monotonic()
+        self.requests = TokenBucket(rpm * self.HEADROOM, now) if rpm else None
+        self.tokens = TokenBucket(tpm * self.HEADROOM, now) if tpm else None
+        self.waited = 0.0
+        self._lock = threading.Lock()
+        self.sleep = time.sleep
+
+    @property
+    def enabled(self) -> bool:
+        """Check if any limit is set."""
+        return self.requests is not None or self.tokens is not None
+
+    def acquire(self, tokens: int) -> float:
+        """
+        Wait until a request using about this many tokens fits in the quotas.
+
+        Args:
+            tokens: The estimated input and output tokens of the request
+
+        Returns:
+            The number of seconds waited
+        """
+        if not self.enabled:
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            delay = 0.0
+            if self.requests is not None:
+                delay = self.requests.reserve(1, now)
+            if self.tokens is not None:
+                delay = max(delay, self.tokens.reserve(tokens, now))
+            self.waited += delay
+
+        if delay:
+            self.sleep(delay)
+        return delay
+
+    def correct(self, estimated: int, actual: int) -> None:
+        """Settle the difference between a request's estimated and real usage."""
+        if self.tokens is None or actual == estimated:
+            return
+        with self._lock:
+            self.tokens.adjust(actual - estimated, time.monotonic())
@@ -0,0 +1,167 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+
+class ResponseCache:
+    """
+    Persistent, content-addressed cache of model responses.
+
+    Responses are stored in SQLite under a hash of everything that determines
+    them (model name, system prompt, file prompt and text). Once the cache grows
+    past max_bytes, the least recently used entries are evicted.
+    """
+
+    CACHE_FILE = os.path.join(os.path.expanduser("~"), ".ai_text_editor_cache.sqlite")
+    MAX_BYTES = 64 * 1024 * 1024
+
+    def __init__(self, path: str | None = None, max_bytes: int | None = None):
+        self.path = path or self.CACHE_FILE
+        self.max_bytes = max_bytes or self.MAX_BYTES
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+                "size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_last_used "
+                "ON responses (last_used)"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS stats ("
+                "name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """Build a cache key from the parts that determine a response."""
+        digest = hashlib.sha256()
+        for part in parts:
+            encoded = part.encode()
+            digest.update(len(encoded).to_bytes(8, "little"))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+    def lookup(self, *candidates: list[str]) -> list[str] | None:
+        """
+        Look up the first fully cached list of keys.
+
+        Each candidate is a list of keys that together make up one response
+        (e.g. a whole section, or each of its paragraphs). Counts as a single
+        hit or miss.
+
+        Returns:
+            The cached responses for the first candidate whose keys are all
+            cached, or None
+        """
+        with self.lock:
+            for keys in candidates:
+                responses = []
+                for key in keys:
+                    row = self.connection.execute(
+                        "SELECT response FROM responses WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is None:
+                        break
+                    responses.append(row[0])
+                else:
+                    with self.connection:
+                        self.connection.executemany(
+                            "UPDATE responses SET last_used = ? WHERE key = ?",
+                            [(time.time(), key) for key in keys],
+                        )
+                        self._count("hits")
+                    self.hits += 1
+                    return responses
+
+            with self.connection:
+                self._count("misses")
+            self.misses += 1
+            return None
+
+    def put(self, key: str, response: str) -> None:
+        """Store a response and evict old entries if over the size cap."""
+        size = len(key) + len(response.encode())
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                (key, response, size, time.time()),
+            )
+            self._evict()
+
+    def clear(self) -> None:
+        """Remove every cached response and reset the statistics."""
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM responses")
+            self.connection.execute("DELETE FROM stats")
+        with self.lock:
+            self.connection.execute("VACUUM")
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        """Get the number and total size of entries and all-time hits/misses."""
+        with self.lock:
+            entries, size = self.connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            totals = dict(self.connection.execute("SELECT name, value FROM stats"))
+        return {
+            "entries": entries,
+            "bytes": size,
+            "hits": totals.get("hits", 0),
+            "misses": totals.get("misses", 0),
+        }
+
+    def describe(self) -> str:
+        """Describe the cache contents and hit rate for display."""
+        stats = self.stats()
+        lookups = stats["hits"] + stats["misses"]
+        hit_rate = stats["hits"] / lookups if lookups else 0
+        return (
+            f"Response cache: {stats['entries']} entries, "
+            f"{stats['bytes'] / 1024 / 1024:.1f} of "
+            f"{self.max_bytes / 1024 / 1024:.0f} MB, "
+            f"{stats['hits']} hits / {stats['misses']} misses "
+            f"({hit_rate:.0%} hit rate)"
+        )
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self.lock:
+            self.connection.close()
+
+    def _count(self, name: str) -> None:
+        """Increment a persisted statistic."""
+        self.connection.execute(
+            "INSERT INTO stats (name, value) VALUES (?, 1) "
+            "ON CONFLICT (name) DO UPDATE SET value = value + 1",
+            (name,),
+        )
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until under the size cap."""
+        (total,) = self.connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+
+        rows = self.connection.execute(
+            "SELECT key, size FROM responses ORDER BY last_used"
+        )
+        evicted = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self.connection.executemany("DELETE FROM responses WHERE key = ?", evicted)
@@ -0,0 +1,252 @@
+import random
+import re
+import threading
+import time
+from collections.abc import Callable
+from typing import TypeVar
+
+T = TypeVar("T")
+
+TRANSIENT = "transient"
+AUTH = "auth"
+BAD_MODEL = "bad_model"
+FATAL = "fatal"
+
+TRANSIENT_STATUS = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+AUTH_STATUS = {401, 403}
+BAD_MODEL_STATUS = {404}
+
+# Exception class names used by the provider SDKs, so they can be recognized
+# without importing any of them
+TRANSIENT_NAMES = {
+    "APIConnectionError",
+    "APITimeoutError",
+    "ConnectError",
+    "ConnectTimeout",
+    "DeadlineExceeded",
+    "InternalServerError",
+    "OverloadedError",
+    "RateLimitError",
+    "ReadTimeout",
+    "ResourceExhausted",
+    "ServiceUnavailable",
+    "TooManyRequests",
+}
+AUTH_NAMES = {"AuthenticationError", "PermissionDenied", "Unauthenticated"}
+BAD_MODEL_NAMES = {"NotFound", "NotFoundError"}
+
+TRANSIENT_PATTERN = re.compile(
+    r"\b(429|500|502|503|504)\b|rate.?limit|quota|overloaded|unavailable|"
+    r"timed? ?out|temporar|connection (reset|aborted|refused)",
+    re.IGNORECASE,
+)
+AUTH_PATTERN = re.compile(
+    r"\b(401|403)\b|api.?key|unauthori[sz]ed|permission denied|authenticat",
+    re.IGNORECASE,
+)
+BAD_MODEL_PATTERN = re.compile(
+    r"model.*(not found|not supported|does not exist|unknown|invalid)|"
+    r"(unknown|invalid|unsupported) model|infer model provider",
+    re.IGNORECASE,
+)
+
+
+def classify_error(error: BaseException) -> str:
+    """
+    Classify a failed model request.
+
+    Args:
+        error: The exception raised by the request
+
+    Returns:
+        TRANSIENT for errors worth retrying (rate limits, timeouts, outages),
+        AUTH for a rejected API key, BAD_MODEL for an unknown model and FATAL
+        for anything else
+    """
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return TRANSIENT
+
+    status = _status_code(error)
+    if status in TRANSIENT_STATUS:
+        return TRANSIENT
+    if status in AUTH_STATUS:
+        return AUTH
+    if status in BAD_MODEL_STATUS:
+        return BAD_MODEL
+
+    names = {cls.__name__ for cls in type(error).__mro__}
+    if names & TRANSIENT_NAMES:
+        return TRANSIENT
+    if names & AUTH_NAMES:
+        return AUTH
+    if names & BAD_MODEL_NAMES:
+        return BAD_MODEL
+
+    message = str(error)
+    if BAD_MODEL_PATTERN.search(message):
+        return BAD_MODEL
+    if AUTH_PATTERN.search(message):
+        return AUTH
+    if TRANSIENT_PATTERN.search(message):
+        return TRANSIENT
+    return FATAL
+
+
+def _status_code(error: BaseException) -> int | None:
+    """Find the HTTP status code of an error, if it carries one."""
+    for candidate in (
+        getattr(error, "status_code", None),
+        getattr(error, "code", None),
+        getattr(getattr(error, "response", None), "status_code", None),
+    ):
+        if isinstance(candidate, int):
+            return candidate
+    return None
+
+
+class CircuitBreaker:
+    """
+    Pauses all requests while the provider is failing.
+
+    After failure_threshold transient failures in a row the circuit opens and
+    every caller of wait() blocks for reset_timeout seconds. Then a single
+    trial request is let through: if it succeeds the circuit closes and
+    everyone resumes, and if it fails the circuit opens again. Shared by all
+    threads, so prefetch and batch workers stop hammering a provider that is
+    down instead of each retrying on its own.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._condition = threading.Condition()
+
+    def wait(self) -> None:
+        """Block until a request may be made."""
+        with self._condition:
+            while True:
+                if self.state == self.CLOSED:
+                    return
+                if self.state == self.OPEN:
+                    remaining = self.opened_at + self.reset_timeout - time.monotonic()
+                    if remaining <= 0:
+                        # This caller makes the trial request
+                        self.state = self.HALF_OPEN
+                        return
+                    self._condition.wait(remaining)
+                else:
+                    # A trial request is in flight
+                    self._condition.wait()
+
+    def record_success(self) -> None:
+        """Record that the provider answered, closing the circuit."""
+        with self._condition:
+            self.failures = 0
+            if self.state != self.CLOSED:
+                self.state = self.CLOSED
+                self._condition.notify_all()
+
+    def record_failure(self) -> bool:
+        """
+        Record a transient failure.
+
+        Returns:
+            True if this failure opened the circuit
+        """
+        with self._condition:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or (
+                self.state == self.CLOSED and self.failures >= self.failure_threshold
+            ):
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._condition.notify_all()
+                return True
+            return False
+
+
+class RetryPolicy:
+    """
+    Retries transient request failures with exponential backoff.
+
+    Waits a random time of up to base_delay * 2 ** (attempt - 1) seconds
+    (capped at max_delay) between attempts ("full jitter", so concurrent
+    workers don't retry in lockstep) and gives up after max_attempts. Errors
+    that retrying cannot fix, such as a rejected API key, are raised at once.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        circuit_breaker: CircuitBreaker | None = None,
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.circuit_breaker = circuit_breaker
+        self.sleep = time.sleep
+        self.random = random.random
+
+    def call(
+        self,
+        func: Callable[..., T],
+        *args,
+        on_retry: Callable[[BaseException, int, float], None] | None = None,
+        **kwargs,
+    ) -> T:
+        """
+        Call func, retrying transient failures.
+
+        Args:
+            func: The request to make
+            on_retry: Optional callback receiving the error, the number of the
+                failed attempt and the delay before the next one
+
+        Returns:
+            The result of func
+
+        Raises:
+            The last error, if it was not transient or no attempts remain
+        """
+        attempt = 1
+        while True:
+            if self.circuit_breaker:
+                self.circuit_breaker.wait()
+
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if classify_error(e) != TRANSIENT:
+                    # The provider answered, it just can't help with this request
+                    if self.circuit_breaker:
+                        self.circuit_breaker.record_success()
+                    raise
+                if self.circuit_breaker:
+                    self.circuit_breaker.record_failure()
+                if attempt >= self.max_attempts:
+                    raise
+
+                delay = self.backoff(attempt)
+                if on_retry:
+                    on_retry(e, attempt, delay)
+                self.sleep(delay)
+                attempt += 1
+                continue
+
+            if self.circuit_breaker:
+                self.circuit_breaker.record_success()
+            return result
+
+    def backoff(self, attempt: int) -> float:
+        """Get a jittered delay before the attempt after the given one."""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return self.random() * ceiling
@@ -0,0 +1,155 @@
+import re
+import threading
+from collections import Counter, OrderedDict
+
+_NUMBER = (
+    r"(\d+|[IVXLCDM]+|(?i:one|two|three|four|five|six|seven|eight|nine|ten"
+    r"|eleven|twelve|thirteen|fourteen|fifteen|sixteen|seventeen|eighteen"
+    r"|nineteen|twenty))"
+)
+# A capitalized or short function word of a title, so sentences don't pass
+_TITLE_WORD = (
+    r"([A-Z0-9][\w'\u2019\-]*|a|an|and|at|by|for|from|in|into|of|on|or|the|to"
+    r"|with)"
+)
+# An optional title of up to six words after a colon, period or dash, with no
+# closing punctuation: "Chapter 3: The Storm", but not "Scene 2. She walked in."
+_TITLE = rf"(\s*[:.\-\u2013\u2014](\s*{_TITLE_WORD}(\s+{_TITLE_WORD}){{0,5}})?)?"
+# Markdown headings and lines such as "Chapter 12", "PART TWO: Winter" or
+# "Epilogue", which are kept as they are
+HEADING_PATTERN = re.compile(
+    r"#{1,6}\s.*"
+    rf"|(?i:chapter|part|book|act|scene)\s+{_NUMBER}{_TITLE}"
+    rf"|(?i:prologue|epilogue|interlude|appendix){_TITLE}"
+)
+# Section numbers on their own line: "12", "12.", "XII" or "XII."
+NUMBER_PATTERN = re.compile(r"(\d+|[IVXLCDM]+)\.?")
+
+
+class SectionClassifier:
+    """
+    Finds sections that can be edited without asking the model.
+
+    Trivial sections, such as scene breaks (***), chapter headings and
+    one-word lines, are passed through as they are. A section whose text was
+    already edited with the same prompt, like a repeated epigraph, takes the
+    earlier edit. So does a section made of trivial and already edited
+    paragraphs. Earlier edits are kept for the most recent sections only.
+    """
+
+    # Longest paragraph taken for a heading
+    HEADING_MAX_CHARS = 60
+    # Longest paragraph taken for one word, as scripts such as Chinese or
+    # Japanese write whole sentences without spaces
+    WORD_MAX_CHARS = 20
+    # Number of earlier edits kept for duplicates
+    MAX_EDITS = 10_000
+
+    TRIVIAL = "trivial"
+    DUPLICATE = "duplicate"
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.skipped: Counter[str] = Counter()
+        self._edits: OrderedDict[tuple[str, str], str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def is_trivial(self, section: str) -> bool:
+        """Check if every paragraph of a section is trivial."""
+        return self.enabled and all(
+            self._is_trivial_paragraph(paragraph) for paragraph in section.split("\n\n")
+        )
+
+    def _is_trivial_paragraph(self, paragraph: str) -> bool:
+        """Check if a paragraph is punctuation, a heading, a number or one word."""
+        text = paragraph.strip()
+        if not any(c.isalnum() for c in text):
+            return True
+        if len(text) <= self.WORD_MAX_CHARS and len(text.split()) == 1:
+            return True
+        return len(text) <= self.HEADING_MAX_CHARS and bool(
+            HEADING_PATTERN.fullmatch(text) or NUMBER_PATTERN.fullmatch(text)
+        )
+
+    def lookup(self, context: str, section: str) -> str | None:
+        """
+        Get the earlier edit of a section with the same prompt.
+
+        Args:
+            context: The instructions for the edit
+            section: The text to edit
+
+        Returns:
+            The edit, or None if the section or one of its nontrivial
+            paragraphs wasn't edited before
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            edited = self._get(context, section)
+            if edited is not None:
+                return edited
+
+            paragraphs = section.split("\n\n")
+            if len(paragraphs) == 1:
+                return None
+            found = False
+            parts = []
+            for paragraph in paragraphs:
+                edited = self._get(context, paragraph)
+                if edited is not None:
+                    found = True
+                elif self._is_trivial_paragraph(paragraph):
+                    edited = paragraph
+                else:
+                    return None
+                parts.append(edited)
+        return "\n\n".join(parts) if found else None
+
+    def remember(self, context: str, section: str, edited: str) -> None:
+        """Keep the edit of a section, and of each of its paragraphs if they match."""
+        if not self.enabled:
+            return
+        paragraphs = section.split("\n\n")
+        edited_paragraphs = edited.split("\n\n")
+        with self._lock:
+            self._put(context, section, edited)
+            if len(paragraphs) > 1 and len(edited_paragraphs) == len(paragraphs):
+                for paragraph, edited_paragraph in zip(paragraphs, edited_paragraphs):
+                    self._put(context, paragraph, edited_paragraph)
+
+    def _get(self, context: str, text: str) -> str | None:
+        """Get an earlier edit, marking it as recently used."""
+        key = (context, text)
+        edited = self._edits.get(key)
+        if edited is not None:
+            self._edits.move_to_end(key)
+        return edited
+
+    def _put(self, context: str, text: str, edited: str) -> None:
+        """Keep an edit, dropping the least recently used beyond MAX_EDITS."""
+        self._edits[(context, text)] = edited
+        self._edits.move_to_end((context, text))
+        if len(self._edits) > self.MAX_EDITS:
+            self._edits.popitem(last=False)
+
+    def count(self, kind: str) -> None:
+        """Count a request that was skipped, as TRIVIAL or DUPLICATE."""
+        with self._lock:
+            self.skipped[kind] += 1
+
+    def describe(self) -> str | None:
+        """
+        Describe the requests skipped.
+
+        Returns:
+            The description, or None if no request was skipped
+        """
+        total = sum(self.skipped.values())
+        if not total:
+            return None
+        return (
+            f"Skipped {total} model request{'s' if total != 1 else ''}: "
+            f"{self.skipped[self.TRIVIAL]} trivial, "
+            f"{self.skipped[self.DUPLICATE]} duplicate"
+        )
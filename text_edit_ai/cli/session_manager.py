@@ -1,16 +1,33 @@
+from collections.abc import Iterator
+from itertools import islice
 from .config_manager import ConfigManager
+from .paragraph_reader import ParagraphReader
+from .token_estimator import TokenEstimator
 
 
 class SessionManager:
-    """Manages editing session state and progress."""
+    """
+    Manages editing session state and progress.
+
+    Sections are either a fixed number of paragraphs or, when
+    paragraphs_per_section is 0, as many consecutive paragraphs as fit in
+    token_budget estimated tokens (at least one).
+    """
+
+    TOKEN_BUDGET = 1000
 
     def __init__(
-        self, config_manager: ConfigManager, file: str, paragraphs_per_section: int = 1
+        self,
+        config_manager: ConfigManager,
+        file: str,
+        paragraphs_per_section: int = 1,
+        token_budget: int = TOKEN_BUDGET,
     ):
         self.config_manager = config_manager
         self.file = file
         self.file_config = config_manager.get_file_config(file)
         self.paragraphs_per_section = paragraphs_per_section
+        self.token_budget = token_budget
         self.current_section = int(self.file_config.get("current_section", "0"))
         self.sections = []
 
@@ -21,19 +38,70 @@ class SessionManager:
     def get_current_section(self) -> str:
         """Get the current section or group of sections."""
         start = self.current_section
-        end = min(start + self.paragraphs_per_section, len(self.sections))
+        end = self._section_end(start)
         return "\n\n".join(self.sections[start:end])
 
+    def get_upcoming_sections(self, count: int) -> list[str]:
+        """Get up to count sections following the current one."""
+        start = self._section_end(self.current_section)
+        return list(islice(self.iter_sections(start), count))
+
+    def iter_sections(self, start: int | None = None) -> Iterator[str]:
+        """Iterate over the sections from start (default: the current section)."""
+        if start is None:
+            start = self.current_section
+        while self._has(start):
+            end = self._section_end(start)
+            yield "\n\n".join(self.sections[start:end])
+            start = end
+
+    def _section_end(self, start: int) -> int:
+        """Get the index just past the last paragraph of the section at start."""
+        if self.paragraphs_per_section:
+            end = start + self.paragraphs_per_section
+            # Only the last section needs the count, and by then it is cheap
+            return end if self._has(end - 1) else len(self.sections)
+
+        end = start
+        tokens = 0
+        while self._has(end):
+            tokens += TokenEstimator.estimate(self.sections[end])
+            if tokens > self.token_budget and end > start:
+                break
+            end += 1
+        return end
+
+    def next_section(self) -> int:
+        """Get the index of the section after the current one."""
+        if self.paragraphs_per_section:
+            return self.current_section + self.paragraphs_per_section
+        return self._section_end(self.current_section)
+
     def advance(self) -> None:
         """Move to the next section."""
-        self.current_section += self.paragraphs_per_section
+        self.set_current_section(self.next_section())
+
+    def set_current_section(self, index: int) -> None:
+        """Move to the section at index and save the position."""
+        self.current_section = index
         self.file_config["current_section"] = str(self.current_section)
         self.config_manager.save_config()
 
     def is_complete(self) -> bool:
         """Check if all sections have been processed."""
-        return self.current_section >= len(self.sections)
+        return not self._has(self.current_section)
+
+    def _has(self, index: int) -> bool:
+        """Check if there is a paragraph at index, without counting them all."""
+        if isinstance(self.sections, ParagraphReader):
+            return self.sections.has(index)
+        return index < len(self.sections)
 
     def set_paragraphs_per_section(self, num: int) -> None:
-        """Set the number of paragraphs to process at once."""
+        """Set the number of paragraphs to process at once (0 for automatic)."""
         self.paragraphs_per_section = num
+
+    def set_token_budget(self, budget: int) -> None:
+        """Size sections automatically to fit within budget estimated tokens."""
+        self.token_budget = budget
+        self.paragraphs_per_section = 0
@@ -0,0 +1,180 @@
+import json
+import math
+import time
+from .token_estimator import TokenEstimator
+
+
+class _Timer:
+    """Context manager adding the time spent inside it to a record field."""
+
+    __slots__ = ("record", "field", "start")
+
+    def __init__(self, record: dict, field: str):
+        self.record = record
+        self.field = field
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.record[self.field] += time.perf_counter() - self.start
+        return False
+
+
+class _NullTimer:
+    """Context manager that does nothing, used while telemetry is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Telemetry:
+    """
+    Per-section performance records, written to a JSONL metrics file.
+
+    Each section shown or edited produces one record with its size in
+    characters and estimated tokens, the time to first token and total model
+    time, and the time spent diffing, writing output, saving progress and
+    waiting for the reviewer. Records are only created when a metrics file is
+    set; otherwise start_section() returns None and timer() hands back a
+    shared no-op context manager, so disabled telemetry costs a method call.
+    """
+
+    TIMINGS = ("ttft_s", "model_s", "diff_s", "io_s", "config_s", "think_s")
+    PERCENTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self._stream = None
+        self._values: dict[str, list[float]] = {field: [] for field in self.TIMINGS}
+        self.count = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Check if records are being collected."""
+        return self.path is not None
+
+    def start_section(self, file: str, index: int, section: str) -> dict | None:
+        """
+        Start the record of a section.
+
+        Args:
+            file: The file being edited
+            index: The index of the section's first paragraph
+            section: The text of the section
+
+        Returns:
+            The new record, or None if telemetry is disabled
+        """
+        if self.path is None:
+            return None
+        record = {
+            "file": file,
+            "section": index,
+            "paragraphs": section.count("\n\n") + 1,
+            "input_chars": len(section),
+            "input_tokens": TokenEstimator.estimate(section),
+            "output_chars": 0,
+            "output_tokens": 0,
+            "requests": 0,
+            "action": None,
+        }
+        record.update(dict.fromkeys(self.TIMINGS, 0.0))
+        record["ttft_s"] = None
+        return record
+
+    def timer(self, record: dict | None, field: str):
+        """Get a context manager adding the time spent in it to a record field."""
+        if record is None:
+            return _NULL_TIMER
+        return _Timer(record, field)
+
+    def add(self, record: dict | None, field: str, seconds: float) -> None:
+        """Add seconds to a record field."""
+        if record is not None:
+            record[field] += seconds
+
+    def record_response(
+        self, record: dict | None, first_token: float | None, total: float | None
+    ) -> None:
+        """Record a model request; only the first one's TTFT is kept."""
+        if record is None:
+            return
+        record["requests"] += 1
+        if record["ttft_s"] is None:
+            record["ttft_s"] = first_token
+        if total is not None:
+            record["model_s"] += total
+
+    def finish_section(
+        self, record: dict | None, action: str, edited: str | None = None
+    ) -> None:
+        """
+        Complete a record and append it to the metrics file.
+
+        Args:
+            record: The record from start_section()
+            action: What was done with the section (accept, skip, pass,
+                size, exit, failed)
+            edited: The text written for the section, if it was edited
+        """
+        if record is None:
+            return
+        record["action"] = action
+        if edited is not None:
+            record["output_chars"] = len(edited)
+            record["output_tokens"] = TokenEstimator.estimate(edited)
+
+        if self._stream is None:
+            self._stream = open(self.path, "a", encoding="utf-8")
+        self._stream.write(json.dumps(record) + "\n")
+        # Keep the log complete even if the session is killed
+        self._stream.flush()
+
+        self.count += 1
+        for field in self.TIMINGS:
+            if record[field] is not None:
+                self._values[field].append(record[field])
+
+    def summary(self) -> str | None:
+        """
+        Format a table of the p50, p95 and p99 of each timing.
+
+        Returns:
+            The table, or None if nothing was recorded
+        """
+        if not self.count:
+            return None
+        header = f"{'':<8}" + "".join(
+            f"{f'p{int(p * 100)}':>10}" for p in self.PERCENTILES
+        )
+        lines = [f"Section timings ({self.count} sections):", header]
+        for field in self.TIMINGS:
+            values = sorted(self._values[field])
+            if not values:
+                continue
+            cells = "".join(
+                f"{self.percentile(values, p) * 1000:>8.1f}ms" for p in self.PERCENTILES
+            )
+            lines.append(f"{field[:-2]:<8}{cells}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def percentile(values: list[float], fraction: float) -> float:
+        """Get a percentile of sorted values by the nearest-rank method."""
+        return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+    def close(self) -> None:
+        """Close the metrics file."""
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
@@ -1,3 +1,4 @@
+from collections.abc import Callable
 from .colors import Colors
 
 
@@ -33,9 +34,17 @@ class UIManager:
             else:
                 print("Invalid action. Please try again.")
 
-    def get_ai_action(self, edited_text: str, diff_text: str) -> str:
-        """Get user action after AI edit."""
-        self.display_edited(edited_text)
+    def get_ai_action(
+        self, edited_text: str, get_diff: Callable[[], str], streamed: bool = False
+    ) -> str:
+        """
+        Get user action after AI edit.
+
+        The edited text is displayed first unless it was already shown while
+        streaming in. The diff is only requested if the user asks for markup.
+        """
+        if not streamed:
+            self.display_edited(edited_text)
 
         while True:
             action = (
@@ -61,7 +70,7 @@ class UIManager:
             elif action in {"file", "f"}:
                 return "file_prompt"
             elif action in {"markup", "m"}:
-                self.display_markup(diff_text)
+                self.display_markup(get_diff())
             elif action in {"size", "z"}:
                 return "size"
             elif action in {"exit", "x"}:
@@ -69,6 +78,27 @@ class UIManager:
             else:
                 print("Invalid action. Please try again.")
 
+    def get_failure_action(self, error: Exception) -> str:
+        """Report a failed edit request and ask whether to retry it."""
+        print(f"\n{Colors.red}Request failed: {error}{Colors.reset}\n")
+
+        while True:
+            action = (
+                input(
+                    f"{Colors.green}(r)etry{Colors.reset} / "
+                    f"{Colors.yellow}(s)kip{Colors.reset}: "
+                )
+                .strip()
+                .lower()
+            )
+
+            if action in {"retry", "r"}:
+                return "retry"
+            elif action in {"skip", "s"}:
+                return "skip"
+            else:
+                print("Invalid action. Please try again.")
+
     def get_section_prompt(self) -> str:
         """Get a section-specific prompt from the user."""
         prompt = input("Enter section prompt (empty to cancel): ")
@@ -86,10 +116,14 @@ class UIManager:
         return prompt
 
     def get_section_size(self) -> int:
-        """Get the number of paragraphs per section."""
+        """Get the number of paragraphs per section (0 for automatic sizing)."""
         while True:
             try:
-                return int(input("Enter number of paragraphs per section: ").strip())
+                return int(
+                    input(
+                        "Enter number of paragraphs per section (0 for automatic): "
+                    ).strip()
+                )
             except ValueError:
                 print("Please enter an integer.")
 
@@ -99,12 +133,85 @@ class UIManager:
         print(f"\n{edited_text}\n")
         print(f"{Colors.purple}=== AI EDIT ==={Colors.reset}\n")
 
+    def start_stream(self) -> None:
+        """Display the header for an edit that is about to stream in."""
+        print(f"\n{Colors.purple}=== AI EDIT ==={Colors.reset}\n")
+
+    def display_token(self, token: str) -> None:
+        """Display a chunk of a streaming edit as soon as it arrives."""
+        print(token, end="", flush=True)
+
+    def end_stream(self, first_token: float | None, total: float) -> None:
+        """Display the footer and timings for a streamed edit."""
+        print(f"\n\n{Colors.purple}=== AI EDIT ==={Colors.reset}")
+        first_token_text = "-" if first_token is None else f"{first_token:.2f}s"
+        print(f"First token: {first_token_text} / Total: {total:.2f}s\n")
+
+    def display_candidate(self, number: int, label: str, text: str) -> None:
+        """Display an alternative edit as soon as it arrives."""
+        print(f"\n{Colors.purple}=== CANDIDATE {number} ({label}) ==={Colors.reset}")
+        print(f"\n{text}\n")
+
+    def display_candidate_error(
+        self, number: int, label: str, error: Exception
+    ) -> None:
+        """Report an alternative edit that failed."""
+        print(
+            f"\n{Colors.red}Candidate {number} ({label}) failed: {error}{Colors.reset}"
+        )
+
+    def choose_candidate(self, numbers: list[int]) -> int | None:
+        """
+        Ask which alternative edit to use.
+
+        Args:
+            numbers: The numbers of the candidates that can be chosen
+
+        Returns:
+            The chosen number, or None if canceled
+        """
+        while True:
+            choice = input(
+                f"Choose a candidate ({', '.join(map(str, numbers))}, empty to cancel): "
+            ).strip()
+            if choice.lower() in {"", "cancel"}:
+                print("Candidate choice canceled.")
+                return None
+            if choice.isdigit() and int(choice) in numbers:
+                return int(choice)
+            print("Invalid candidate. Please try again.")
+
     def display_markup(self, diff_text: str) -> None:
         """Display the markup text."""
         print(f"\n{Colors.purple}=== MARKUP ==={Colors.reset}")
         print(f"\n{diff_text}\n")
         print(f"{Colors.purple}=== MARKUP ==={Colors.reset}\n")
 
-    def show_completion_message(self) -> None:
-        """Show completion message."""
+    def show_progress(self, done: int, total: int, label: str | None = None) -> None:
+        """Show batch progress on a single updating line, optionally labeled."""
+        end = "\n" if done >= total else ""
+        prefix = f"{label}: " if label else ""
+        print(f"\r{prefix}Edited {done}/{total} paragraphs", end=end, flush=True)
+
+    def show_section_failed(self, label: str, index: int, error: Exception) -> None:
+        """Report a batch section whose edit failed and was kept unedited."""
+        print(
+            f"\n{Colors.red}{label}: paragraph {index + 1} kept unedited, "
+            f"request failed: {error}{Colors.reset}"
+        )
+
+    def show_passed_through(self, section: str) -> None:
+        """Show a trivial section that was kept without asking the model."""
+        print(f"\n{Colors.yellow}Kept as is: {section}{Colors.reset}")
+
+    def show_reused_edit(self) -> None:
+        """Tell the user an earlier edit of the same text is being reused."""
+        print(
+            f"\n{Colors.blue}Same text as an earlier section; reusing its edit.{Colors.reset}"
+        )
+
+    def show_completion_message(self, summary: str | None = None) -> None:
+        """Show completion message, followed by a performance summary if given."""
         print("All sections have been processed.")
+        if summary:
+            print(f"\n{summary}")
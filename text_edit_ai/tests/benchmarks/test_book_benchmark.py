@@ -0,0 +1,117 @@
+"""Tests for the fake chat model and the book benchmark."""
+
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+from text_edit_ai.benchmarks import book_benchmark
+from text_edit_ai.benchmarks.book_benchmark import (
+    format_size,
+    make_book,
+    parse_size,
+    run_end_to_end,
+)
+from text_edit_ai.benchmarks.fake_chat_model import (
+    FakeChatModel,
+    RateLimitError,
+    light_edit,
+)
+from text_edit_ai.cli.retry_policy import TRANSIENT, classify_error
+
+
+def messages(writing):
+    return [SystemMessage("Edit this."), HumanMessage(f"<writing>{writing}</writing>")]
+
+
+def test_fake_model_streams_edit():
+    """Test that the fake model streams the edit, then reports usage."""
+    model = FakeChatModel()
+    chunks = list(model.stream(messages("one two three\n\nfour")))
+
+    assert "".join(c.content for c in chunks) == light_edit("one two three\n\nfour")
+    assert len(chunks) > 2
+    assert chunks[-1].usage_metadata["total_tokens"] > 0
+    assert model.requests == 1
+
+
+def test_fake_model_paces_tokens():
+    """Test that the time to first token and streaming rate are simulated."""
+    model = FakeChatModel(ttft=0.5, tokens_per_second=10)
+    sleeps = []
+    model.sleep = sleeps.append
+
+    list(model.stream(messages("a b c d")))
+
+    assert sleeps[0] == 0.5
+    assert len(sleeps) == 4
+
+
+def test_fake_model_injects_transient_errors():
+    """Test that injected errors are repeatable and retried as rate limits."""
+    runs = []
+    for _ in range(2):
+        model = FakeChatModel(error_rate=0.5, seed=1)
+        failures = []
+        for _ in range(20):
+            try:
+                list(model.stream(messages("text")))
+                failures.append(False)
+            except RateLimitError as e:
+                assert classify_error(e) == TRANSIENT
+                failures.append(True)
+        runs.append(failures)
+
+    assert runs[0] == runs[1]
+    assert 0 < sum(runs[0]) < 20
+
+
+def test_sizes():
+    """Test parsing and formatting book sizes."""
+    assert parse_size("100KB") == 100 * 1024
+    assert parse_size("1mb") == 1024**2
+    assert parse_size("512") == 512
+    assert format_size(parse_size("10MB")) == "10MB"
+
+
+@pytest.mark.parametrize("mode", ["interactive", "batch"])
+def test_run_end_to_end(tmp_path, mode):
+    """Test a complete run against the fake model."""
+    book = tmp_path / "book.txt"
+    paragraphs = make_book(str(book), 2048)
+    original = book.read_text()
+
+    result = run_end_to_end(
+        str(book), mode, ttft=0.0, tokens_per_second=None, error_rate=0.2
+    )
+
+    assert result["paragraphs"] == paragraphs
+    assert result["requests"] == paragraphs + result["injected_errors"]
+    assert result["request_ttft_p50_s"] is not None
+
+    # The book is left as it was
+    assert book.read_text() == original
+    assert [p.name for p in tmp_path.iterdir()] == ["book.txt"]
+
+
+def test_run_end_to_end_shows_prefetch_wait(tmp_path):
+    """Test that the reviewer's wait is measured, which prefetching shortens."""
+    book = tmp_path / "book.txt"
+    make_book(str(book), 4096)
+
+    result = run_end_to_end(
+        str(book), ttft=0.05, tokens_per_second=None, prefetch=2, think_time=0.1
+    )
+
+    # Edits requested while the reviewer reads are ready when asked for
+    assert result["shown_ttft_p50_s"] < result["request_ttft_p50_s"] / 2
+
+
+@pytest.mark.parametrize("mode", ["interactive", "batch"])
+def test_run_end_to_end_requests_repeated_paragraphs(tmp_path, monkeypatch, mode):
+    """Test that paragraphs repeated from the pool are still sent to the model."""
+    monkeypatch.setattr(book_benchmark, "PARAGRAPH_POOL", 2)
+    book = tmp_path / "book.txt"
+    paragraphs = make_book(str(book), 4096)
+    assert paragraphs > 2
+
+    result = run_end_to_end(str(book), mode, ttft=0.0, tokens_per_second=None)
+
+    assert result["requests"] == paragraphs
@@ -0,0 +1,122 @@
+"""Tests for the mock OpenAI-compatible server."""
+
+import json
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from text_edit_ai.benchmarks.fake_chat_model import light_edit
+from text_edit_ai.benchmarks.mock_server import MockServer
+
+
+def post(server, payload):
+    """Post a chat completion request and return the response."""
+    request = urllib.request.Request(
+        server.url + "/chat/completions",
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    return urllib.request.urlopen(request, timeout=10)
+
+
+def chat(writing, **options):
+    return {
+        "model": "gpt-4o-mini",
+        "messages": [
+            {"role": "system", "content": "Edit this."},
+            {"role": "user", "content": f"<writing>{writing}</writing>"},
+        ],
+        **options,
+    }
+
+
+def read_events(response):
+    """Parse a server-sent event stream into its data payloads."""
+    events = []
+    for line in response.read().decode().split("\n\n"):
+        if line.startswith("data: "):
+            events.append(line[len("data: ") :])
+    return events
+
+
+def test_stream():
+    """Test that edits stream as OpenAI chunks, followed by usage."""
+    text = "one two three four five six seven eight nine ten eleven"
+    with MockServer() as server:
+        response = post(
+            server, chat(text, stream=True, stream_options={"include_usage": True})
+        )
+        assert response.headers["Content-Type"] == "text/event-stream"
+        events = read_events(response)
+
+    assert events[-1] == "[DONE]"
+    chunks = [json.loads(event) for event in events[:-1]]
+    content = "".join(
+        c["choices"][0]["delta"].get("content", "") for c in chunks if c["choices"]
+    )
+    assert content == light_edit(text)
+    assert len(chunks) > 3
+    assert chunks[-2]["choices"][0]["finish_reason"] == "stop"
+    assert chunks[-1]["usage"]["total_tokens"] > 0
+
+
+def test_completion():
+    """Test a non-streaming completion with the upper transform."""
+    with MockServer(transform="upper") as server:
+        result = json.loads(post(server, chat("quiet")).read())
+
+    assert result["object"] == "chat.completion"
+    assert result["choices"][0]["message"]["content"] == "QUIET"
+    assert result["usage"]["completion_tokens"] > 0
+
+
+@pytest.mark.parametrize(
+    "options, status",
+    [({"rate_limit_rate": 1.0}, 429), ({"server_error_rate": 1.0}, 500)],
+)
+def test_injected_errors(options, status):
+    """Test that errors are injected with OpenAI's error format."""
+    with MockServer(**options) as server:
+        with pytest.raises(urllib.error.HTTPError) as error:
+            post(server, chat("text"))
+        assert server.stats["requests"] == 1
+
+    assert error.value.code == status
+    assert "injected" in json.loads(error.value.read())["error"]["message"]
+    if status == 429:
+        assert error.value.headers["Retry-After"] == "1"
+
+
+def test_injected_errors_are_reproducible():
+    """Test that the same requests fail the same way in every run."""
+    runs = []
+    for _ in range(2):
+        outcomes = []
+        with MockServer(rate_limit_rate=0.5, seed=3) as server:
+            for i in range(10):
+                # Each request is sent twice, as a retry would
+                for _ in range(2):
+                    try:
+                        post(server, chat(f"section {i}"))
+                        outcomes.append(200)
+                    except urllib.error.HTTPError as e:
+                        outcomes.append(e.code)
+        runs.append(outcomes)
+
+    assert runs[0] == runs[1]
+    assert 200 in runs[0] and 429 in runs[0]
+
+
+def test_concurrent_requests():
+    """Test that requests are served in parallel."""
+    with MockServer(ttft=0.2) as server:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(
+                executor.map(lambda i: post(server, chat(f"s{i}")).read(), range(8))
+            )
+        elapsed = time.perf_counter() - start
+
+    assert len(results) == 8
+    assert elapsed < 1.0
@@ -0,0 +1,296 @@
+"""Tests for the BatchProcessor class."""
+
+import json
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock
+from text_edit_ai.cli.batch_processor import BatchProcessor
+from text_edit_ai.cli.section_classifier import SectionClassifier
+from text_edit_ai.cli.telemetry import Telemetry
+
+
+@pytest.fixture
+def mock_config_manager():
+    """Fixture for a mock config manager with an in-memory file config."""
+    mock = MagicMock()
+    mock_file_config = {}
+    mock.get_file_config.return_value = mock_file_config
+    mock.get_file_prompt.return_value = "Test file prompt"
+    return mock, mock_file_config
+
+
+@pytest.fixture
+def book(tmp_path):
+    """Fixture for a small book file."""
+    path = tmp_path / "book.txt"
+    path.write_text("Paragraph 1\nParagraph 2\n\nParagraph 3\nParagraph 4\n")
+    return path
+
+
+def test_process_writes_in_order(mock_config_manager, book):
+    """Test that edits are written in original order regardless of finish order."""
+    mock_cm, mock_file_config = mock_config_manager
+    mock_lm = MagicMock()
+
+    def get_response(context, writing):
+        # Earlier sections finish last
+        time.sleep(0.01 * (5 - int(writing[-1])))
+        return writing.upper()
+
+    mock_lm.get_response.side_effect = get_response
+
+    bp = BatchProcessor(mock_cm, mock_lm, str(book), max_workers=4)
+    bp.process()
+
+    output = (book.parent / "book_edited.txt").read_text()
+    assert output == "PARAGRAPH 1\n\nPARAGRAPH 2\n\nPARAGRAPH 3\n\nPARAGRAPH 4\n\n"
+
+    # Every section was requested with the file prompt
+    assert mock_lm.get_response.call_count == 4
+    mock_lm.get_response.assert_any_call("Test file prompt", "Paragraph 1")
+
+    # Progress was saved
+    assert mock_file_config["current_section"] == "4"
+
+
+def test_process_bounds_in_flight_requests(mock_config_manager, book):
+    """Test that no more than max_workers requests run at once."""
+    mock_cm, _ = mock_config_manager
+    mock_lm = MagicMock()
+    lock = threading.Lock()
+    active = []
+    peak = []
+
+    def get_response(context, writing):
+        with lock:
+            active.append(writing)
+            peak.append(len(active))
+        time.sleep(0.01)
+        with lock:
+            active.remove(writing)
+        return writing
+
+    mock_lm.get_response.side_effect = get_response
+
+    bp = BatchProcessor(mock_cm, mock_lm, str(book), max_workers=2)
+    bp.process()
+
+    assert max(peak) <= 2
+
+
+def test_process_runs_past_a_slow_section(mock_config_manager, tmp_path):
+    """Test that later sections keep the workers busy while the first is slow."""
+    mock_cm, _ = mock_config_manager
+    book = tmp_path / "book.txt"
+    book.write_text("".join(f"Paragraph {i}\n\n" for i in range(1, 8)))
+    mock_lm = MagicMock()
+    lock = threading.Lock()
+    finished = []
+    others_done = threading.Event()
+
+    def get_response(context, writing):
+        if writing == "Paragraph 1":
+            # Held until the sections after it are edited, or time runs out
+            others_done.wait(timeout=5)
+        with lock:
+            finished.append(writing)
+            if len(finished) == 6:
+                others_done.set()
+        return writing.upper()
+
+    mock_lm.get_response.side_effect = get_response
+
+    bp = BatchProcessor(mock_cm, mock_lm, str(book), max_workers=2)
+    bp.process()
+
+    # The other worker edited every later section before the first finished
+    assert others_done.is_set()
+    assert finished[-1] == "Paragraph 1"
+    output = (tmp_path / "book_edited.txt").read_text()
+    assert output == "".join(f"PARAGRAPH {i}\n\n" for i in range(1, 8))
+
+
+def test_process_resumes_from_saved_position(mock_config_manager, book):
+    """Test that batch mode starts at the saved position."""
+    mock_cm, mock_file_config = mock_config_manager
+    mock_file_config["current_section"] = "2"
+    mock_lm = MagicMock()
+    mock_lm.get_response.side_effect = lambda context, writing: writing
+
+    bp = BatchProcessor(
+        mock_cm, mock_lm, str(book), paragraphs_per_section=2, max_workers=2
+    )
+    bp.process()
+
+    mock_lm.get_response.assert_called_once_with(
+        "Test file prompt", "Paragraph 3\n\nParagraph 4"
+    )
+    output = (book.parent / "book_edited.txt").read_text()
+    assert output == "Paragraph 3\n\nParagraph 4\n\n"
+
+
+def test_process_writes_diff_file(mock_config_manager, book):
+    """Test that the diff of every edit is appended to the diff file."""
+    mock_cm, _ = mock_config_manager
+    mock_lm = MagicMock()
+    mock_lm.get_response.side_effect = lambda context, writing: writing + "!"
+    diff_file = book.parent / "book.diff"
+
+    bp = BatchProcessor(
+        mock_cm,
+        mock_lm,
+        str(book),
+        max_workers=2,
+        diff_file=str(diff_file),
+        diff_format="plain",
+    )
+    bp.process()
+
+    assert diff_file.read_text() == "".join(
+        f"Paragraph {i}{{+!+}}\n\n" for i in range(1, 5)
+    )
+
+
+def test_process_redoes_configuration_errors(mock_config_manager, book):
+    """Test that a rejected request is repeated on the main thread."""
+    mock_cm, _ = mock_config_manager
+    mock_lm = MagicMock()
+    main_thread = threading.main_thread()
+
+    class AuthenticationError(Exception):
+        pass
+
+    def get_response(context, writing):
+        # Background requests can't prompt for a new API key
+        if threading.current_thread() is not main_thread:
+            raise AuthenticationError("Invalid API key")
+        return writing.upper()
+
+    mock_lm.get_response.side_effect = get_response
+
+    bp = BatchProcessor(mock_cm, mock_lm, str(book), max_workers=2)
+    bp.process()
+
+    output = (book.parent / "book_edited.txt").read_text()
+    assert output == "PARAGRAPH 1\n\nPARAGRAPH 2\n\nPARAGRAPH 3\n\nPARAGRAPH 4\n\n"
+
+
+def test_process_files_shares_workers(mock_config_manager, tmp_path):
+    """Test that several files are edited through one bounded queue."""
+    mock_cm, _ = mock_config_manager
+    mock_lm = MagicMock()
+    lock = threading.Lock()
+    active = []
+    peak = []
+
+    def get_response(context, writing):
+        with lock:
+            active.append(writing)
+            peak.append(len(active))
+        time.sleep(0.01)
+        with lock:
+            active.remove(writing)
+        return writing.upper()
+
+    mock_lm.get_response.side_effect = get_response
+
+    processors = []
+    for name in ["one", "two", "empty"]:
+        path = tmp_path / f"{name}.txt"
+        text = "" if name == "empty" else f"{name} a\n\n{name} b\n\n{name} c\n"
+        path.write_text(text)
+        processor = BatchProcessor(mock_cm, mock_lm, str(path))
+        processor.ui_manager = MagicMock()
+        processors.append(processor)
+
+    BatchProcessor.process_files(processors, max_workers=2)
+
+    assert max(peak) <= 2
+    assert (tmp_path / "one_edited.txt").read_text() == "ONE A\n\nONE B\n\nONE C\n\n"
+    assert (tmp_path / "two_edited.txt").read_text() == "TWO A\n\nTWO B\n\nTWO C\n\n"
+
+    # Every file was closed, and the run ended with one completion message
+    assert all(p.sections is None for p in processors)
+    processors[0].ui_manager.show_completion_message.assert_called_once()
+
+
+def test_process_writes_metrics(mock_config_manager, book, tmp_path):
+    """Test that every section produces a telemetry record."""
+    mock_cm, _ = mock_config_manager
+    mock_lm = MagicMock()
+    mock_lm.get_timed_response.side_effect = lambda context, writing: (
+        writing.upper(),
+        0.01,
+        0.02,
+    )
+    metrics_file = tmp_path / "metrics.jsonl"
+    telemetry = Telemetry(str(metrics_file))
+
+    bp = BatchProcessor(
+        mock_cm, mock_lm, str(book), paragraphs_per_section=2, telemetry=telemetry
+    )
+    bp.process()
+    telemetry.close()
+
+    records = [json.loads(line) for line in metrics_file.read_text().splitlines()]
+    assert [r["section"] for r in records] == [0, 2]
+    assert all(r["paragraphs"] == 2 and r["ttft_s"] == 0.01 for r in records)
+    assert records[0]["output_chars"] == len("PARAGRAPH 1\n\nPARAGRAPH 2")
+
+
+def test_process_skips_trivial_and_duplicate_sections(mock_config_manager, tmp_path):
+    """Test that trivial and repeated sections are written without a request."""
+    mock_cm, _ = mock_config_manager
+    path = tmp_path / "book.txt"
+    path.write_text(
+        "Chapter 1\nThe rain fell all night.\n***\nThe rain fell all night.\n"
+    )
+    mock_lm = MagicMock()
+    mock_lm.get_response.side_effect = lambda context, writing: writing.upper()
+    classifier = SectionClassifier()
+
+    # One worker, so the repeated section is queued after the first is edited
+    bp = BatchProcessor(
+        mock_cm, mock_lm, str(path), max_workers=1, classifier=classifier
+    )
+    bp.process()
+
+    output = (tmp_path / "book_edited.txt").read_text()
+    assert output == (
+        "Chapter 1\n\nTHE RAIN FELL ALL NIGHT.\n\n***\n\nTHE RAIN FELL ALL NIGHT.\n\n"
+    )
+    mock_lm.get_response.assert_called_once_with(
+        "Test file prompt", "The rain fell all night."
+    )
+    assert classifier.describe() == "Skipped 3 model requests: 2 trivial, 1 duplicate"
+
+
+def test_process_files_keeps_failed_sections(mock_config_manager, tmp_path):
+    """Test that a failed request is reported and the run carries on."""
+    mock_cm, mock_file_config = mock_config_manager
+    mock_lm = MagicMock()
+
+    def get_response(context, writing):
+        if writing == "one b":
+            raise ValueError("Invalid request")
+        return writing.upper()
+
+    mock_lm.get_response.side_effect = get_response
+
+    processors = []
+    for name in ["one", "two"]:
+        path = tmp_path / f"{name}.txt"
+        path.write_text(f"{name} a\n\n{name} b\n\n{name} c\n")
+        processor = BatchProcessor(mock_cm, mock_lm, str(path))
+        processor.ui_manager = MagicMock()
+        processors.append(processor)
+
+    BatchProcessor.process_files(processors, max_workers=2)
+
+    # The failed section is written unedited and everything else is edited
+    assert (tmp_path / "one_edited.txt").read_text() == "ONE A\n\none b\n\nONE C\n\n"
+    assert (tmp_path / "two_edited.txt").read_text() == "TWO A\n\nTWO B\n\nTWO C\n\n"
+    processors[0].ui_manager.show_section_failed.assert_called_once()
+    assert processors[0].ui_manager.show_section_failed.call_args.args[1] == 1
+    assert mock_file_config["current_section"] == "3"
@@ -0,0 +1,138 @@
+"""Tests for the CandidateManager class."""
+
+import threading
+import pytest
+from unittest.mock import MagicMock
+from text_edit_ai.cli.candidate_manager import CandidateManager
+
+
+@pytest.fixture
+def mock_langchain_manager():
+    """Fixture for a langchain manager whose variants echo their settings."""
+    manager = MagicMock()
+    manager.temperature = 0.0
+
+    def variant(model_name=None, temperature=None):
+        other = MagicMock()
+        label = model_name or temperature
+        other.get_response.side_effect = lambda context, writing: f"{writing} {label}"
+        return other
+
+    manager.variant.side_effect = variant
+    return manager
+
+
+def test_disabled_by_default(mock_langchain_manager):
+    """Test that a single candidate doesn't enable candidates."""
+    manager = CandidateManager(mock_langchain_manager)
+
+    assert not manager.enabled
+    assert manager.temperatures() == [0.0]
+
+
+def test_temperatures(mock_langchain_manager):
+    """Test that the temperatures are spread evenly over the range."""
+    manager = CandidateManager(mock_langchain_manager, 3)
+
+    assert manager.enabled
+    assert manager.temperatures() == [0.2, 0.6, 1.0]
+
+
+def test_models_set_count(mock_langchain_manager):
+    """Test that each model gives one candidate."""
+    manager = CandidateManager(mock_langchain_manager, 5, ["gpt-4o", "gemini-pro"])
+
+    assert manager.count == 2
+
+
+def test_generate(mock_langchain_manager):
+    """Test generating candidates at a spread of temperatures."""
+    manager = CandidateManager(mock_langchain_manager, 3)
+    on_candidate = MagicMock()
+
+    candidates = manager.generate("Context", "Text", on_candidate)
+    manager.shutdown()
+
+    assert candidates == ["Text 0.2", "Text 0.6", "Text 1.0"]
+    assert on_candidate.call_count == 3
+    on_candidate.assert_any_call(2, "temperature 0.6", "Text 0.6")
+    mock_langchain_manager.variant.assert_any_call(temperature=0.2)
+
+
+def test_generate_in_completion_order(mock_langchain_manager):
+    """Test that candidates run in parallel and are passed on as they complete."""
+    release_first = threading.Event()
+
+    def variant(model_name=None, temperature=None):
+        other = MagicMock()
+        if model_name == "slow":
+            # Only finishes once the fast candidate has been passed on
+            other.get_response.side_effect = lambda context, writing: (
+                release_first.wait(5) and "slow edit"
+            )
+        else:
+            other.get_response.return_value = "fast edit"
+        return other
+
+    mock_langchain_manager.variant.side_effect = variant
+    manager = CandidateManager(mock_langchain_manager, models=["slow", "fast"])
+    order = []
+
+    def on_candidate(number, label, text):
+        order.append(number)
+        release_first.set()
+
+    candidates = manager.generate("Context", "Text", on_candidate)
+    manager.shutdown()
+
+    assert candidates == ["slow edit", "fast edit"]
+    assert order == [2, 1]
+
+
+def test_generate_errors(mock_langchain_manager):
+    """Test that a failed candidate is reported and left out."""
+
+    def variant(model_name=None, temperature=None):
+        other = MagicMock()
+        if model_name == "broken":
+            other.get_response.side_effect = RuntimeError("Request failed")
+        else:
+            other.get_response.return_value = "Edited"
+        return other
+
+    mock_langchain_manager.variant.side_effect = variant
+    manager = CandidateManager(mock_langchain_manager, models=["broken", "working"])
+    on_candidate = MagicMock()
+    on_error = MagicMock()
+
+    candidates = manager.generate("Context", "Text", on_candidate, on_error)
+    manager.shutdown()
+
+    assert candidates == [None, "Edited"]
+    on_candidate.assert_called_once_with(2, "working", "Edited")
+    on_error.assert_called_once()
+    assert on_error.call_args.args[:2] == (1, "broken")
+
+
+def test_unavailable_model_skipped(mock_langchain_manager, capsys):
+    """Test that a model that can't be created is reported and skipped."""
+    create = mock_langchain_manager.variant.side_effect
+
+    def variant(model_name=None, temperature=None):
+        if model_name == "unknown":
+            raise ValueError("Unknown model")
+        return create(model_name, temperature)
+
+    mock_langchain_manager.variant.side_effect = variant
+    manager = CandidateManager(mock_langchain_manager, models=["unknown", "gpt-4o"])
+
+    candidates = manager.generate("Context", "Text", MagicMock())
+    manager.shutdown()
+
+    assert candidates == ["Text gpt-4o"]
+    assert "Candidate unknown unavailable: Unknown model" in capsys.readouterr().out
+
+    # Variants are only created once
+    manager.generate("Context", "Text", MagicMock())
+    manager.shutdown()
+    assert mock_langchain_manager.variant.call_count == 2
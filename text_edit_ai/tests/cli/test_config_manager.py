@@ -1,5 +1,6 @@
 """Tests for the ConfigManager class."""
 
+import os
 import pytest
 from unittest.mock import patch, MagicMock
 from text_edit_ai.cli.config_manager import ConfigManager
@@ -129,3 +130,116 @@ def test_set_color(config_manager, mock_config):
         config_manager.set_color(color_name, color_value)
 
     assert mock_config["COLORS"][color_name] == color_value
+
+
+@pytest.fixture
+def file_config_manager(tmp_path):
+    """Fixture for a ConfigManager backed by a real file."""
+    config_file = tmp_path / "test.cfg"
+    with patch.object(ConfigManager, "CONFIG_FILE", str(config_file)):
+        with patch("atexit.register"):
+            yield ConfigManager(), config_file
+
+
+def test_init_writes_default_colors_once(file_config_manager):
+    """Test that startup only writes the config when defaults were missing."""
+    config_manager, config_file = file_config_manager
+    assert "[COLORS]" in config_file.read_text()
+
+    with patch.object(ConfigManager, "CONFIG_FILE", str(config_file)):
+        with patch("atexit.register"):
+            with patch("os.replace") as mock_replace:
+                ConfigManager()
+
+    mock_replace.assert_not_called()
+
+
+def test_save_config_coalesces_writes(file_config_manager):
+    """Test that saves within the flush interval are written together."""
+    config_manager, config_file = file_config_manager
+    file_config = config_manager.get_file_config("book.txt")
+
+    with patch("os.replace", wraps=os.replace) as mock_replace:
+        config_manager._last_flush = float("-inf")
+        file_config["current_section"] = "1"
+        config_manager.save_config()
+        file_config["current_section"] = "2"
+        config_manager.save_config()
+        file_config["current_section"] = "3"
+        config_manager.save_config()
+
+        # Only the first save was written immediately
+        assert mock_replace.call_count == 1
+        assert "current_section = 1" in config_file.read_text()
+
+        # Flushing writes the latest state
+        config_manager.flush()
+        assert mock_replace.call_count == 2
+        assert "current_section = 3" in config_file.read_text()
+
+
+def test_flush_skips_unchanged_config(file_config_manager):
+    """Test that nothing is written when the config did not change."""
+    config_manager, _ = file_config_manager
+
+    with patch("os.replace") as mock_replace:
+        config_manager._last_flush = float("-inf")
+        config_manager.save_config()
+        config_manager.flush()
+
+    mock_replace.assert_not_called()
+
+
+def test_flush_is_atomic(file_config_manager, tmp_path):
+    """Test that a failed write leaves the old file intact and no temp files."""
+    config_manager, config_file = file_config_manager
+    original = config_file.read_text()
+    config_manager.get_file_config("book.txt")["current_section"] = "5"
+
+    with patch("os.replace", side_effect=OSError("Disk full")):
+        with pytest.raises(OSError):
+            config_manager._last_flush = float("-inf")
+            config_manager.save_config()
+
+    assert config_file.read_text() == original
+    assert [p.name for p in tmp_path.iterdir()] == ["test.cfg"]
+
+    # The change is still pending and written by the next flush
+    config_manager.flush()
+    assert "current_section = 5" in config_file.read_text()
+
+
+def test_get_file_prompt_from_file(file_config_manager, tmp_path):
+    """Test that a prompt file is read once and reread only after it changes."""
+    config_manager, _ = file_config_manager
+    prompt_file = tmp_path / "prompt.txt"
+    prompt_file.write_text("Style guide v1")
+    config_manager.set_file_prompt_from_file("book.txt", str(prompt_file))
+
+    with patch("builtins.open", wraps=open) as mock_open:
+        assert config_manager.get_file_prompt("book.txt") == "Style guide v1"
+        assert config_manager.get_file_prompt("book.txt") == "Style guide v1"
+        assert mock_open.call_count == 1
+
+        # Editing the prompt file between sections takes effect
+        prompt_file.write_text("Style guide v2, longer")
+        assert config_manager.get_file_prompt("book.txt") == "Style guide v2, longer"
+        assert mock_open.call_count == 2
+
+
+def test_get_rate_limits(file_config_manager):
+    """Test reading per-model rate limits."""
+    config_manager, _ = file_config_manager
+    config_manager.config["RATE_LIMITS"] = {
+        "gemini-2.0-flash": "2000/4000000",
+        "gpt-4o": "500/",
+        "claude": "/30000 # tokens only",
+        "broken": "lots",
+    }
+
+    assert config_manager.get_rate_limits("gemini-2.0-flash") == (2000, 4000000)
+    assert config_manager.get_rate_limits("gpt-4o") == (500, None)
+    assert config_manager.get_rate_limits("claude") == (None, 30000)
+    assert config_manager.get_rate_limits("other") == (None, None)
+    with patch("builtins.print"):
+        assert config_manager.get_rate_limits("broken") == (None, None)
@@ -0,0 +1,160 @@
+"""Tests for the MyersDiff, DiffOp and DiffResult classes."""
+
+import difflib
+import random
+import pytest
+from text_edit_ai.cli.diff_engine import DiffOp, DiffResult, MyersDiff
+
+
+def apply_opcodes(a, b, opcodes):
+    """Rebuild b from a and opcodes, checking that the opcodes are contiguous."""
+    result = []
+    i = j = 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        assert (i1, j1) == (i, j)
+        if tag == "equal":
+            assert a[i1:i2] == b[j1:j2]
+            result.extend(a[i1:i2])
+        else:
+            result.extend(b[j1:j2])
+        i, j = i2, j2
+    assert (i, j) == (len(a), len(b))
+    return result
+
+
+def lcs_length(a, b):
+    """Length of the longest common subsequence, by dynamic programming."""
+    previous = [0] * (len(b) + 1)
+    for x in a:
+        current = [0]
+        for j, y in enumerate(b):
+            current.append(
+                previous[j] + 1 if x == y else max(previous[j + 1], current[j])
+            )
+        previous = current
+    return previous[-1]
+
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        ([], []),
+        (["Hello", " ", "world"], ["Hello", " ", "world"]),
+        (["Hello", " ", "world", "!"], ["Hello", " ", "world"]),
+        (["Hello", " ", "world"], ["Hello", " ", "world", "!"]),
+        (["Hello", " ", "world"], ["Hello", " ", "there"]),
+        ([], ["Hello"]),
+        (["Hello"], []),
+    ],
+)
+def test_matches_sequence_matcher(a, b):
+    """Test that simple edits produce the same opcodes as SequenceMatcher."""
+    expected = difflib.SequenceMatcher(None, a, b).get_opcodes()
+
+    assert MyersDiff(a, b).get_opcodes() == expected
+
+
+def test_random_edits_are_minimal():
+    """Test that opcodes rebuild the edited tokens with a minimal diff."""
+    rng = random.Random(0)
+    for _ in range(500):
+        alphabet = rng.choice(["ab", "abc", "abcdefgh"])
+        a = [rng.choice(alphabet) for _ in range(rng.randint(0, 20))]
+        b = [rng.choice(alphabet) for _ in range(rng.randint(0, 20))]
+        diff = MyersDiff(a, b, fallback=False)
+
+        assert apply_opcodes(a, b, diff.get_opcodes()) == b
+
+        matched = sum(n for _, _, n in diff.get_matching_blocks())
+        assert matched == lcs_length(a, b)
+
+
+def test_rewrite_falls_back_to_sequence_matcher():
+    """Test that a diff of unrelated sequences is left to difflib."""
+    rng = random.Random(0)
+    a = [rng.choice("abcdefghij") for _ in range(300)]
+    b = [rng.choice("abcdefghij") for _ in range(300)]
+    expected = difflib.SequenceMatcher(None, a, b).get_opcodes()
+
+    assert MyersDiff(a, b).get_opcodes() == expected
+
+
+def test_heavily_edited_part_still_rebuilds():
+    """Test that opcodes rebuild b when only part of it falls back to difflib."""
+    rng = random.Random(0)
+    kept = [str(i) for i in range(1500)]
+    edited = [token if i % 50 else "x" for i, token in enumerate(kept)]
+    a = kept + [rng.choice("abcdefghij") for _ in range(150)] + kept[::-1]
+    b = edited + [rng.choice("abcdefghij") for _ in range(150)] + edited[::-1]
+    diff = MyersDiff(a, b)
+
+    assert apply_opcodes(a, b, diff.get_opcodes()) == b
+    matched = sum(n for _, _, n in diff.get_matching_blocks())
+    minimal = MyersDiff(a, b, fallback=False).get_matching_blocks()
+    assert 2940 <= matched <= sum(n for _, _, n in minimal)
+
+
+def test_matching_blocks_sentinel():
+    """Test that matching blocks end with a sentinel, like SequenceMatcher."""
+    blocks = MyersDiff(["a", "b", "c"], ["a", "x", "c"]).get_matching_blocks()
+
+    assert blocks == [(0, 0, 1), (2, 2, 1), (3, 3, 0)]
+
+
+def test_diff_result_counts():
+    """Test that a DiffResult counts inserted, deleted and kept tokens."""
+    result = DiffResult.compute(list("abcdef"), list("abXdeYZ"))
+
+    assert result.ops == [
+        DiffOp("equal", 0, 2, 0, 2),
+        DiffOp("replace", 2, 3, 2, 3),
+        DiffOp("equal", 3, 5, 3, 5),
+        DiffOp("replace", 5, 6, 5, 7),
+    ]
+    assert (result.inserted, result.deleted, result.kept) == (3, 2, 4)
+    assert result.change_ratio == 5 / 13
+    assert result.changed
+
+
+def test_diff_result_identical():
+    """Test the summary of a diff with no changes."""
+    result = DiffResult.compute(["a", "b"], ["a", "b"])
+
+    assert (result.inserted, result.deleted, result.kept) == (0, 0, 2)
+    assert result.change_ratio == 0.0
+    assert not result.changed
+
+    assert DiffResult.compute([], []).change_ratio == 0.0
+
+
+def test_diff_result_change_ratio_insert_only():
+    """Test that the change ratio counts over the tokens of both texts."""
+    original = ["a", "b"]
+    edited = ["a", "b", "c", "d"]
+    result = DiffResult.compute(original, edited)
+
+    # 2 inserted tokens over 2 + 4 tokens, not over either text alone
+    assert result.change_ratio == 2 / 6
+    assert result.change_ratio == pytest.approx(
+        1 - difflib.SequenceMatcher(None, original, edited).ratio()
+    )
+
+
+def test_diff_result_change_ratio_counts_more_matches():
+    """Test that the change ratio is lower than difflib's when it matches more."""
+    original, edited = list("abcabba"), list("cbabac")
+    result = DiffResult.compute(original, edited)
+
+    # 4 tokens matched, where difflib only matches 3
+    assert result.change_ratio == 5 / 13
+    assert result.change_ratio < (
+        1 - difflib.SequenceMatcher(None, original, edited).ratio()
+    )
+
+
+def test_diff_op_unpacks_like_opcode():
+    """Test that a DiffOp unpacks like a difflib opcode and has no __dict__."""
+    op = DiffOp("delete", 1, 3, 1, 1)
+
+    assert tuple(op) == ("delete", 1, 3, 1, 1)
+    assert not hasattr(op, "__dict__")
@@ -1,8 +1,11 @@
 """Tests for the FileProcessor class."""
 
+import json
+import time
 import pytest
-from unittest.mock import patch, MagicMock, mock_open
+from unittest.mock import ANY, call, patch, MagicMock
 from text_edit_ai.cli.file_processor import FileProcessor
+from text_edit_ai.cli.telemetry import Telemetry
 
 
 @pytest.fixture
@@ -10,6 +13,7 @@ def mock_dependencies():
     """Fixture for mock dependencies."""
     mock_config_manager = MagicMock()
     mock_langchain_manager = MagicMock()
+    mock_langchain_manager.get_timed_response.return_value = ("", None, 0.0)
     mock_markup_manager = MagicMock()
     mock_ui_manager = MagicMock()
     mock_session_manager = MagicMock()
@@ -70,47 +74,70 @@ def test_init(file_processor, mock_dependencies):
     assert fp.ui_manager == mock_dependencies["ui_manager"]
 
 
-def test_load_file(file_processor):
-    """Test loading file content."""
+def test_load_sections(file_processor):
+    """Test opening the file for lazy paragraph reading."""
     fp, test_file = file_processor
 
-    with patch(
-        "builtins.open", new_callable=mock_open, read_data="Test content"
-    ) as mock_file:
-        result = fp._load_file()
+    with patch("text_edit_ai.cli.file_processor.ParagraphReader") as mock_reader:
+        result = fp._load_sections()
+
+        # Check that the reader was opened on the file
+        mock_reader.assert_called_once_with(test_file)
+        assert result == mock_reader.return_value
+
+
+def test_open_output_resumes_from_journal(file_processor, mock_dependencies):
+    """Test that the output journal's position overrides the saved one."""
+    fp, _ = file_processor
 
-        # Check that the file was opened correctly
-        mock_file.assert_called_once_with(test_file, "r")
+    with patch("text_edit_ai.cli.file_processor.OutputWriter") as mock_writer_class:
+        mock_writer_class.return_value.next_section = 7
+        fp._open_output()
 
-        # Check that the content was returned
-        assert result == "Test content"
+        # Check that the writer was opened with the fsync policy
+        mock_writer_class.assert_called_once_with("test_file_edited.txt", "close")
 
+        # Check that the session resumes after the last committed section
+        mock_dependencies[
+            "session_manager"
+        ].set_current_section.assert_called_once_with(7)
 
-def test_split_into_sections(file_processor):
-    """Test splitting content into sections."""
+
+def test_open_output_without_journal(file_processor, mock_dependencies):
+    """Test that the saved position is kept when there is no journal."""
     fp, _ = file_processor
-    content = "Paragraph 1\nParagraph 2\n\nParagraph 3"
 
-    result = fp._split_into_sections(content)
+    with patch("text_edit_ai.cli.file_processor.OutputWriter") as mock_writer_class:
+        mock_writer_class.return_value.next_section = None
+        fp._open_output()
 
-    # Check that the content was split correctly
-    expected_result = ["Paragraph 1", "Paragraph 2", "Paragraph 3"]
-    assert result == expected_result
+        mock_dependencies["session_manager"].set_current_section.assert_not_called()
 
 
-def test_write_section(file_processor):
+def test_write_section(file_processor, mock_dependencies):
     """Test writing a section to the output file."""
     fp, _ = file_processor
     content = "Test section"
+    fp.output_writer = MagicMock()
+    mock_dependencies["session_manager"].next_section.return_value = 4
+
+    fp._write_section(content)
 
-    with patch("builtins.open", new_callable=mock_open) as mock_file:
-        fp._write_section(content)
+    # Check that the content was written, tagged with the next section index
+    fp.output_writer.write.assert_called_once_with("Test section", 4)
 
-        # Check that the file was opened correctly
-        mock_file.assert_called_once_with("test_file_edited.txt", "a")
 
-        # Check that the content was written correctly
-        mock_file().write.assert_called_once_with("Test section\n\n")
+def test_write_diff(file_processor, mock_dependencies):
+    """Test that diffs are only written when there is a diff file."""
+    fp, _ = file_processor
+    fp._write_diff("Test section", "Edited section")
+    mock_dependencies["markup_manager"].write_diff.assert_not_called()
+
+    fp.diff_stream = MagicMock()
+    fp._write_diff("Test section", "Edited section")
+    mock_dependencies["markup_manager"].write_diff.assert_called_once_with(
+        "Test section", "Edited section", fp.diff_stream, "unified"
+    )
 
 
 def test_process_with_ai_accept(file_processor, mock_dependencies):
@@ -123,7 +150,11 @@ def test_process_with_ai_accept(file_processor, mock_dependencies):
 
     # Set up the mocks
     mock_dependencies["config_manager"].get_file_prompt.return_value = file_prompt
-    mock_dependencies["langchain_manager"].get_response.return_value = edited_text
+    mock_dependencies["langchain_manager"].get_timed_response.return_value = (
+        edited_text,
+        0.1,
+        0.5,
+    )
     mock_dependencies["markup_manager"].generate_diff.return_value = diff_text
     mock_dependencies["ui_manager"].get_ai_action.return_value = "accept"
 
@@ -136,19 +167,33 @@ def test_process_with_ai_accept(file_processor, mock_dependencies):
             test_file
         )
 
-        # Check that the langchain manager was called to get the response
-        mock_dependencies["langchain_manager"].get_response.assert_called_once_with(
-            file_prompt, section
+        # Check that the langchain manager was called to get the streamed response
+        mock_dependencies[
+            "langchain_manager"
+        ].get_timed_response.assert_called_once_with(
+            file_prompt, section, mock_dependencies["ui_manager"].display_token
         )
 
-        # Check that the markup manager was called to generate the diff
-        mock_dependencies["markup_manager"].generate_diff.assert_called_once_with(
+        # Check that the edit was streamed to the UI along with its timings
+        mock_dependencies["ui_manager"].start_stream.assert_called_once()
+        mock_dependencies["ui_manager"].end_stream.assert_called_once_with(0.1, 0.5)
+
+        # Check that the diff was started in the background, not computed
+        mock_dependencies["markup_manager"].prepare_diff.assert_called_once_with(
             section, edited_text
         )
+        mock_dependencies["markup_manager"].generate_diff.assert_not_called()
 
         # Check that the UI manager was called to get the AI action
         mock_dependencies["ui_manager"].get_ai_action.assert_called_once_with(
-            edited_text, diff_text
+            edited_text, ANY, True
+        )
+
+        # Check that the diff is only fetched when the UI asks for it
+        get_diff = mock_dependencies["ui_manager"].get_ai_action.call_args.args[1]
+        assert get_diff() == diff_text
+        mock_dependencies["markup_manager"].generate_diff.assert_called_once_with(
+            section, edited_text
         )
 
         # Check that the edited text was written
@@ -158,6 +203,179 @@ def test_process_with_ai_accept(file_processor, mock_dependencies):
         mock_dependencies["session_manager"].advance.assert_called_once()
 
 
+def test_process_with_ai_telemetry(file_processor, mock_dependencies, tmp_path):
+    """Test that an edited section's timings are recorded."""
+    fp, test_file = file_processor
+    metrics_file = tmp_path / "metrics.jsonl"
+    fp.telemetry = Telemetry(str(metrics_file))
+    fp._record = fp.telemetry.start_section(test_file, 3, "Test section")
+
+    mock_dependencies["langchain_manager"].get_timed_response.return_value = (
+        "Edited section",
+        0.1,
+        0.5,
+    )
+
+    def get_ai_action(edited_text, get_diff, streamed):
+        # The reviewer views the markup, then thinks it over
+        get_diff()
+        time.sleep(0.01)
+        return "accept"
+
+    def generate_diff(section, edited):
+        time.sleep(0.05)
+        return "Diff text"
+
+    mock_dependencies["ui_manager"].get_ai_action.side_effect = get_ai_action
+    mock_dependencies["markup_manager"].generate_diff.side_effect = generate_diff
+
+    with patch.object(FileProcessor, "_write_section"):
+        fp._process_with_ai("Test section")
+    fp.telemetry.close()
+
+    record = json.loads(metrics_file.read_text())
+    assert record["section"] == 3
+    assert record["action"] == "accept"
+    assert record["ttft_s"] == 0.1
+    assert record["model_s"] == 0.5
+    assert record["output_chars"] == len("Edited section")
+    # The diff is timed apart from the reviewer's think time
+    assert record["diff_s"] >= 0.05
+    assert 0.01 <= record["think_s"] < 0.05
+
+
+def test_process_with_ai_prefetch(file_processor, mock_dependencies):
+    """Test that upcoming sections are prefetched when a section is edited."""
+    fp, _ = file_processor
+    section = "Test section"
+    file_prompt = "Test file prompt"
+    upcoming = ["Next section 1", "Next section 2"]
+
+    # Set up the mocks
+    mock_dependencies["config_manager"].get_file_prompt.return_value = file_prompt
+    mock_dependencies["session_manager"].get_upcoming_sections.return_value = upcoming
+    mock_dependencies["ui_manager"].get_ai_action.return_value = "accept"
+    fp.prefetch_manager = MagicMock()
+    fp.prefetch_manager.depth = 2
+    fp.prefetch_manager.get_timed_response.return_value = ("Edited section", 0, 0)
+
+    with patch.object(FileProcessor, "_write_section") as mock_write_section:
+        fp._process_with_ai(section)
+
+        # Check that only the upcoming sections were prefetched
+        mock_dependencies[
+            "session_manager"
+        ].get_upcoming_sections.assert_called_once_with(2)
+        fp.prefetch_manager.prefetch.assert_called_once_with(
+            file_prompt, upcoming, current=section
+        )
+
+        # Check that the edit came from the prefetch manager
+        fp.prefetch_manager.get_timed_response.assert_called_once_with(
+            file_prompt,
+            section,
+            on_token=mock_dependencies["ui_manager"].display_token,
+        )
+        mock_write_section.assert_called_once_with("Edited section")
+
+
+class ServiceUnavailable(Exception):
+    """A provider error that ran out of retries."""
+
+    status_code = 503
+
+
+def test_process_with_ai_retries_failed_request(file_processor, mock_dependencies):
+    """Test that a failed request is reported and retried when the user asks."""
+    fp, _ = file_processor
+    section = "Test section"
+    error = ServiceUnavailable("Service unavailable")
+    mock_dependencies["langchain_manager"].get_timed_response.side_effect = [
+        error,
+        ("Edited section", 0.1, 0.5),
+    ]
+    mock_dependencies["ui_manager"].get_failure_action.return_value = "retry"
+    mock_dependencies["ui_manager"].get_ai_action.return_value = "accept"
+
+    with patch.object(FileProcessor, "_write_section") as mock_write_section:
+        fp._process_with_ai(section)
+
+        mock_dependencies["ui_manager"].get_failure_action.assert_called_once_with(
+            error
+        )
+        assert mock_dependencies["langchain_manager"].get_timed_response.call_count == 2
+        mock_write_section.assert_called_once_with("Edited section")
+        mock_dependencies["session_manager"].advance.assert_called_once()
+
+
+def test_process_with_ai_skips_failed_request(file_processor, mock_dependencies):
+    """Test that the user can skip a section whose request failed."""
+    fp, _ = file_processor
+    section = "Test section"
+    mock_dependencies["langchain_manager"].get_timed_response.side_effect = ValueError(
+        "Invalid request"
+    )
+    mock_dependencies["ui_manager"].get_failure_action.return_value = "skip"
+
+    with patch.object(FileProcessor, "_write_section") as mock_write_section:
+        assert fp._process_with_ai(section) is None
+
+        # The original section is kept and the session moves on
+        mock_write_section.assert_called_once_with(section)
+        mock_dependencies["session_manager"].advance.assert_called_once()
+        mock_dependencies["ui_manager"].get_ai_action.assert_not_called()
+
+
+def test_process_survives_exhausted_retries(mock_dependencies, tmp_path):
+    """Test that a request that runs out of retries doesn't end the session."""
+    from text_edit_ai.cli.langchain_manager import LangchainManager
+    from text_edit_ai.cli.retry_policy import RetryPolicy
+
+    book = tmp_path / "book.txt"
+    book.write_text("Paragraph 1\n\nParagraph 2\n")
+    config_manager = MagicMock()
+    config_manager.get_file_config.return_value = {}
+    config_manager.get_file_prompt.return_value = "Prompt"
+    config_manager.get_rate_limits.return_value = (None, None)
+    model = MagicMock()
+    model.stream.side_effect = ServiceUnavailable("Service unavailable")
+    with patch.object(LangchainManager, "get_model", return_value=model):
+        langchain_manager = LangchainManager(
+            config_manager, retry_policy=RetryPolicy(max_attempts=2)
+        )
+    langchain_manager.retry_policy.sleep = MagicMock()
+
+    with patch("text_edit_ai.cli.file_processor.UIManager") as mock_ui_manager_class:
+        ui_manager = mock_ui_manager_class.return_value
+        ui_manager.get_initial_action.return_value = "continue"
+        ui_manager.get_failure_action.return_value = "skip"
+        fp = FileProcessor(config_manager, langchain_manager, str(book))
+
+        with patch("builtins.print"):
+            assert fp.process() is True
+
+    assert model.stream.call_count == 4
+    assert ui_manager.get_failure_action.call_count == 2
+    output = (tmp_path / "book_edited.txt").read_text()
+    assert output == "Paragraph 1\n\nParagraph 2\n\n"
+
+
+@pytest.mark.parametrize("content", ["", "Paragraph 1\n\nParagraph 2\n"])
+def test_process_without_output_leaves_no_files(tmp_path, content):
+    """Test that exiting before writing anything creates no files next to the book."""
+    book = tmp_path / "book.txt"
+    book.write_text(content)
+    config_manager = MagicMock()
+    config_manager.get_file_config.return_value = {}
+
+    with patch("text_edit_ai.cli.file_processor.UIManager") as mock_ui_manager_class:
+        mock_ui_manager_class.return_value.get_initial_action.return_value = "exit"
+        fp = FileProcessor(config_manager, MagicMock(), str(book))
+        fp.process()
+
+    assert [p.name for p in tmp_path.iterdir()] == ["book.txt"]
+
+
 def test_process_with_ai_skip(file_processor, mock_dependencies):
     """Test processing a section with AI and skipping the edit."""
     fp, test_file = file_processor
@@ -168,7 +386,11 @@ def test_process_with_ai_skip(file_processor, mock_dependencies):
 
     # Set up the mocks
     mock_dependencies["config_manager"].get_file_prompt.return_value = file_prompt
-    mock_dependencies["langchain_manager"].get_response.return_value = edited_text
+    mock_dependencies["langchain_manager"].get_timed_response.return_value = (
+        edited_text,
+        0.1,
+        0.5,
+    )
     mock_dependencies["markup_manager"].generate_diff.return_value = diff_text
     mock_dependencies["ui_manager"].get_ai_action.return_value = "skip"
 
@@ -191,18 +413,12 @@ def test_process_with_ai_section_prompt(file_processor, mock_dependencies):
     section_prompt = "Test section prompt"
     edited_text1 = "Edited section 1"
     edited_text2 = "Edited section 2"
-    diff_text1 = "Diff text 1"
-    diff_text2 = "Diff text 2"
 
     # Set up the mocks
     mock_dependencies["config_manager"].get_file_prompt.return_value = file_prompt
-    mock_dependencies["langchain_manager"].get_response.side_effect = [
-        edited_text1,
-        edited_text2,
-    ]
-    mock_dependencies["markup_manager"].generate_diff.side_effect = [
-        diff_text1,
-        diff_text2,
+    mock_dependencies["langchain_manager"].get_timed_response.side_effect = [
+        (edited_text1, 0.1, 0.5),
+        (edited_text2, 0.1, 0.5),
     ]
     mock_dependencies["ui_manager"].get_ai_action.side_effect = [
         "section_prompt",
@@ -218,14 +434,90 @@ def test_process_with_ai_section_prompt(file_processor, mock_dependencies):
         mock_dependencies["ui_manager"].get_section_prompt.assert_called_once()
 
         # Check that the langchain manager was called with the combined prompt
-        mock_dependencies["langchain_manager"].get_response.assert_any_call(
-            f"{file_prompt}\n{section_prompt}", section
+        mock_dependencies["langchain_manager"].get_timed_response.assert_any_call(
+            f"{file_prompt}\n{section_prompt}",
+            section,
+            on_token=mock_dependencies["ui_manager"].display_token,
         )
 
         # Check that the edited text was written
         mock_write_section.assert_called_once_with(edited_text2)
 
 
+def test_process_with_ai_section_prompt_candidates(file_processor, mock_dependencies):
+    """Test choosing one of several candidate edits for a section prompt."""
+    fp, test_file = file_processor
+    section = "Test section"
+    file_prompt = "Test file prompt"
+    section_prompt = "Test section prompt"
+    fp.candidate_manager = MagicMock()
+    fp.candidate_manager.enabled = True
+    fp.candidate_manager.generate.return_value = ["Candidate 1", None, "Candidate 3"]
+
+    # Set up the mocks
+    mock_dependencies["config_manager"].get_file_prompt.return_value = file_prompt
+    mock_dependencies["langchain_manager"].get_timed_response.return_value = (
+        "Edited section",
+        0.1,
+        0.5,
+    )
+    mock_dependencies["ui_manager"].get_ai_action.side_effect = [
+        "section_prompt",
+        "accept",
+    ]
+    mock_dependencies["ui_manager"].get_section_prompt.return_value = section_prompt
+    mock_dependencies["ui_manager"].choose_candidate.return_value = 3
+
+    # Call the method
+    with patch.object(FileProcessor, "_write_section") as mock_write_section:
+        fp._process_with_ai(section)
+
+        # Check that the candidates were requested with the combined prompt
+        fp.candidate_manager.generate.assert_called_once_with(
+            f"{file_prompt}\n{section_prompt}",
+            section,
+            on_candidate=mock_dependencies["ui_manager"].display_candidate,
+            on_error=mock_dependencies["ui_manager"].display_candidate_error,
+        )
+
+        # Check that only the successful candidates could be chosen
+        mock_dependencies["ui_manager"].choose_candidate.assert_called_once_with([1, 3])
+
+        # Check that the chosen candidate was written
+        mock_write_section.assert_called_once_with("Candidate 3")
+        assert mock_dependencies["langchain_manager"].get_timed_response.call_count == 1
+
+
+def test_process_with_ai_section_prompt_candidates_canceled(
+    file_processor, mock_dependencies
+):
+    """Test that canceling the choice of candidate keeps the current edit."""
+    fp, test_file = file_processor
+    fp.candidate_manager = MagicMock()
+    fp.candidate_manager.enabled = True
+    fp.candidate_manager.generate.return_value = ["Candidate 1", "Candidate 2"]
+
+    # Set up the mocks
+    mock_dependencies["config_manager"].get_file_prompt.return_value = "Prompt"
+    mock_dependencies["langchain_manager"].get_timed_response.return_value = (
+        "Edited section",
+        0.1,
+        0.5,
+    )
+    mock_dependencies["ui_manager"].get_ai_action.side_effect = [
+        "section_prompt",
+        "accept",
+    ]
+    mock_dependencies["ui_manager"].get_section_prompt.return_value = "Shorter"
+    mock_dependencies["ui_manager"].choose_candidate.return_value = None
+
+    # Call the method
+    with patch.object(FileProcessor, "_write_section") as mock_write_section:
+        fp._process_with_ai("Test section")
+
+        mock_write_section.assert_called_once_with("Edited section")
+
+
 def test_process_with_ai_file_prompt(file_processor, mock_dependencies):
     """Test processing a section with AI and providing a file prompt."""
     fp, test_file = file_processor
@@ -234,18 +526,12 @@ def test_process_with_ai_file_prompt(file_processor, mock_dependencies):
     new_file_prompt = "New file prompt"
     edited_text1 = "Edited section 1"
     edited_text2 = "Edited section 2"
-    diff_text1 = "Diff text 1"
-    diff_text2 = "Diff text 2"
 
     # Set up the mocks
     mock_dependencies["config_manager"].get_file_prompt.return_value = old_file_prompt
-    mock_dependencies["langchain_manager"].get_response.side_effect = [
-        edited_text1,
-        edited_text2,
-    ]
-    mock_dependencies["markup_manager"].generate_diff.side_effect = [
-        diff_text1,
-        diff_text2,
+    mock_dependencies["langchain_manager"].get_timed_response.side_effect = [
+        (edited_text1, 0.1, 0.5),
+        (edited_text2, 0.1, 0.5),
     ]
     mock_dependencies["ui_manager"].get_ai_action.side_effect = [
         "file_prompt",
@@ -266,8 +552,10 @@ def test_process_with_ai_file_prompt(file_processor, mock_dependencies):
         )
 
         # Check that the langchain manager was called with the new prompt
-        mock_dependencies["langchain_manager"].get_response.assert_any_call(
-            new_file_prompt, section
+        mock_dependencies["langchain_manager"].get_timed_response.assert_any_call(
+            new_file_prompt,
+            section,
+            on_token=mock_dependencies["ui_manager"].display_token,
         )
 
         # Check that the edited text was written
@@ -323,73 +611,115 @@ def test_process(file_processor, mock_dependencies):
     fp, _ = file_processor
 
     # Set up the mocks
-    content = "Paragraph 1\nParagraph 2\nParagraph 3"
-    sections = ["Paragraph 1", "Paragraph 2", "Paragraph 3"]
-
-    with patch.object(FileProcessor, "_load_file", return_value=content):
-        with patch.object(FileProcessor, "_split_into_sections", return_value=sections):
-            # Set up the session manager to process two sections and then be complete
-            mock_dependencies["session_manager"].is_complete.side_effect = [
-                False,
-                False,
-                True,
-            ]
-            mock_dependencies[
-                "session_manager"
-            ].get_current_section.return_value = "Current section"
-
-            # Set up the UI manager to continue for the first section and skip for the second
-            mock_dependencies["ui_manager"].get_initial_action.side_effect = [
-                "continue",
-                "skip",
-            ]
-
-            # Call the method
-            with patch.object(
-                FileProcessor, "_process_with_ai"
-            ) as mock_process_with_ai:
-                with patch.object(
-                    FileProcessor, "_write_section"
-                ) as mock_write_section:
-                    fp.process()
-
-                    # Check that the sections were set in the session manager
-                    mock_dependencies[
-                        "session_manager"
-                    ].set_sections.assert_called_once_with(sections)
-
-                    # Check that is_complete was called three times
-                    assert (
-                        mock_dependencies["session_manager"].is_complete.call_count == 3
-                    )
-
-                    # Check that get_current_section was called twice
-                    assert (
-                        mock_dependencies[
-                            "session_manager"
-                        ].get_current_section.call_count
-                        == 2
-                    )
-
-                    # Check that get_initial_action was called twice
-                    assert (
-                        mock_dependencies["ui_manager"].get_initial_action.call_count
-                        == 2
-                    )
-
-                    # Check that process_with_ai was called once (for the first section)
-                    mock_process_with_ai.assert_called_once_with("Current section")
-
-                    # Check that write_section was called once (for the second section)
-                    mock_write_section.assert_called_once_with("Current section")
-
-                    # Check that advance was called once (for the second section)
-                    mock_dependencies["session_manager"].advance.assert_called_once()
-
-                    # Check that show_completion_message was called
-                    mock_dependencies[
-                        "ui_manager"
-                    ].show_completion_message.assert_called_once()
+    sections = MagicMock()
+
+    with (
+        patch.object(FileProcessor, "_load_sections", return_value=sections),
+        patch.object(FileProcessor, "_open_output"),
+    ):
+        # Set up the session manager to process two sections and then be complete
+        mock_dependencies["session_manager"].is_complete.side_effect = [
+            False,
+            False,
+            True,
+        ]
+        mock_dependencies[
+            "session_manager"
+        ].get_current_section.return_value = "Current section"
+
+        # Set up the UI manager to continue for the first section and skip for the second
+        mock_dependencies["ui_manager"].get_initial_action.side_effect = [
+            "continue",
+            "skip",
+        ]
+
+        # Call the method
+        with patch.object(FileProcessor, "_process_with_ai") as mock_process_with_ai:
+            with patch.object(FileProcessor, "_write_section") as mock_write_section:
+                assert fp.process() is True
+
+                # Check that the sections were set in the session manager
+                mock_dependencies[
+                    "session_manager"
+                ].set_sections.assert_called_once_with(sections)
+
+                # Check that is_complete was called three times
+                assert mock_dependencies["session_manager"].is_complete.call_count == 3
+
+                # Check that get_current_section was called twice
+                assert (
+                    mock_dependencies["session_manager"].get_current_section.call_count
+                    == 2
+                )
+
+                # Check that get_initial_action was called twice
+                assert (
+                    mock_dependencies["ui_manager"].get_initial_action.call_count == 2
+                )
+
+                # Check that process_with_ai was called once (for the first section)
+                mock_process_with_ai.assert_called_once_with("Current section")
+
+                # Check that write_section was called once (for the second section)
+                mock_write_section.assert_called_once_with("Current section")
+
+                # Check that advance was called once (for the second section)
+                mock_dependencies["session_manager"].advance.assert_called_once()
+
+                # Check that show_completion_message was called
+                mock_dependencies[
+                    "ui_manager"
+                ].show_completion_message.assert_called_once()
+
+
+def test_process_passes_through_trivial_sections(file_processor, mock_dependencies):
+    """Test that a scene break is kept without asking the user or the model."""
+    fp, _ = file_processor
+
+    with (
+        patch.object(FileProcessor, "_load_sections", return_value=MagicMock()),
+        patch.object(FileProcessor, "_open_output"),
+        patch.object(FileProcessor, "_write_section") as mock_write_section,
+    ):
+        mock_dependencies["session_manager"].is_complete.side_effect = [False, True]
+        mock_dependencies["session_manager"].get_current_section.return_value = "* * *"
+
+        assert fp.process() is True
+
+        mock_dependencies["ui_manager"].get_initial_action.assert_not_called()
+        mock_dependencies["langchain_manager"].get_timed_response.assert_not_called()
+        mock_write_section.assert_called_once_with("* * *")
+        mock_dependencies["session_manager"].advance.assert_called_once()
+        assert (
+            fp.classifier.describe()
+            == "Skipped 1 model request: 1 trivial, 0 duplicate"
+        )
+
+
+def test_process_with_ai_reuses_duplicate_edit(file_processor, mock_dependencies):
+    """Test that a section edited before takes the earlier edit without a request."""
+    fp, _ = file_processor
+    section = "The rain fell all night."
+    mock_dependencies["config_manager"].get_file_prompt.return_value = "Prompt"
+    mock_dependencies["langchain_manager"].get_timed_response.return_value = (
+        "Rain fell all night.",
+        0.1,
+        0.5,
+    )
+    mock_dependencies["ui_manager"].get_ai_action.return_value = "accept"
+
+    with patch.object(FileProcessor, "_write_section") as mock_write_section:
+        fp._process_with_ai(section)
+        fp._process_with_ai(section)
+
+        assert mock_dependencies["langchain_manager"].get_timed_response.call_count == 1
+        mock_dependencies["ui_manager"].show_reused_edit.assert_called_once()
+        assert mock_write_section.call_args_list == [
+            call("Rain fell all night."),
+            call("Rain fell all night."),
+        ]
+        # The reused edit wasn't streamed, so it is displayed with the choices
+        assert mock_dependencies["ui_manager"].get_ai_action.call_args.args[2] is False
 
 
 def test_process_size(file_processor, mock_dependencies):
@@ -397,32 +727,33 @@ def test_process_size(file_processor, mock_dependencies):
     fp, _ = file_processor
 
     # Set up the mocks
-    content = "Paragraph 1\nParagraph 2\nParagraph 3"
-    sections = ["Paragraph 1", "Paragraph 2", "Paragraph 3"]
+    sections = MagicMock()
     new_size = 5
 
-    with patch.object(FileProcessor, "_load_file", return_value=content):
-        with patch.object(FileProcessor, "_split_into_sections", return_value=sections):
-            # Set up the session manager to process one section and then be complete
-            mock_dependencies["session_manager"].is_complete.side_effect = [False, True]
-            mock_dependencies[
-                "session_manager"
-            ].get_current_section.return_value = "Current section"
+    with (
+        patch.object(FileProcessor, "_load_sections", return_value=sections),
+        patch.object(FileProcessor, "_open_output"),
+    ):
+        # Set up the session manager to process one section and then be complete
+        mock_dependencies["session_manager"].is_complete.side_effect = [False, True]
+        mock_dependencies[
+            "session_manager"
+        ].get_current_section.return_value = "Current section"
 
-            # Set up the UI manager to request a size change
-            mock_dependencies["ui_manager"].get_initial_action.return_value = "size"
-            mock_dependencies["ui_manager"].get_section_size.return_value = new_size
+        # Set up the UI manager to request a size change
+        mock_dependencies["ui_manager"].get_initial_action.return_value = "size"
+        mock_dependencies["ui_manager"].get_section_size.return_value = new_size
 
-            # Call the method
-            fp.process()
+        # Call the method
+        fp.process()
 
-            # Check that get_section_size was called
-            mock_dependencies["ui_manager"].get_section_size.assert_called_once()
+        # Check that get_section_size was called
+        mock_dependencies["ui_manager"].get_section_size.assert_called_once()
 
-            # Check that set_paragraphs_per_section was called with the new size
-            mock_dependencies[
-                "session_manager"
-            ].set_paragraphs_per_section.assert_called_once_with(new_size)
+        # Check that set_paragraphs_per_section was called with the new size
+        mock_dependencies[
+            "session_manager"
+        ].set_paragraphs_per_section.assert_called_once_with(new_size)
 
 
 def test_process_exit(file_processor, mock_dependencies):
@@ -430,22 +761,60 @@ def test_process_exit(file_processor, mock_dependencies):
     fp, _ = file_processor
 
     # Set up the mocks
-    content = "Paragraph 1\nParagraph 2\nParagraph 3"
-    sections = ["Paragraph 1", "Paragraph 2", "Paragraph 3"]
+    sections = MagicMock()
+
+    with (
+        patch.object(FileProcessor, "_load_sections", return_value=sections),
+        patch.object(FileProcessor, "_open_output"),
+    ):
+        # Set up the session manager
+        mock_dependencies["session_manager"].is_complete.return_value = False
+        mock_dependencies[
+            "session_manager"
+        ].get_current_section.return_value = "Current section"
+
+        # Set up the UI manager to request exit
+        mock_dependencies["ui_manager"].get_initial_action.return_value = "exit"
+
+        # Call the method
+        result = fp.process()
 
-    with patch.object(FileProcessor, "_load_file", return_value=content):
-        with patch.object(FileProcessor, "_split_into_sections", return_value=sections):
-            # Set up the session manager
-            mock_dependencies["session_manager"].is_complete.return_value = False
-            mock_dependencies[
-                "session_manager"
-            ].get_current_section.return_value = "Current section"
+        # Check that the method reported the exit
+        assert result is False
 
-            # Set up the UI manager to request exit
-            mock_dependencies["ui_manager"].get_initial_action.return_value = "exit"
+        # Check that show_completion_message was not called
+        mock_dependencies["ui_manager"].show_completion_message.assert_not_called()
 
-            # Call the method
-            fp.process()
 
-            # Check that show_completion_message was not called
-            mock_dependencies["ui_manager"].show_completion_message.assert_not_called()
+def test_process_exit_during_edit(file_processor, mock_dependencies):
+    """Test that exiting from the AI edit menu ends processing."""
+    fp, _ = file_processor
+
+    with (
+        patch.object(FileProcessor, "_load_sections", return_value=MagicMock()),
+        patch.object(FileProcessor, "_open_output"),
+        patch.object(FileProcessor, "_process_with_ai", return_value="exit"),
+    ):
+        mock_dependencies["session_manager"].is_complete.return_value = False
+        mock_dependencies[
+            "session_manager"
+        ].get_current_section.return_value = "Test section"
+        mock_dependencies["ui_manager"].get_initial_action.return_value = "continue"
+
+        assert fp.process() is False
+
+        # Only the first section was shown
+        mock_dependencies["ui_manager"].get_initial_action.assert_called_once()
+        mock_dependencies["ui_manager"].show_completion_message.assert_not_called()
+
+
+def test_output_file_in_dotted_directory(mock_dependencies):
+    """Test that dots in directory names don't truncate the output path."""
+    with patch("text_edit_ai.cli.file_processor.SessionManager"):
+        fp = FileProcessor(
+            mock_dependencies["config_manager"],
+            mock_dependencies["langchain_manager"],
+            "./books/vol.2/chapter.1.txt",
+        )
+
+    assert fp.output_file == "./books/vol.2/chapter.1_edited.txt"
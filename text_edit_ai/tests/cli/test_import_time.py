@@ -0,0 +1,43 @@
+"""Import-time regression tests for the CLI entry point."""
+
+import subprocess
+import sys
+
+# Generous budget for importing the CLI on slow CI machines; pulling in any
+# provider stack blows well past it
+IMPORT_BUDGET_US = 250_000
+
+HEAVY_PACKAGES = ("langchain", "langchain_core", "langchain_google_genai", "google")
+
+
+def import_times(module: str) -> dict[str, int]:
+    """Import a module in a fresh interpreter and get cumulative import times."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_main_does_not_import_providers():
+    """Test that importing the CLI loads no LangChain or Google modules."""
+    times = import_times("text_edit_ai.cli.__main__")
+
+    heavy = [name for name in times if name.split(".")[0] in HEAVY_PACKAGES]
+    assert heavy == []
+
+
+def test_main_import_budget():
+    """Test that importing the CLI stays within the startup budget."""
+    times = import_times("text_edit_ai.cli.__main__")
+
+    assert times["text_edit_ai.cli.__main__"] < IMPORT_BUDGET_US
@@ -1,8 +1,16 @@
 """Tests for the LangchainManager class."""
 
+import threading
 import pytest
 from unittest.mock import patch, MagicMock
-from text_edit_ai.cli.langchain_manager import LangchainManager, SYSTEM_PROMPT
+from text_edit_ai.cli.langchain_manager import (
+    LangchainManager,
+    PATCH_SYSTEM_PROMPT,
+    SYSTEM_PROMPT,
+)
+from text_edit_ai.cli.response_cache import ResponseCache
+from text_edit_ai.cli.prompt_cache import LocalPromptCache
+from langchain_core.messages import HumanMessage, SystemMessage
 
 
 @pytest.fixture
@@ -11,6 +19,7 @@ def mock_config_manager():
     mock = MagicMock()
     mock.get_api_key.return_value = "test_api_key"
     mock.get_model.return_value = "test_model"
+    mock.get_rate_limits.return_value = (None, None)
     return mock
 
 
@@ -36,8 +45,8 @@ def test_init(langchain_manager, mock_config_manager, mock_model):
     assert langchain_manager.model == mock_model
 
 
-@patch("text_edit_ai.cli.langchain_manager.ChatGoogleGenerativeAI")
-@patch("text_edit_ai.cli.langchain_manager.init_chat_model")
+@patch("langchain_google_genai.ChatGoogleGenerativeAI")
+@patch("langchain.chat_models.init_chat_model")
 def test_get_model_google(mock_init_chat_model, mock_google_ai, mock_config_manager):
     """Test getting a Google model."""
     # Create a new instance without patching get_model
@@ -54,8 +63,8 @@ def test_get_model_google(mock_init_chat_model, mock_google_ai, mock_config_mana
     mock_init_chat_model.assert_not_called()
 
 
-@patch("text_edit_ai.cli.langchain_manager.ChatGoogleGenerativeAI")
-@patch("text_edit_ai.cli.langchain_manager.init_chat_model")
+@patch("langchain_google_genai.ChatGoogleGenerativeAI")
+@patch("langchain.chat_models.init_chat_model")
 def test_get_model_other(mock_init_chat_model, mock_google_ai, mock_config_manager):
     """Test getting a non-Google model."""
     # Create a new instance without patching get_model
@@ -72,15 +81,8 @@ def test_get_model_other(mock_init_chat_model, mock_google_ai, mock_config_manag
     mock_google_ai.assert_not_called()
 
 
-@patch("text_edit_ai.cli.langchain_manager.ChatPromptTemplate")
-def test_get_response(mock_prompt_template, langchain_manager, mock_model):
+def test_get_response(langchain_manager, mock_model):
     """Test getting a response from the model."""
-    # Set up the mock prompt template
-    mock_messages = MagicMock()
-    mock_prompt = MagicMock()
-    mock_prompt.format_messages.return_value = mock_messages
-    mock_prompt_template.from_messages.return_value = mock_prompt
-
     # Set up the mock model to stream tokens
     token1 = MagicMock()
     token1.content = "Hello"
@@ -94,16 +96,262 @@ def test_get_response(mock_prompt_template, langchain_manager, mock_model):
     # Check the result
     assert result == "Hello world"
 
-    # Check that the prompt template was created correctly
-    mock_prompt_template.from_messages.assert_called_once_with(
+    # Check that the static prefix comes first, followed by the section
+    mock_model.stream.assert_called_once_with(
         [
-            ("system", SYSTEM_PROMPT),
-            (
-                "user",
-                "<context>Test context</context><writing>Test writing</writing>",
-            ),
+            SystemMessage(f"{SYSTEM_PROMPT}\n\n<context>Test context</context>"),
+            HumanMessage("<writing>Test writing</writing>"),
         ]
     )
 
-    # Check that the model was called with the messages
-    mock_model.stream.assert_called_once_with(mock_messages)
+
+def test_get_response_braces(langchain_manager, mock_model):
+    """Test that braces in the prompt or text are sent as they are."""
+    mock_model.stream.return_value = []
+
+    langchain_manager.get_response("Use {curly} quotes", "A {b} c")
+
+    messages = mock_model.stream.call_args.args[0]
+    assert "Use {curly} quotes" in messages[0].content
+    assert messages[1].content == "<writing>A {b} c</writing>"
+
+
+def test_get_response_prompt_cache(mock_config_manager, mock_model):
+    """Test that a cached prompt prefix is referenced instead of resent."""
+    prompt_cache = LocalPromptCache(min_tokens=0)
+    with patch.object(LangchainManager, "get_model", return_value=mock_model):
+        langchain_manager = LangchainManager(
+            mock_config_manager, prompt_cache=prompt_cache
+        )
+    mock_model.stream.return_value = []
+
+    langchain_manager.get_response("Long style guide", "Section 1")
+    langchain_manager.get_response("Long style guide", "Section 2")
+
+    # The prefix was cached once and only the sections were sent
+    (name,) = prompt_cache.contents
+    assert prompt_cache.contents[name] == (
+        f"{SYSTEM_PROMPT}\n\n<context>Long style guide</context>"
+    )
+    mock_model.stream.assert_called_with(
+        [HumanMessage("<writing>Section 2</writing>")], cached_content=name
+    )
+
+
+def test_get_timed_response_streams_tokens(langchain_manager, mock_model):
+    """Test that tokens are passed on as they arrive and timings are returned."""
+    token1 = MagicMock()
+    token1.content = "Hello"
+    token2 = MagicMock()
+    token2.content = " world"
+    mock_model.stream.return_value = [token1, token2]
+    on_token = MagicMock()
+
+    text, first_token, total = langchain_manager.get_timed_response(
+        "Test context", "Test writing", on_token
+    )
+
+    assert text == "Hello world"
+    assert [c.args[0] for c in on_token.call_args_list] == ["Hello", " world"]
+    assert 0 <= first_token <= total
+
+
+def test_get_response_cached(mock_config_manager, mock_model, tmp_path):
+    """Test that repeated requests are served from the response cache."""
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    with patch.object(LangchainManager, "get_model", return_value=mock_model):
+        langchain_manager = LangchainManager(mock_config_manager, cache)
+
+    with patch.object(
+        LangchainManager, "_generate", return_value="Edited"
+    ) as mock_generate:
+        first = langchain_manager.get_response("Test context", "Test writing")
+        second = langchain_manager.get_response("Test context", "Test writing")
+
+    assert first == second == "Edited"
+    mock_generate.assert_called_once()
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_get_response_cached_by_paragraph(mock_config_manager, mock_model, tmp_path):
+    """Test that cached paragraphs survive a change of section size."""
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    with patch.object(LangchainManager, "get_model", return_value=mock_model):
+        langchain_manager = LangchainManager(mock_config_manager, cache)
+
+    with patch.object(
+        LangchainManager, "_generate", return_value="Edited 1\n\nEdited 2"
+    ) as mock_generate:
+        langchain_manager.get_response("Test context", "Para 1\n\nPara 2")
+        first = langchain_manager.get_response("Test context", "Para 1")
+        second = langchain_manager.get_response("Test context", "Para 2")
+
+    assert first == "Edited 1"
+    assert second == "Edited 2"
+    mock_generate.assert_called_once()
+
+
+class StatusError(Exception):
+    """An error carrying an HTTP status code, as the provider SDKs raise."""
+
+    def __init__(self, status_code):
+        super().__init__(f"Error code: {status_code}")
+        self.status_code = status_code
+
+
+def token(content):
+    """Build a streamed chunk."""
+    chunk = MagicMock()
+    chunk.content = content
+    return chunk
+
+
+def test_generate_retries_transient_errors(langchain_manager, mock_model):
+    """Test that a rate-limited request is retried instead of re-initialized."""
+    langchain_manager.retry_policy.sleep = MagicMock()
+    mock_model.stream.side_effect = [StatusError(429), [token("Edited")]]
+
+    with patch("builtins.print"):
+        result = langchain_manager.get_response("Test context", "Test writing")
+
+    assert result == "Edited"
+    assert mock_model.stream.call_count == 2
+    langchain_manager.config_manager.set_model.assert_not_called()
+
+
+def test_generate_prompts_for_rejected_api_key(
+    langchain_manager, mock_config_manager, mock_model
+):
+    """Test that a rejected API key is fixed by the user and the request redone."""
+    mock_model.stream.side_effect = [StatusError(401), [token("Edited")]]
+    mock_config_manager.set_api_key.return_value = "new_api_key"
+
+    with patch.object(LangchainManager, "get_model", return_value=mock_model):
+        with patch("builtins.print"):
+            result = langchain_manager.get_response("Test context", "Test writing")
+
+    assert result == "Edited"
+    assert langchain_manager.api_key == "new_api_key"
+    mock_config_manager.set_model.assert_not_called()
+
+
+def test_generate_background_configuration_error(
+    langchain_manager, mock_config_manager, mock_model
+):
+    """Test that background requests raise configuration errors, not prompt."""
+    mock_model.stream.side_effect = StatusError(404)
+    errors = []
+
+    def request():
+        try:
+            langchain_manager.get_response("Test context", "Test writing")
+        except StatusError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=request)
+    thread.start()
+    thread.join()
+
+    assert len(errors) == 1
+    mock_config_manager.set_model.assert_not_called()
+
+
+@patch("langchain.chat_models.init_chat_model")
+def test_get_model_invalid_name(mock_init_chat_model, mock_config_manager):
+    """Test that an invalid model name is asked for again without recursion."""
+    mock_init_chat_model.side_effect = [ValueError("Unable to infer"), "model"]
+    mock_config_manager.set_model.return_value = "gpt-4"
+
+    with patch("builtins.print"):
+        langchain_manager = LangchainManager(mock_config_manager)
+
+    assert langchain_manager.model == "model"
+    assert langchain_manager.model_name == "gpt-4"
+    mock_config_manager.set_model.assert_called_once()
+
+
+def test_stream_rate_limited(langchain_manager, mock_model):
+    """Test that requests wait for the rate limiter and report real usage."""
+    langchain_manager.rate_limiter = MagicMock()
+    last = token("Edited")
+    last.usage_metadata = {"input_tokens": 90, "output_tokens": 10, "total_tokens": 100}
+    mock_model.stream.return_value = [token(""), last]
+
+    langchain_manager.get_response("Test context", "Test writing")
+
+    (estimated,) = langchain_manager.rate_limiter.acquire.call_args.args
+    assert estimated > 0
+    langchain_manager.rate_limiter.correct.assert_called_once_with(estimated, 100)
+
+
+def test_variant(langchain_manager, mock_config_manager, tmp_path):
+    """Test that a variant uses its own model and temperature, uncached."""
+    langchain_manager.cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    mock_config_manager.get_rate_limits.return_value = (60, None)
+    variant_model = MagicMock()
+
+    with patch.object(
+        LangchainManager, "_create_model", return_value=variant_model
+    ) as mock_create_model:
+        same = langchain_manager.variant(temperature=0.6)
+        other = langchain_manager.variant(model_name="gpt-4o", temperature=0.2)
+
+    assert mock_create_model.call_count == 2
+    assert same.model is variant_model
+    assert same.temperature == 0.6
+    assert same.cache is None
+    assert same.rate_limiter is langchain_manager.rate_limiter
+    assert other.model_name == "gpt-4o"
+    assert other.rate_limiter is not langchain_manager.rate_limiter
+    mock_config_manager.get_rate_limits.assert_called_with("gpt-4o")
+
+    # The original manager is unchanged
+    assert langchain_manager.temperature == 0.0
+    assert langchain_manager.model_name == "test_model"
+    assert langchain_manager.cache is not None
+    langchain_manager.cache.close()
+
+
+@pytest.fixture
+def patch_manager(mock_config_manager, mock_model):
+    """Fixture for a LangchainManager in patch mode."""
+    with patch.object(LangchainManager, "get_model", return_value=mock_model):
+        yield LangchainManager(mock_config_manager, patch_mode=True)
+
+
+def test_get_response_patch(patch_manager, mock_model):
+    """Test that a patch response is applied and passed on as the edited text."""
+    token1 = MagicMock()
+    token1.content = "<edit><find>quick brown</find>"
+    token2 = MagicMock()
+    token2.content = "<replace>quick red</replace></edit>"
+    mock_model.stream.return_value = [token1, token2]
+    on_token = MagicMock()
+
+    result = patch_manager.get_response(
+        "Test context", "The quick brown fox.", on_token
+    )
+
+    assert result == "The quick red fox."
+    on_token.assert_called_once_with("The quick red fox.")
+    messages = mock_model.stream.call_args.args[0]
+    assert messages[0].content.startswith(PATCH_SYSTEM_PROMPT)
+
+
+def test_get_response_patch_fallback(patch_manager, mock_model):
+    """Test that a patch that doesn't apply is replaced by a full-text request."""
+    bad_patch = MagicMock()
+    bad_patch.content = "<edit><find>slow green</find><replace>x</replace></edit>"
+    full_text = MagicMock()
+    full_text.content = "The quick red fox."
+    mock_model.stream.side_effect = [[bad_patch], [full_text]]
+    on_token = MagicMock()
+
+    result = patch_manager.get_response(
+        "Test context", "The quick brown fox.", on_token
+    )
+
+    assert result == "The quick red fox."
+    on_token.assert_called_once_with("The quick red fox.")
+    messages = mock_model.stream.call_args.args[0]
+    assert messages[0].content.startswith(SYSTEM_PROMPT)
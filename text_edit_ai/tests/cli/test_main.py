@@ -1,8 +1,11 @@
 """Tests for the main module."""
 
+import os
+import tempfile
 import unittest
-from unittest.mock import patch, MagicMock
-from text_edit_ai.cli.__main__ import main, setup_terminal_colors
+from unittest.mock import ANY, patch, MagicMock
+from text_edit_ai.cli.__main__ import expand_paths, main, setup_terminal_colors
+from text_edit_ai.cli.session_manager import SessionManager
 
 
 class TestMain(unittest.TestCase):
@@ -51,7 +54,7 @@ class TestMain(unittest.TestCase):
 
         # Set up the parsed args
         mock_args = MagicMock()
-        mock_args.file = None
+        mock_args.files = []
         mock_args.api_key = True
         mock_args.model = False
         mock_args.prompt = None
@@ -80,7 +83,7 @@ class TestMain(unittest.TestCase):
 
         # Set up the parsed args
         mock_args = MagicMock()
-        mock_args.file = None
+        mock_args.files = []
         mock_args.api_key = False
         mock_args.model = True
         mock_args.prompt = None
@@ -100,10 +103,12 @@ class TestMain(unittest.TestCase):
     @patch("text_edit_ai.cli.__main__.setup_terminal_colors")
     @patch("text_edit_ai.cli.__main__.LangchainManager")
     @patch("text_edit_ai.cli.__main__.FileProcessor")
+    @patch("text_edit_ai.cli.__main__.ResponseCache")
     @patch("text_edit_ai.cli.__main__.argparse.ArgumentParser")
     def test_main_process_file(
         self,
         mock_arg_parser,
+        mock_response_cache_class,
         mock_file_processor_class,
         mock_langchain_manager_class,
         mock_setup_colors,
@@ -116,10 +121,19 @@ class TestMain(unittest.TestCase):
 
         # Set up the parsed args
         mock_args = MagicMock()
-        mock_args.file = "test_file.txt"
+        mock_args.files = ["test_file.txt"]
         mock_args.api_key = False
         mock_args.model = False
         mock_args.prompt = None
+        mock_args.batch = False
+        mock_args.token_budget = None
+        mock_args.profile = False
+        mock_args.candidates = 3
+        mock_args.candidate_models = "gpt-4o, gemini-2.0-flash,"
+        mock_args.clear_cache = False
+        mock_args.cache_stats = False
+        mock_args.no_cache = False
+        mock_args.cache_size = 64
         mock_parser.parse_args.return_value = mock_args
 
         # Set up the mock config manager
@@ -137,17 +151,313 @@ class TestMain(unittest.TestCase):
         # Call the function
         main()
 
-        # Check that the langchain manager was created
-        mock_langchain_manager_class.assert_called_once_with(mock_config_manager)
+        # Check that the response cache was opened with the requested size
+        mock_response_cache_class.assert_called_once_with(max_bytes=64 * 1024 * 1024)
+
+        # Check that the langchain manager was created with the cache
+        mock_langchain_manager_class.assert_called_once_with(
+            mock_config_manager,
+            mock_response_cache_class.return_value,
+            patch_mode=mock_args.patch,
+        )
 
         # Check that the file processor was created
         mock_file_processor_class.assert_called_once_with(
-            mock_config_manager, mock_langchain_manager, "test_file.txt"
+            mock_config_manager,
+            mock_langchain_manager,
+            "test_file.txt",
+            paragraphs_per_section=1,
+            token_budget=SessionManager.TOKEN_BUDGET,
+            prefetch_depth=mock_args.prefetch,
+            fsync=mock_args.fsync,
+            markup_format=mock_args.markup_format,
+            diff_file=mock_args.diff_file,
+            diff_format=mock_args.diff_format,
+            telemetry=ANY,
+            candidates=3,
+            candidate_models=["gpt-4o", "gemini-2.0-flash"],
+            classifier=ANY,
         )
 
         # Check that the file was processed
         mock_file_processor.process.assert_called_once()
 
+    @patch("text_edit_ai.cli.__main__.ConfigManager")
+    @patch("text_edit_ai.cli.__main__.setup_terminal_colors")
+    @patch("text_edit_ai.cli.__main__.LangchainManager")
+    @patch("text_edit_ai.cli.__main__.FileProcessor")
+    @patch("text_edit_ai.cli.__main__.BatchProcessor")
+    @patch("text_edit_ai.cli.__main__.argparse.ArgumentParser")
+    def test_main_batch(
+        self,
+        mock_arg_parser,
+        mock_batch_processor_class,
+        mock_file_processor_class,
+        mock_langchain_manager_class,
+        mock_setup_colors,
+        mock_config_manager_class,
+    ):
+        """Test main function with --batch flag."""
+        # Set up the mock argument parser
+        mock_parser = MagicMock()
+        mock_arg_parser.return_value = mock_parser
+
+        # Set up the parsed args
+        mock_args = MagicMock()
+        mock_args.files = ["test_file.txt"]
+        mock_args.api_key = False
+        mock_args.model = False
+        mock_args.prompt = None
+        mock_args.batch = True
+        mock_args.max_workers = 8
+        mock_args.token_budget = 500
+        mock_args.profile = False
+        mock_args.clear_cache = False
+        mock_args.cache_stats = False
+        mock_args.no_cache = True
+        mock_parser.parse_args.return_value = mock_args
+
+        # Set up the mock config manager
+        mock_config_manager = MagicMock()
+        mock_config_manager_class.return_value = mock_config_manager
+
+        # Set up the mock langchain manager
+        mock_langchain_manager = MagicMock()
+        mock_langchain_manager_class.return_value = mock_langchain_manager
+
+        # Call the function
+        main()
+
+        # Check that the batch processor was used instead of the interactive one
+        mock_batch_processor_class.assert_called_once_with(
+            mock_config_manager,
+            mock_langchain_manager,
+            "test_file.txt",
+            paragraphs_per_section=0,
+            token_budget=500,
+            max_workers=8,
+            fsync=mock_args.fsync,
+            diff_file=mock_args.diff_file,
+            diff_format=mock_args.diff_format,
+            telemetry=ANY,
+            classifier=ANY,
+        )
+        mock_batch_processor_class.process_files.assert_called_once_with(
+            [mock_batch_processor_class.return_value], 8
+        )
+        mock_file_processor_class.assert_not_called()
+
+    @patch("text_edit_ai.cli.__main__.ConfigManager")
+    @patch("text_edit_ai.cli.__main__.setup_terminal_colors")
+    @patch("text_edit_ai.cli.__main__.LangchainManager")
+    @patch("text_edit_ai.cli.__main__.ResponseCache")
+    @patch("text_edit_ai.cli.__main__.argparse.ArgumentParser")
+    def test_main_clear_cache(
+        self,
+        mock_arg_parser,
+        mock_response_cache_class,
+        mock_langchain_manager_class,
+        mock_setup_colors,
+        mock_config_manager_class,
+    ):
+        """Test main function with --clear-cache flag."""
+        # Set up the mock argument parser
+        mock_parser = MagicMock()
+        mock_arg_parser.return_value = mock_parser
+
+        # Set up the parsed args
+        mock_args = MagicMock()
+        mock_args.files = []
+        mock_args.api_key = False
+        mock_args.model = False
+        mock_args.clear_cache = True
+        mock_args.cache_stats = False
+        mock_args.cache_size = 64
+        mock_parser.parse_args.return_value = mock_args
+
+        # Call the function
+        main()
+
+        # Check that the cache was cleared without creating a model
+        mock_response_cache_class.return_value.clear.assert_called_once()
+        mock_langchain_manager_class.assert_not_called()
+
+    @patch("text_edit_ai.cli.__main__.ConfigManager")
+    @patch("text_edit_ai.cli.__main__.setup_terminal_colors")
+    @patch("text_edit_ai.cli.__main__.LangchainManager")
+    @patch("text_edit_ai.cli.__main__.ResponseCache")
+    @patch("text_edit_ai.cli.__main__.argparse.ArgumentParser")
+    def test_main_no_file(
+        self,
+        mock_arg_parser,
+        mock_response_cache_class,
+        mock_langchain_manager_class,
+        mock_setup_colors,
+        mock_config_manager_class,
+    ):
+        """Test that a run without a file never builds a model."""
+        # Set up the mock argument parser
+        mock_parser = MagicMock()
+        mock_arg_parser.return_value = mock_parser
+
+        # Set up the parsed args
+        mock_args = MagicMock()
+        mock_args.files = []
+        mock_args.api_key = False
+        mock_args.model = False
+        mock_args.clear_cache = False
+        mock_args.cache_stats = False
+        mock_args.no_cache = False
+        mock_args.cache_size = 64
+        mock_parser.parse_args.return_value = mock_args
+
+        # Call the function
+        with patch("builtins.print") as mock_print:
+            main()
+
+        # Check that the user was told, without loading a provider or the cache
+        mock_print.assert_called_once_with("Please specify a file to edit.")
+        mock_langchain_manager_class.assert_not_called()
+        mock_response_cache_class.assert_not_called()
+        mock_config_manager_class.return_value.get_model.assert_not_called()
+        mock_config_manager_class.return_value.get_api_key.assert_not_called()
+
+    @patch("text_edit_ai.cli.__main__.ConfigManager")
+    @patch("text_edit_ai.cli.__main__.setup_terminal_colors")
+    @patch("text_edit_ai.cli.__main__.LangchainManager")
+    @patch("text_edit_ai.cli.__main__.FileProcessor")
+    @patch("text_edit_ai.cli.__main__.argparse.ArgumentParser")
+    def test_main_multiple_files_stops_on_exit(
+        self,
+        mock_arg_parser,
+        mock_file_processor_class,
+        mock_langchain_manager_class,
+        mock_setup_colors,
+        mock_config_manager_class,
+    ):
+        """Test that exiting one file skips the files after it."""
+        mock_parser = MagicMock()
+        mock_arg_parser.return_value = mock_parser
+
+        mock_args = MagicMock()
+        mock_args.files = ["a.txt", "b.txt", "c.txt"]
+        mock_args.api_key = False
+        mock_args.model = False
+        mock_args.prompt = "Be brief"
+        mock_args.prompt_file = None
+        mock_args.batch = False
+        mock_args.token_budget = None
+        mock_args.profile = False
+        mock_args.clear_cache = False
+        mock_args.cache_stats = False
+        mock_args.no_cache = True
+        mock_parser.parse_args.return_value = mock_args
+
+        mock_config_manager = MagicMock()
+        mock_config_manager_class.return_value = mock_config_manager
+
+        # The first file is finished, the user exits during the second
+        mock_file_processor_class.return_value.process.side_effect = [True, False]
+
+        main()
+
+        # The prompt was set for every file
+        assert mock_config_manager.set_file_prompt.call_count == 3
+        mock_config_manager.set_file_prompt.assert_any_call("c.txt", "Be brief")
+
+        # Only the first two files were opened
+        files = [c.args[2] for c in mock_file_processor_class.call_args_list]
+        assert files == ["a.txt", "b.txt"]
+
+    @patch("text_edit_ai.cli.__main__.ConfigManager")
+    @patch("text_edit_ai.cli.__main__.setup_terminal_colors")
+    @patch("text_edit_ai.cli.__main__.LangchainManager")
+    @patch("text_edit_ai.cli.__main__.FileProcessor")
+    @patch("text_edit_ai.cli.__main__.Profiler")
+    @patch("text_edit_ai.cli.__main__.argparse.ArgumentParser")
+    def test_main_profile(
+        self,
+        mock_arg_parser,
+        mock_profiler_class,
+        mock_file_processor_class,
+        mock_langchain_manager_class,
+        mock_setup_colors,
+        mock_config_manager_class,
+    ):
+        """Test that --profile profiles the session, even if it fails."""
+        mock_parser = MagicMock()
+        mock_arg_parser.return_value = mock_parser
+
+        mock_args = MagicMock()
+        mock_args.files = ["test_file.txt"]
+        mock_args.api_key = False
+        mock_args.model = False
+        mock_args.prompt = None
+        mock_args.batch = False
+        mock_args.token_budget = None
+        mock_args.profile = True
+        mock_args.profile_dir = "profiles"
+        mock_args.clear_cache = False
+        mock_args.cache_stats = False
+        mock_args.no_cache = True
+        mock_parser.parse_args.return_value = mock_args
+
+        mock_profiler = mock_profiler_class.return_value
+        mock_profiler.stop.return_value = ["profiles/run.pstats"]
+        mock_file_processor_class.return_value.process.side_effect = KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            main()
+
+        mock_profiler_class.assert_called_once_with("profiles")
+        mock_profiler.start.assert_called_once()
+        mock_profiler.stop.assert_called_once()
+
+
+class TestExpandPaths(unittest.TestCase):
+    """Test cases for expanding file arguments."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = self.temp_dir.name
+        for name in [
+            "chapter10.txt",
+            "chapter2.txt",
+            "chapter1.md",
+            "chapter1_edited.txt",
+            "chapter2.txt.idx",
+            "notes.pdf",
+        ]:
+            with open(os.path.join(self.root, name), "w") as f:
+                f.write("text")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.root, name)
+
+    def test_directory(self):
+        """Test that directories expand to their books in natural order."""
+        assert expand_paths([self.root]) == [
+            self.path("chapter1.md"),
+            self.path("chapter2.txt"),
+            self.path("chapter10.txt"),
+        ]
+
+    def test_glob(self):
+        """Test that glob patterns expand, skipping generated files."""
+        assert expand_paths([self.path("chapter*.txt")]) == [
+            self.path("chapter2.txt"),
+            self.path("chapter10.txt"),
+        ]
+
+    def test_plain_paths_and_duplicates(self):
+        """Test that plain paths are kept as given and listed only once."""
+        assert expand_paths(
+            ["missing.txt", self.path("chapter2.txt"), self.path("*2.txt")]
+        ) == ["missing.txt", self.path("chapter2.txt")]
+
 
 if __name__ == "__main__":
     unittest.main()
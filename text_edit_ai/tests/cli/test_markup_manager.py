@@ -1,9 +1,12 @@
 """Tests for the MarkupManager class."""
 
+import difflib
+import io
 import pytest
 from unittest.mock import patch
 from text_edit_ai.cli.markup_manager import MarkupManager
 from text_edit_ai.cli.colors import Colors
+from text_edit_ai.cli.diff_engine import DiffResult
 
 
 @pytest.fixture
@@ -43,56 +46,64 @@ def test_tokenize(markup_manager):
     assert tokens == expected_tokens
 
 
-def test_calculate_diff_equal(markup_manager):
+def test_write_markup_equal(markup_manager):
     """Test calculating diff with equal tokens."""
     original_tokens = ["Hello", " ", "world"]
     edited_tokens = ["Hello", " ", "world"]
 
-    result = markup_manager._calculate_diff(original_tokens, edited_tokens)
+    stream = io.StringIO()
+    markup_manager._write_markup(
+        DiffResult.compute(original_tokens, edited_tokens), stream
+    )
+    result = stream.getvalue()
 
-    # Equal tokens should be returned as-is
-    assert result == original_tokens
+    # Equal tokens should be written as-is
+    assert result == "Hello world"
 
 
-def test_calculate_diff_delete(markup_manager):
+def test_write_markup_delete(markup_manager):
     """Test calculating diff with deleted tokens."""
     original_tokens = ["Hello", " ", "world", "!"]
     edited_tokens = ["Hello", " ", "world"]
 
-    result = markup_manager._calculate_diff(original_tokens, edited_tokens)
+    stream = io.StringIO()
+    markup_manager._write_markup(
+        DiffResult.compute(original_tokens, edited_tokens), stream
+    )
+    result = stream.getvalue()
 
     # The last token should be marked as deleted
-    expected_result = ["Hello", " ", "world", f"[RED][STRIKE]![RESET]"]
-    assert result == expected_result
+    assert result == "Hello world[RED][STRIKE]![RESET]"
 
 
-def test_calculate_diff_insert(markup_manager):
+def test_write_markup_insert(markup_manager):
     """Test calculating diff with inserted tokens."""
     original_tokens = ["Hello", " ", "world"]
     edited_tokens = ["Hello", " ", "world", "!"]
 
-    result = markup_manager._calculate_diff(original_tokens, edited_tokens)
+    stream = io.StringIO()
+    markup_manager._write_markup(
+        DiffResult.compute(original_tokens, edited_tokens), stream
+    )
+    result = stream.getvalue()
 
     # The last token should be marked as inserted
-    expected_result = ["Hello", " ", "world", f"[GREEN]![RESET]"]
-    assert result == expected_result
+    assert result == "Hello world[GREEN]![RESET]"
 
 
-def test_calculate_diff_replace(markup_manager):
+def test_write_markup_replace(markup_manager):
     """Test calculating diff with replaced tokens."""
     original_tokens = ["Hello", " ", "world"]
     edited_tokens = ["Hello", " ", "there"]
 
-    result = markup_manager._calculate_diff(original_tokens, edited_tokens)
+    stream = io.StringIO()
+    markup_manager._write_markup(
+        DiffResult.compute(original_tokens, edited_tokens), stream
+    )
+    result = stream.getvalue()
 
     # The last token should be marked as deleted and the new one as inserted
-    expected_result = [
-        "Hello",
-        " ",
-        f"[RED][STRIKE]world[RESET]",
-        f"[GREEN]there[RESET]",
-    ]
-    assert result == expected_result
+    assert result == "Hello [RED][STRIKE]world[RESET][GREEN]there[RESET]"
 
 
 def test_generate_diff(markup_manager):
@@ -102,19 +113,15 @@ def test_generate_diff(markup_manager):
 
     # Mock the internal methods to control their behavior
     with patch.object(MarkupManager, "_tokenize") as mock_tokenize:
-        with patch.object(MarkupManager, "_calculate_diff") as mock_calculate_diff:
+        with patch.object(MarkupManager, "_write_markup") as mock_write_markup:
             # Set up the mocks
             mock_tokenize.side_effect = [
                 ["Hello", " ", "world", "!"],  # Original tokens
                 ["Hello", " ", "there", "!"],  # Edited tokens
             ]
-            mock_calculate_diff.return_value = [
-                "Hello",
-                " ",
-                f"[RED][STRIKE]world[RESET]",
-                f"[GREEN]there[RESET]",
-                "!",
-            ]
+            mock_write_markup.side_effect = lambda result, stream, fmt: stream.write(
+                "Hello [RED][STRIKE]world[RESET][GREEN]there[RESET]!"
+            )
 
             # Call the method
             result = markup_manager.generate_diff(original_text, edited_text)
@@ -126,9 +133,10 @@ def test_generate_diff(markup_manager):
             # Check that the internal methods were called correctly
             mock_tokenize.assert_any_call(original_text)
             mock_tokenize.assert_any_call(edited_text)
-            mock_calculate_diff.assert_called_once_with(
-                ["Hello", " ", "world", "!"], ["Hello", " ", "there", "!"]
-            )
+            result = mock_write_markup.call_args.args[0]
+            assert result.original == ["Hello", " ", "world", "!"]
+            assert result.edited == ["Hello", " ", "there", "!"]
+            assert mock_write_markup.call_args.args[2] == "ansi"
 
 
 def test_generate_diff_integration(markup_manager):
@@ -156,3 +164,124 @@ def test_generate_diff_integration(markup_manager):
     # The word "some" should be marked as deleted and "different" as inserted
     assert "[RED][STRIKE]some[RESET]" in result
     assert "[GREEN]different[RESET]" in result
+
+
+def test_write_markup_coalesces_runs(markup_manager):
+    """Test that runs of changed tokens share a single pair of markers."""
+    result = markup_manager.generate_diff(
+        "The quick brown fox jumps.", "The fox jumps quickly."
+    )
+
+    # "quick brown " is deleted as one run and " quickly" inserted as another
+    assert result.count("[RED][STRIKE]") == 1
+    assert result.count("[GREEN]") == 1
+    assert result.count("[RESET]") == 2
+
+
+def test_generate_diff_plain(markup_manager):
+    """Test the plain text markup format."""
+    result = markup_manager.generate_diff(
+        "Hello big world!", "Hello there world!", "plain"
+    )
+
+    assert result == "Hello [-big-]{+there+} world!"
+
+
+def test_generate_diff_html(markup_manager):
+    """Test that the HTML markup format escapes the text."""
+    result = markup_manager.generate_diff("a <b> c", "a <i> & c", "html")
+
+    assert result == (
+        '<pre class="diff">a <del>&lt;b&gt;</del><ins>&lt;i&gt; &amp;</ins> c</pre>\n'
+    )
+
+
+def test_generate_diff_unified(markup_manager):
+    """Test the unified diff format."""
+    original_text = "\n".join("abcdefghij")
+    edited_text = original_text.replace("b", "B").replace("i", "I")
+
+    result = markup_manager.generate_diff(original_text, edited_text, "unified")
+
+    expected = difflib.unified_diff(
+        original_text.splitlines(),
+        edited_text.splitlines(),
+        "original",
+        "edited",
+        lineterm="",
+    )
+    assert result.splitlines() == list(expected)
+
+    # Identical texts have no hunks
+    assert markup_manager.generate_diff("a\nb", "a\nb", "unified") == ""
+
+
+def test_unknown_markup_format():
+    """Test that an unknown markup format is rejected."""
+    with pytest.raises(ValueError):
+        MarkupManager("rtf")
+
+
+def test_get_diff_result_memoized(markup_manager):
+    """Test that a diff is computed once per pair of texts."""
+    with patch.object(
+        MarkupManager, "compute_diff", return_value="Diff"
+    ) as mock_compute_diff:
+        assert markup_manager.get_diff_result("Original", "Edited") == "Diff"
+        assert markup_manager.get_diff_result("Original", "Edited") == "Diff"
+
+        mock_compute_diff.assert_called_once_with("Original", "Edited")
+
+        # A different pair is a different diff
+        markup_manager.get_diff_result("Original", "Edited again")
+        assert mock_compute_diff.call_count == 2
+
+
+def test_formats_share_one_diff(markup_manager):
+    """Test that rendering several formats computes the diff only once."""
+    with patch.object(
+        MarkupManager, "compute_diff", wraps=markup_manager.compute_diff
+    ) as mock_compute_diff:
+        for markup_format in MarkupManager.FORMATS:
+            markup_manager.generate_diff("Hello world!", "Hello there!", markup_format)
+
+        mock_compute_diff.assert_called_once()
+
+
+def test_prepare_diff(markup_manager):
+    """Test that a prepared diff is computed in the background and reused."""
+    markup_manager.prepare_diff("Original text", "Edited text")
+    result = markup_manager.get_diff_result("Original text", "Edited text")
+
+    assert result.original == ["Original", " ", "text"]
+    assert result.edited == ["Edited", " ", "text"]
+    assert len(markup_manager._diffs) == 1
+
+
+def test_diff_result_summary(markup_manager):
+    """Test the summary counts of a diff."""
+    result = markup_manager.compute_diff("The quick brown fox.", "The slow fox!")
+
+    assert [op.tag for op in result.ops] == [
+        "equal",
+        "replace",
+        "equal",
+        "replace",
+    ]
+    assert (result.deleted, result.inserted, result.kept) == (4, 2, 4)
+    assert result.change_ratio == 6 / 14
+    assert result.changed
+
+
+def test_get_diff_result_eviction(markup_manager):
+    """Test that only the most recently used diffs are kept."""
+    markup_manager.CACHE_SIZE = 2
+    markup_manager.get_diff_result("a", "b")
+    markup_manager.get_diff_result("c", "d")
+    markup_manager.get_diff_result("a", "b")
+    markup_manager.get_diff_result("e", "f")
+
+    assert markup_manager._diffs.keys() == {
+        markup_manager._diff_key("a", "b"),
+        markup_manager._diff_key("e", "f"),
+    }
@@ -0,0 +1,129 @@
+"""Tests for the OutputWriter class."""
+
+import pytest
+from unittest.mock import patch
+from text_edit_ai.cli.output_writer import OutputWriter
+
+
+@pytest.fixture
+def output_path(tmp_path):
+    """Fixture for an output file path."""
+    return tmp_path / "book_edited.txt"
+
+
+def test_write(output_path):
+    """Test writing sections and journal entries."""
+    writer = OutputWriter(str(output_path))
+    assert writer.next_section is None
+
+    writer.write("Section 1", 2)
+    writer.write("Section 2", 4)
+    writer.close()
+
+    assert output_path.read_text() == "Section 1\n\nSection 2\n\n"
+    journal = (output_path.parent / "book_edited.txt.journal").read_text()
+    assert journal == "2 11\n4 22\n"
+
+
+def test_no_files_until_written(output_path):
+    """Test that a writer closed without writing leaves no files behind."""
+    writer = OutputWriter(str(output_path))
+    writer.close()
+
+    assert list(output_path.parent.iterdir()) == []
+
+
+def test_close_removes_empty_journal(output_path):
+    """Test that an empty journal is removed on close."""
+    journal_path = output_path.parent / "book_edited.txt.journal"
+    journal_path.touch()
+
+    writer = OutputWriter(str(output_path))
+    assert writer.next_section is None
+    writer.close()
+
+    assert not journal_path.exists()
+
+
+def test_resume_from_journal(output_path):
+    """Test that reopening resumes after the last committed section."""
+    writer = OutputWriter(str(output_path))
+    writer.write("Section 1", 1)
+    writer.close()
+
+    reopened = OutputWriter(str(output_path))
+    assert reopened.next_section == 1
+    reopened.write("Section 2", 2)
+    reopened.close()
+
+    assert output_path.read_text() == "Section 1\n\nSection 2\n\n"
+
+
+def test_resume_truncates_uncommitted_output(output_path):
+    """Test that output written after the last journal entry is dropped."""
+    writer = OutputWriter(str(output_path))
+    writer.write("Section 1", 1)
+    writer.close()
+
+    # Simulate a crash between writing a section and journaling it
+    with open(output_path, "a") as f:
+        f.write("Partial sect")
+
+    reopened = OutputWriter(str(output_path))
+    reopened.close()
+
+    assert reopened.next_section == 1
+    assert output_path.read_text() == "Section 1\n\n"
+
+
+def test_resume_ignores_partial_journal_entry(output_path):
+    """Test that a journal line cut short by a crash is skipped."""
+    writer = OutputWriter(str(output_path))
+    writer.write("Section 1", 1)
+    writer.write("Section 2", 2)
+    writer.close()
+
+    journal_path = output_path.parent / "book_edited.txt.journal"
+    journal_path.write_text("1 11\n2 2")
+
+    reopened = OutputWriter(str(output_path))
+    reopened.close()
+
+    assert reopened.next_section == 1
+    assert output_path.read_text() == "Section 1\n\n"
+
+
+def test_resume_ignores_journal_for_missing_output(output_path):
+    """Test that a journal is discarded if its output file was removed."""
+    writer = OutputWriter(str(output_path))
+    writer.write("Section 1", 1)
+    writer.close()
+    output_path.unlink()
+
+    reopened = OutputWriter(str(output_path))
+    reopened.close()
+
+    assert reopened.next_section is None
+
+
+def test_fsync_policies(output_path):
+    """Test when each fsync policy syncs to disk."""
+    with patch("os.fsync") as mock_fsync:
+        writer = OutputWriter(str(output_path), fsync="never")
+        writer.write("Section 1", 1)
+        writer.close()
+        assert mock_fsync.call_count == 0
+
+        writer = OutputWriter(str(output_path), fsync="close")
+        writer.write("Section 2", 2)
+        assert mock_fsync.call_count == 0
+        writer.close()
+        assert mock_fsync.call_count == 2
+
+        writer = OutputWriter(str(output_path), fsync="always")
+        writer.write("Section 3", 3)
+        assert mock_fsync.call_count == 4
+        writer.close()
+
+    with pytest.raises(ValueError):
+        OutputWriter(str(output_path), fsync="sometimes")
@@ -0,0 +1,153 @@
+"""Tests for the ParagraphReader class."""
+
+import os
+import pytest
+from text_edit_ai.cli.paragraph_reader import ParagraphReader
+
+
+def split_paragraphs(content: str) -> list[str]:
+    """Reference paragraph split: every non-blank line, stripped."""
+    content = content.replace("\n\n", "\n").replace("\n", "\n\n")
+    return [p.strip() for p in content.split("\n\n") if p.strip()]
+
+
+@pytest.fixture
+def make_reader(tmp_path):
+    """Fixture that writes content to a file and opens a reader on it."""
+    readers = []
+
+    def make(content: str, **kwargs) -> ParagraphReader:
+        path = tmp_path / "book.txt"
+        path.write_bytes(content.encode())
+        reader = ParagraphReader(str(path), **kwargs)
+        readers.append(reader)
+        return reader
+
+    yield make
+    for reader in readers:
+        reader.close()
+
+
+def test_matches_reference_split(make_reader):
+    """Test that paragraphs match the reference split."""
+    content = (
+        "Paragraph 1\nParagraph 2\n\nParagraph 3\n\n\n  Indented  \r\n"
+        "\n   \nÜnïcødé — “quotes”\nLast line without newline"
+    )
+
+    reader = make_reader(content)
+
+    assert list(reader) == split_paragraphs(content)
+    assert len(reader) == 6
+
+
+def test_indexing_and_slicing(make_reader):
+    """Test indexing and slicing like a list."""
+    reader = make_reader("One\n\nTwo\nThree\n\nFour\n")
+
+    assert reader[0] == "One"
+    assert reader[-1] == "Four"
+    assert reader[1:3] == ["Two", "Three"]
+    assert reader[2:10] == ["Three", "Four"]
+    assert reader[::2] == ["One", "Three"]
+
+    with pytest.raises(IndexError):
+        reader[4]
+
+
+def test_scans_lazily(make_reader):
+    """Test that only the needed part of the file is scanned."""
+    reader = make_reader("".join(f"Paragraph {i}\n" for i in range(1000)))
+
+    assert reader[0:2] == ["Paragraph 0", "Paragraph 1"]
+    assert len(reader.offsets) == 2
+
+    assert len(reader) == 1000
+    assert reader[999] == "Paragraph 999"
+
+
+def test_has_scans_lazily(make_reader):
+    """Test checking for a paragraph without scanning past it."""
+    reader = make_reader("".join(f"Paragraph {i}\n" for i in range(1000)))
+
+    assert reader.has(0)
+    assert not reader.has(-1)
+    assert len(reader.offsets) == 1
+
+    assert reader.has(999)
+    assert not reader.has(1000)
+
+
+def test_window_is_bounded(make_reader):
+    """Test that only a window of paragraph text is kept in memory."""
+    reader = make_reader(
+        "".join(f"Paragraph {i}\n" for i in range(100)), window_size=10
+    )
+
+    for i in range(100):
+        assert reader[i] == f"Paragraph {i}"
+
+    assert len(reader._window) == 10
+
+
+def test_empty_file(make_reader, tmp_path):
+    """Test reading an empty file, which saves no index."""
+    reader = make_reader("\n\n  \n")
+
+    assert len(reader) == 0
+    assert list(reader) == []
+    assert reader[0:1] == []
+    assert not (tmp_path / "book.txt.idx").exists()
+
+
+def test_index_saved_after_full_scan(make_reader, tmp_path):
+    """Test that a full scan saves an index that later readers reuse."""
+    content = "".join(f"Paragraph {i}\n\n" for i in range(100))
+    reader = make_reader(content)
+    assert reader.index is None
+    assert len(reader) == 100
+
+    reopened = ParagraphReader(str(tmp_path / "book.txt"))
+    try:
+        # The index answers without scanning the file
+        assert reopened.index is not None
+        assert len(reopened) == 100
+        assert reopened[90] == "Paragraph 90"
+        assert len(reopened.offsets) == 0
+    finally:
+        reopened.close()
+
+
+def test_index_invalidated_by_size_change(make_reader, tmp_path):
+    """Test that an index for an older version of the file is ignored."""
+    path = tmp_path / "book.txt"
+    assert len(make_reader("One\nTwo\n")) == 2
+
+    with open(path, "a") as f:
+        f.write("Three\n")
+
+    reopened = ParagraphReader(str(path))
+    try:
+        assert reopened.index is None
+        assert list(reopened) == ["One", "Two", "Three"]
+    finally:
+        reopened.close()
+
+
+def test_index_hash_mismatch_rescans(make_reader, tmp_path):
+    """Test that content changes hidden from size and mtime are detected."""
+    path = tmp_path / "book.txt"
+    assert len(make_reader("One\nTwo\n")) == 2
+
+    # Rewrite the file with the same size and modification time
+    stat = path.stat()
+    path.write_bytes(b"Uno\nDos\n")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    reopened = ParagraphReader(str(path))
+    try:
+        assert reopened.index is not None
+        assert reopened[1] == "Dos"
+        assert reopened.index is None
+    finally:
+        reopened.close()
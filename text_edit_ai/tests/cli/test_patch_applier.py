@@ -0,0 +1,85 @@
+"""Tests for the PatchApplier class."""
+
+import pytest
+from text_edit_ai.cli.patch_applier import PatchApplier, PatchError
+
+SECTION = "The quick brown fox jumps over the lazy dog. The dog sleeps."
+
+
+def test_parse():
+    """Test parsing the edits of a patch."""
+    response = """
+<edit><find>quick brown</find><replace>quick red</replace></edit>
+<edit>
+<find>lazy dog.</find>
+<replace>lazy dog!</replace>
+</edit>
+"""
+    assert PatchApplier.parse(response) == [
+        ("quick brown", "quick red"),
+        ("lazy dog.", "lazy dog!"),
+    ]
+
+
+def test_parse_unchanged():
+    """Test that an unchanged response has no edits."""
+    assert PatchApplier.parse(" <unchanged/>\n") == []
+    assert PatchApplier.apply(SECTION, "<unchanged/>") == SECTION
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        "The quick red fox jumps over the lazy dog. The dog sleeps.",
+        "Here you go:\n<edit><find>quick</find><replace>slow</replace></edit>",
+        "<edit><find>quick</find></edit>",
+    ],
+)
+def test_parse_malformed(response):
+    """Test that anything but a clean list of edits is rejected."""
+    with pytest.raises(PatchError):
+        PatchApplier.parse(response)
+
+
+def test_apply():
+    """Test applying edits given out of order."""
+    response = (
+        "<edit><find>The dog sleeps.</find><replace>It sleeps.</replace></edit>"
+        "<edit><find>quick brown </find><replace></replace></edit>"
+    )
+
+    assert PatchApplier.apply(SECTION, response) == (
+        "The fox jumps over the lazy dog. It sleeps."
+    )
+
+
+def test_apply_keeps_whitespace():
+    """Test that replacements spanning lines are applied as they are."""
+    section = "First paragraph.\n\nSecond paragraph."
+    response = (
+        "<edit><find>paragraph.\n\nSecond</find>"
+        "<replace>paragraph, then\n\nthe second</replace></edit>"
+    )
+
+    assert PatchApplier.apply(section, response) == (
+        "First paragraph, then\n\nthe second paragraph."
+    )
+
+
+@pytest.mark.parametrize(
+    "response, message",
+    [
+        ("<edit><find>slow fox</find><replace>x</replace></edit>", "not in section"),
+        ("<edit><find>dog</find><replace>cat</replace></edit>", "not unique"),
+        ("<edit><find></find><replace>x</replace></edit>", "empty find"),
+        (
+            "<edit><find>quick brown</find><replace>red</replace></edit>"
+            "<edit><find>brown fox</find><replace>cat</replace></edit>",
+            "overlapping",
+        ),
+    ],
+)
+def test_apply_rejected(response, message):
+    """Test that a patch that doesn't match the section exactly is rejected."""
+    with pytest.raises(PatchError, match=message):
+        PatchApplier.apply(SECTION, response)
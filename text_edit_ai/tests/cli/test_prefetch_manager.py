@@ -0,0 +1,144 @@
+"""Tests for the PrefetchManager class."""
+
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock
+from text_edit_ai.cli.prefetch_manager import PrefetchManager
+
+
+@pytest.fixture
+def mock_langchain_manager():
+    """Fixture for a mock langchain manager that echoes the writing."""
+    mock = MagicMock()
+    mock.get_timed_response.side_effect = lambda context, writing, on_token=None: (
+        f"Edited {writing}",
+        0.1,
+        0.5,
+    )
+    return mock
+
+
+def test_disabled(mock_langchain_manager):
+    """Test that a depth of 0 requests edits synchronously."""
+    pm = PrefetchManager(mock_langchain_manager, depth=0)
+    on_token = MagicMock()
+
+    pm.prefetch("Context", ["Section 1", "Section 2"])
+
+    # Nothing should have been requested in the background
+    mock_langchain_manager.get_timed_response.assert_not_called()
+    assert pm.pending == {}
+
+    # The edit is requested directly and streamed
+    result = pm.get_timed_response("Context", "Section 1", on_token)
+    assert result == ("Edited Section 1", 0.1, 0.5)
+    mock_langchain_manager.get_timed_response.assert_called_once_with(
+        "Context", "Section 1", on_token
+    )
+
+
+def test_prefetch_and_get_response(mock_langchain_manager):
+    """Test that prefetched edits are handed back without a new request."""
+    pm = PrefetchManager(mock_langchain_manager, depth=2)
+    on_token = MagicMock()
+
+    pm.prefetch("Context", ["Section 1", "Section 2"])
+    result1 = pm.get_timed_response("Context", "Section 1", on_token)
+    result2 = pm.get_timed_response("Context", "Section 2")
+    pm.shutdown()
+
+    assert result1[0] == "Edited Section 1"
+    assert result2[0] == "Edited Section 2"
+
+    # A prefetched edit is passed on in one piece
+    on_token.assert_called_once_with("Edited Section 1")
+
+    # Each section was requested exactly once
+    assert mock_langchain_manager.get_timed_response.call_count == 2
+    assert pm.pending == {}
+
+
+def test_prefetch_drops_stale_sections(mock_langchain_manager):
+    """Test that sections no longer upcoming are dropped from the queue."""
+    release = threading.Event()
+    mock_langchain_manager.get_timed_response.side_effect = (
+        lambda context, writing: release.wait() and (writing, 0.1, 0.5)
+    )
+    pm = PrefetchManager(mock_langchain_manager, depth=1)
+
+    pm.prefetch("Context", ["Section 1", "Section 2"])
+    pm.prefetch("New context", ["Section 1"])
+
+    # Only the section for the new context is still tracked
+    assert list(pm.pending) == [("New context", "Section 1")]
+
+    release.set()
+    pm.shutdown()
+
+
+def test_prefetch_keeps_current_section(mock_langchain_manager):
+    """Test that the current section is never prefetched, but is not dropped."""
+    release = threading.Event()
+    mock_langchain_manager.get_timed_response.side_effect = (
+        lambda context, writing: release.wait() and (writing, 0.1, 0.5)
+    )
+    pm = PrefetchManager(mock_langchain_manager, depth=1)
+
+    # Nothing was prefetched for the first section
+    pm.prefetch("Context", ["Section 2"], current="Section 1")
+    assert list(pm.pending) == [("Context", "Section 2")]
+
+    # The request already made for the next one is kept once it is current
+    pm.prefetch("Context", ["Section 3"], current="Section 2")
+    assert list(pm.pending) == [("Context", "Section 2"), ("Context", "Section 3")]
+
+    release.set()
+    pm.shutdown()
+    requested = mock_langchain_manager.get_timed_response.call_args_list
+    assert ("Context", "Section 1") not in [call.args for call in requested]
+
+
+def test_get_response_falls_back_on_error(mock_langchain_manager):
+    """Test that a failed background request is retried directly."""
+    mock_langchain_manager.get_timed_response.side_effect = [
+        RuntimeError("Timeout"),
+        ("Edited Section 1", 0.1, 0.5),
+    ]
+    pm = PrefetchManager(mock_langchain_manager, depth=1)
+
+    pm.prefetch("Context", ["Section 1"])
+    result = pm.get_timed_response("Context", "Section 1")
+    pm.shutdown()
+
+    edited, first_token, total = result
+    assert edited == "Edited Section 1"
+    # The direct request's timings plus the wait for the failed one
+    assert 0.1 <= first_token < 0.5 <= total
+    assert mock_langchain_manager.get_timed_response.call_count == 2
+
+
+def test_get_response_times_the_wait(mock_langchain_manager):
+    """Test that a prefetched edit reports the caller's wait, not the request's."""
+    started = threading.Event()
+
+    def get_timed_response(context, writing, on_token=None):
+        started.set()
+        time.sleep(0.05)
+        return f"Edited {writing}", 0.2, 0.5
+
+    mock_langchain_manager.get_timed_response.side_effect = get_timed_response
+    pm = PrefetchManager(mock_langchain_manager, depth=1)
+
+    # Asked for while the request is still in flight
+    pm.prefetch("Context", ["Section 1"])
+    started.wait()
+    _, first_token, total = pm.get_timed_response("Context", "Section 1")
+    assert 0 < first_token == total < 0.2
+
+    # Asked for once the request already finished: no wait at all
+    pm.prefetch("Context", ["Section 2"])
+    pm.pending[("Context", "Section 2")].result()
+    _, first_token, total = pm.get_timed_response("Context", "Section 2")
+    pm.shutdown()
+    assert first_token == total < 0.01
@@ -0,0 +1,48 @@
+"""Tests for the Profiler class."""
+
+import pstats
+import threading
+import time
+from text_edit_ai.cli.profiler import Profiler
+
+
+def busy_worker(stop):
+    """Keep a background thread busy until stopped."""
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_profile(tmp_path):
+    """Test that a profiled run writes all three reports."""
+    profiler = Profiler(str(tmp_path / "profiles"), interval=0.001)
+    stop = threading.Event()
+
+    profiler.start()
+    worker = threading.Thread(target=busy_worker, args=(stop,), name="worker")
+    worker.start()
+    data = [str(i) * 10 for i in range(10000)]
+    time.sleep(0.05)
+    stop.set()
+    worker.join()
+    pstats_path, alloc_path, collapsed_path = profiler.stop()
+
+    # The main thread's calls are in the pstats file
+    stats = pstats.Stats(pstats_path)
+    assert any("time.sleep" in func[2] for func in stats.stats)
+
+    # The allocation report lists sites, including the list built above
+    report = open(alloc_path).read()
+    assert report.startswith("Peak traced memory:")
+    assert "test_profiler.py" in report
+    assert len(data) == 10000
+
+    # Every line is a root-first stack and a count, worker threads included
+    lines = open(collapsed_path).read().splitlines()
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0
+    assert any(
+        line.startswith("worker;") and "busy_worker (test_profiler.py:" in line
+        for line in lines
+    )
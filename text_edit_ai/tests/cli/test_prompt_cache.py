@@ -0,0 +1,71 @@
+"""Tests for the PromptCache and LocalPromptCache classes."""
+
+from unittest.mock import MagicMock, patch
+from text_edit_ai.cli.prompt_cache import LocalPromptCache, PromptCache
+
+LONG_PREFIX = "Use British spelling. " * 400
+
+
+def test_short_prefix_not_cached():
+    """Test that prefixes below the provider minimum are sent in full."""
+    model = MagicMock()
+    prompt_cache = PromptCache()
+
+    assert prompt_cache.get(model, "gemini-pro", "Short prompt") is None
+    model.create_cached_content.assert_not_called()
+
+
+def test_unsupported_model_not_cached():
+    """Test that models without explicit caching are left alone."""
+    model = MagicMock(spec=["stream"])
+
+    assert PromptCache().get(model, "gpt-4", LONG_PREFIX) is None
+
+
+def test_prefix_cached_once():
+    """Test that a prefix is uploaded once and reused."""
+    model = MagicMock()
+    model.create_cached_content.return_value = "cachedContents/abc"
+    prompt_cache = PromptCache()
+
+    assert prompt_cache.get(model, "gemini-pro", LONG_PREFIX) == "cachedContents/abc"
+    assert prompt_cache.get(model, "gemini-pro", LONG_PREFIX) == "cachedContents/abc"
+
+    model.create_cached_content.assert_called_once()
+    assert model.create_cached_content.call_args.kwargs == {"ttl": PromptCache.TTL}
+
+
+def test_prefix_renewed_before_expiry():
+    """Test that cached content is recreated shortly before it expires."""
+    model = MagicMock()
+    prompt_cache = PromptCache()
+
+    with patch("time.monotonic", return_value=0):
+        prompt_cache.get(model, "gemini-pro", LONG_PREFIX)
+    with patch("time.monotonic", return_value=PromptCache.TTL):
+        prompt_cache.get(model, "gemini-pro", LONG_PREFIX)
+
+    assert model.create_cached_content.call_count == 2
+
+
+def test_create_failure_falls_back():
+    """Test that a failed upload sends the prefix in full without retrying."""
+    model = MagicMock()
+    model.create_cached_content.side_effect = RuntimeError("not supported")
+    prompt_cache = PromptCache()
+
+    with patch("builtins.print"):
+        assert prompt_cache.get(model, "gemini-pro", LONG_PREFIX) is None
+        assert prompt_cache.get(model, "gemini-pro", LONG_PREFIX) is None
+
+    model.create_cached_content.assert_called_once()
+
+
+def test_local_prompt_cache():
+    """Test that the local stand-in hands out stable names for any model."""
+    prompt_cache = LocalPromptCache(min_tokens=0)
+
+    first = prompt_cache.get(object(), "any-model", "Prefix")
+    assert first == prompt_cache.get(object(), "any-model", "Prefix")
+    assert first.startswith("cachedContents/local-")
+    assert prompt_cache.contents == {first: "Prefix"}
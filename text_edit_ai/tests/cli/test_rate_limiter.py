@@ -0,0 +1,76 @@
+"""Tests for the RateLimiter and TokenBucket classes."""
+
+import pytest
+from unittest.mock import MagicMock, patch
+from text_edit_ai.cli.rate_limiter import RateLimiter, TokenBucket
+
+
+@pytest.fixture
+def clock():
+    """Fixture for a controllable time.monotonic."""
+    now = [0.0]
+    with patch("time.monotonic", side_effect=lambda: now[0]):
+        yield now
+
+
+def test_token_bucket():
+    """Test reserving from, refilling and adjusting a token bucket."""
+    bucket = TokenBucket(60, now=0)
+
+    assert bucket.reserve(60, now=0) == 0
+    # Empty: the next unit is refilled after a second
+    assert bucket.reserve(1, now=0) == 1.0
+    # Refills never go past capacity
+    bucket.adjust(-1000, now=0)
+    assert bucket.level == 60
+
+
+def test_unlimited(clock):
+    """Test that a limiter without limits never waits."""
+    limiter = RateLimiter()
+    limiter.sleep = MagicMock()
+
+    assert not limiter.enabled
+    assert limiter.acquire(10**9) == 0
+    limiter.sleep.assert_not_called()
+
+
+def test_requests_per_minute(clock):
+    """Test that requests are spaced out once the RPM quota is used up."""
+    limiter = RateLimiter(rpm=60 / RateLimiter.HEADROOM)
+    limiter.sleep = MagicMock()
+
+    delays = [limiter.acquire(0) for _ in range(62)]
+
+    # A full minute's worth goes out at once, then one per second
+    assert delays[:60] == [0] * 60
+    assert delays[60:] == pytest.approx([1.0, 2.0])
+    assert limiter.waited == pytest.approx(3.0)
+
+
+def test_tokens_per_minute(clock):
+    """Test that large requests wait for enough token quota."""
+    limiter = RateLimiter(tpm=6000 / RateLimiter.HEADROOM)
+    limiter.sleep = MagicMock()
+
+    assert limiter.acquire(6000) == 0
+    assert limiter.acquire(1000) == pytest.approx(10.0)
+
+    # After a minute the quota has refilled
+    clock[0] = 70
+    assert limiter.acquire(3000) == 0
+
+
+def test_correct_from_usage(clock):
+    """Test that real usage settles the estimate made up front."""
+    limiter = RateLimiter(tpm=6000 / RateLimiter.HEADROOM)
+    limiter.sleep = MagicMock()
+
+    limiter.acquire(3000)
+    # The request used less than estimated, so the difference is returned
+    limiter.correct(3000, 1000)
+    assert limiter.acquire(5000) == 0
+
+    # And more than estimated is taken as debt
+    limiter.correct(1000, 3000)
+    assert limiter.acquire(0) == pytest.approx(20.0)
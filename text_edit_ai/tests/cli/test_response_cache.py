@@ -0,0 +1,99 @@
+"""Tests for the ResponseCache class."""
+
+import pytest
+from text_edit_ai.cli.response_cache import ResponseCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Fixture for a ResponseCache in a temporary directory."""
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_bytes=1024)
+    yield cache
+    cache.close()
+
+
+def test_make_key():
+    """Test that keys depend on every part and on part boundaries."""
+    key = ResponseCache.make_key("model", "system", "context", "writing")
+
+    assert key == ResponseCache.make_key("model", "system", "context", "writing")
+    assert key != ResponseCache.make_key("model", "system", "context", "other")
+    assert ResponseCache.make_key("ab", "c") != ResponseCache.make_key("a", "bc")
+
+
+def test_put_and_lookup(cache):
+    """Test storing and looking up a response."""
+    cache.put("key", "Edited")
+
+    assert cache.lookup(["key"]) == ["Edited"]
+    assert cache.lookup(["missing"]) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lookup_candidates(cache):
+    """Test that the first fully cached candidate is returned."""
+    cache.put("para1", "Edited 1")
+    cache.put("para2", "Edited 2")
+
+    result = cache.lookup(["section"], ["para1", "para2"])
+    assert result == ["Edited 1", "Edited 2"]
+
+    # A partially cached candidate is a miss
+    assert cache.lookup(["section"], ["para1", "para3"]) is None
+
+    # Each lookup counts once
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_persistence(tmp_path):
+    """Test that responses and statistics survive reopening the cache."""
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResponseCache(path)
+    cache.put("key", "Edited")
+    cache.lookup(["key"])
+    cache.close()
+
+    reopened = ResponseCache(path)
+    assert reopened.lookup(["key"]) == ["Edited"]
+    assert reopened.stats()["hits"] == 2
+    reopened.close()
+
+
+def test_lru_eviction(cache):
+    """Test that least recently used entries are evicted over the size cap."""
+    value = "x" * 300
+    cache.put("a", value)
+    cache.put("b", value)
+    cache.put("c", value)
+
+    # Touch "a" so "b" becomes the least recently used entry
+    cache.lookup(["a"])
+    cache.put("d", value)
+
+    assert cache.lookup(["b"]) is None
+    assert cache.lookup(["a"]) == [value]
+    assert cache.lookup(["d"]) == [value]
+    assert cache.stats()["bytes"] <= 1024
+
+
+def test_clear(cache):
+    """Test clearing the cache."""
+    cache.put("key", "Edited")
+    cache.lookup(["key"])
+
+    cache.clear()
+
+    assert cache.stats() == {"entries": 0, "bytes": 0, "hits": 0, "misses": 0}
+
+
+def test_describe(cache):
+    """Test describing the cache."""
+    cache.put("key", "Edited")
+    cache.lookup(["key"])
+    cache.lookup(["missing"])
+
+    description = cache.describe()
+
+    assert "1 entries" in description
+    assert "1 hits / 1 misses" in description
+    assert "50% hit rate" in description
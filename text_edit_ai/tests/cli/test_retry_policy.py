@@ -0,0 +1,173 @@
+"""Tests for the RetryPolicy and CircuitBreaker classes and classify_error."""
+
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+from text_edit_ai.cli.retry_policy import (
+    AUTH,
+    BAD_MODEL,
+    FATAL,
+    TRANSIENT,
+    CircuitBreaker,
+    RetryPolicy,
+    classify_error,
+)
+
+
+class StatusError(Exception):
+    """An error carrying an HTTP status code, as the provider SDKs raise."""
+
+    def __init__(self, status_code, message="error"):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ResourceExhausted(Exception):
+    """Stand-in for google.api_core.exceptions.ResourceExhausted."""
+
+
+@pytest.mark.parametrize(
+    "error, kind",
+    [
+        (StatusError(429), TRANSIENT),
+        (StatusError(503), TRANSIENT),
+        (StatusError(401), AUTH),
+        (StatusError(404), BAD_MODEL),
+        (StatusError(400), FATAL),
+        (ResourceExhausted("quota"), TRANSIENT),
+        (TimeoutError(), TRANSIENT),
+        (ConnectionResetError(), TRANSIENT),
+        (Exception("API key not valid. Please pass a valid API key."), AUTH),
+        (Exception("models/gemini-foo is not found for API version"), BAD_MODEL),
+        (ValueError("Unable to infer model provider for model='foo'"), BAD_MODEL),
+        (Exception("Rate limit reached for requests"), TRANSIENT),
+        (ValueError("something else"), FATAL),
+    ],
+)
+def test_classify_error(error, kind):
+    """Test classifying request errors."""
+    assert classify_error(error) == kind
+
+
+@pytest.fixture
+def retry_policy():
+    """Fixture for a RetryPolicy that doesn't really sleep."""
+    policy = RetryPolicy(max_attempts=4, base_delay=1.0, max_delay=5.0)
+    policy.sleep = MagicMock()
+    policy.random = lambda: 1.0
+    return policy
+
+
+def test_retry_transient_then_succeed(retry_policy):
+    """Test that transient failures are retried with exponential backoff."""
+    func = MagicMock(side_effect=[StatusError(429), StatusError(503), "Edited"])
+    on_retry = MagicMock()
+
+    assert retry_policy.call(func, "a", on_retry=on_retry, b=1) == "Edited"
+
+    func.assert_called_with("a", b=1)
+    assert func.call_count == 3
+    assert [c.args[0] for c in retry_policy.sleep.call_args_list] == [1.0, 2.0]
+    assert [c.args[1:] for c in on_retry.call_args_list] == [(1, 1.0), (2, 2.0)]
+
+
+def test_retry_gives_up(retry_policy):
+    """Test that retrying stops after max_attempts."""
+    func = MagicMock(side_effect=StatusError(429))
+
+    with pytest.raises(StatusError):
+        retry_policy.call(func)
+
+    assert func.call_count == 4
+    assert [c.args[0] for c in retry_policy.sleep.call_args_list] == [1.0, 2.0, 4.0]
+
+
+def test_no_retry_on_configuration_error(retry_policy):
+    """Test that errors retrying can't fix are raised at once."""
+    func = MagicMock(side_effect=StatusError(401))
+
+    with pytest.raises(StatusError):
+        retry_policy.call(func)
+
+    func.assert_called_once()
+    retry_policy.sleep.assert_not_called()
+
+
+def test_backoff_jitter():
+    """Test that backoff is randomized up to the capped exponential delay."""
+    policy = RetryPolicy(base_delay=1.0, max_delay=10.0)
+    policy.random = lambda: 0.5
+
+    assert policy.backoff(1) == 0.5
+    assert policy.backoff(3) == 2.0
+    assert policy.backoff(10) == 5.0
+
+
+def test_circuit_opens_after_failures():
+    """Test that the circuit opens after consecutive failures."""
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10)
+
+    assert not breaker.record_failure()
+    assert not breaker.record_failure()
+    assert breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # A success in between resets the count
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    assert not breaker.record_failure()
+
+
+def test_circuit_half_open_trial():
+    """Test that one trial request is let through once the timeout passes."""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    with patch("time.monotonic", return_value=100):
+        breaker.record_failure()
+    with patch("time.monotonic", return_value=110):
+        breaker.wait()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    # A failed trial opens the circuit again
+    with patch("time.monotonic", return_value=111):
+        assert breaker.record_failure()
+    assert breaker.opened_at == 111
+
+
+def test_circuit_pauses_other_threads():
+    """Test that callers wait while the circuit is open and resume after."""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    resumed = []
+
+    def worker():
+        breaker.wait()
+        resumed.append(time.monotonic())
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    # One trial request went through; the others wait for its outcome
+    assert len(resumed) == 1
+    breaker.record_success()
+    for thread in threads:
+        thread.join(timeout=1)
+
+    assert len(resumed) == 3
+    assert min(resumed) - start >= 0.05
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_retry_policy_uses_circuit_breaker(retry_policy):
+    """Test that the policy reports outcomes to its circuit breaker."""
+    retry_policy.circuit_breaker = MagicMock()
+    func = MagicMock(side_effect=[StatusError(500), "Edited"])
+
+    retry_policy.call(func)
+
+    assert retry_policy.circuit_breaker.wait.call_count == 2
+    retry_policy.circuit_breaker.record_failure.assert_called_once()
+    retry_policy.circuit_breaker.record_success.assert_called_once()
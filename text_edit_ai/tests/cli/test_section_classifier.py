@@ -0,0 +1,108 @@
+"""Tests for the SectionClassifier class."""
+
+import pytest
+from text_edit_ai.cli.section_classifier import SectionClassifier
+
+
+@pytest.fixture
+def classifier():
+    """Fixture for a SectionClassifier."""
+    return SectionClassifier()
+
+
+@pytest.mark.parametrize(
+    "section",
+    [
+        "***",
+        "* * *",
+        "  ---  ",
+        "Chapter 12",
+        "CHAPTER XII",
+        "PART TWO: Winter",
+        "Chapter 3 — The Storm",
+        "Chapter 3. The Storm",
+        "Epilogue: Ten Years Later",
+        "Epilogue",
+        "XII.",
+        "12",
+        "# The Long Night",
+        "Yes!",
+        "Chapter 1\n\n***",
+    ],
+)
+def test_is_trivial(classifier, section):
+    """Test that breaks, headings, numbers and one-word lines are trivial."""
+    assert classifier.is_trivial(section)
+
+
+@pytest.mark.parametrize(
+    "section",
+    [
+        "He said no.",
+        "Part of me wanted to stay.",
+        "Book lovers are rare.",
+        "Prologue to nothing at all",
+        "Scene 2. She walked in.",
+        "Part 3 of the plan failed.",
+        "Part 3 - the plan failed.",
+        "Act II: Everyone agreed it was over.",
+        "Epilogue: he never came back",
+        "Chapter 1\n\nThe rain fell all night.",
+        "她走进房间，看着窗外的雨，心里想着明天要发生的事情。",
+        "well-meaning-but-ultimately-self-defeating-and-rather-tiresome",
+    ],
+)
+def test_is_not_trivial(classifier, section):
+    """Test that prose, even when it starts like a heading, is not trivial."""
+    assert not classifier.is_trivial(section)
+
+
+def test_disabled():
+    """Test that a disabled classifier finds nothing."""
+    classifier = SectionClassifier(enabled=False)
+    classifier.remember("Prompt", "Some text.", "Edited text.")
+
+    assert not classifier.is_trivial("***")
+    assert classifier.lookup("Prompt", "Some text.") is None
+
+
+def test_lookup(classifier):
+    """Test that an edit is found for the same text and prompt only."""
+    classifier.remember("Prompt", "The rain fell.", "Rain fell.")
+
+    assert classifier.lookup("Prompt", "The rain fell.") == "Rain fell."
+    assert classifier.lookup("Other prompt", "The rain fell.") is None
+    assert classifier.lookup("Prompt", "The snow fell.") is None
+
+
+def test_lookup_by_paragraph(classifier):
+    """Test that a section of edited and trivial paragraphs takes their edits."""
+    classifier.remember("Prompt", "First one.\n\nSecond one.", "First.\n\nSecond.")
+
+    assert classifier.lookup("Prompt", "Second one.\n\n***\n\nFirst one.") == (
+        "Second.\n\n***\n\nFirst."
+    )
+    assert classifier.lookup("Prompt", "Second one.\n\nThird one.") is None
+
+
+def test_lookup_evicts_oldest(classifier):
+    """Test that only the most recent edits are kept."""
+    classifier.MAX_EDITS = 2
+    classifier.remember("Prompt", "One fish.", "1")
+    classifier.remember("Prompt", "Two fish.", "2")
+    classifier.lookup("Prompt", "One fish.")
+    classifier.remember("Prompt", "Red fish.", "3")
+
+    assert classifier.lookup("Prompt", "One fish.") == "1"
+    assert classifier.lookup("Prompt", "Two fish.") is None
+
+
+def test_describe(classifier):
+    """Test describing the skipped requests."""
+    assert classifier.describe() is None
+
+    classifier.count(SectionClassifier.TRIVIAL)
+    classifier.count(SectionClassifier.TRIVIAL)
+    classifier.count(SectionClassifier.DUPLICATE)
+
+    assert classifier.describe() == "Skipped 3 model requests: 2 trivial, 1 duplicate"
@@ -2,6 +2,7 @@
 
 import pytest
 from unittest.mock import MagicMock
+from text_edit_ai.cli.paragraph_reader import ParagraphReader
 from text_edit_ai.cli.session_manager import SessionManager
 
 
@@ -115,6 +116,26 @@ def test_get_current_section_at_end(session_manager):
     assert result == "Section 3"
 
 
+def test_get_upcoming_sections(session_manager):
+    """Test getting the sections after the current one."""
+    sm, _ = session_manager
+
+    # Set up the session manager with five sections of two paragraphs
+    test_sections = ["Section 1", "Section 2", "Section 3", "Section 4", "Section 5"]
+    sm.set_sections(test_sections)
+    sm.paragraphs_per_section = 2
+    sm.current_section = 0
+
+    # Ask for more sections than remain
+    result = sm.get_upcoming_sections(5)
+
+    # Check that we got the remaining groups, including the short last one
+    assert result == ["Section 3\n\nSection 4", "Section 5"]
+
+    # Check that the count is respected
+    assert sm.get_upcoming_sections(1) == ["Section 3\n\nSection 4"]
+
+
 def test_advance(session_manager, mock_config_manager):
     """Test advancing to the next section."""
     sm, _ = session_manager
@@ -137,6 +158,18 @@ def test_advance(session_manager, mock_config_manager):
     sm.config_manager.save_config.assert_called_once()
 
 
+def test_set_current_section(session_manager, mock_config_manager):
+    """Test moving to a specific section."""
+    sm, _ = session_manager
+    _, mock_file_config = mock_config_manager
+
+    sm.set_current_section(7)
+
+    assert sm.current_section == 7
+    assert mock_file_config["current_section"] == "7"
+    sm.config_manager.save_config.assert_called_once()
+
+
 def test_is_complete_true(session_manager):
     """Test is_complete when all sections have been processed."""
     sm, _ = session_manager
@@ -178,3 +211,58 @@ def test_set_paragraphs_per_section(session_manager):
 
     # Check that it was updated
     assert sm.paragraphs_per_section == 5
+
+
+def test_auto_section_size(session_manager):
+    """Test that automatic sizing groups paragraphs up to the token budget."""
+    sm, _ = session_manager
+
+    # Short dialogue lines are grouped, a long paragraph stands alone
+    test_sections = ["Yes.", "No!", "Why not?", "word " * 20, "Fine.", "Okay."]
+    sm.set_sections(test_sections)
+    sm.set_token_budget(8)
+    sm.current_section = 0
+
+    assert sm.paragraphs_per_section == 0
+    assert sm.get_current_section() == "Yes.\n\nNo!\n\nWhy not?"
+    assert sm.next_section() == 3
+    assert list(sm.iter_sections()) == [
+        "Yes.\n\nNo!\n\nWhy not?",
+        "word " * 20,
+        "Fine.\n\nOkay.",
+    ]
+
+
+def test_auto_section_size_advance(session_manager):
+    """Test advancing through automatically sized sections."""
+    sm, _ = session_manager
+    sm.set_sections(["One two three.", "Four five six.", "Seven eight nine."])
+    sm.set_token_budget(8)
+    sm.current_section = 0
+
+    sm.advance()
+    assert sm.current_section == 2
+    sm.advance()
+    assert sm.is_complete()
+
+
+@pytest.mark.parametrize("paragraphs_per_section", [2, 0])
+def test_first_section_without_full_scan(
+    mock_config_manager, tmp_path, paragraphs_per_section
+):
+    """Test that the first section is shown without scanning the whole file."""
+    mock_cm, _ = mock_config_manager
+    path = tmp_path / "book.txt"
+    path.write_text("".join(f"Paragraph {i}\n" for i in range(10000)))
+    reader = ParagraphReader(str(path))
+    sm = SessionManager(mock_cm, str(path), paragraphs_per_section, token_budget=6)
+    sm.set_sections(reader)
+
+    assert not sm.is_complete()
+    assert sm.get_current_section() == "Paragraph 0\n\nParagraph 1"
+    assert sm.get_upcoming_sections(1) == ["Paragraph 2\n\nParagraph 3"]
+
+    # Only the paragraphs shown so far were scanned, and no index was saved
+    assert len(reader.offsets) < 10
+    assert not (tmp_path / "book.txt.idx").exists()
+    reader.close()
@@ -0,0 +1,73 @@
+"""Tests for the Telemetry class."""
+
+import json
+import time
+from text_edit_ai.cli.telemetry import Telemetry
+
+
+def test_disabled():
+    """Test that disabled telemetry records nothing."""
+    telemetry = Telemetry()
+    record = telemetry.start_section("book.txt", 0, "Text")
+
+    assert not telemetry.enabled
+    assert record is None
+    with telemetry.timer(record, "io_s"):
+        pass
+    telemetry.record_response(record, 0.1, 0.2)
+    telemetry.finish_section(record, "accept", "Edited")
+    assert telemetry.summary() is None
+
+
+def test_record(tmp_path):
+    """Test that a section's record is written to the metrics file."""
+    path = tmp_path / "metrics.jsonl"
+    telemetry = Telemetry(str(path))
+
+    record = telemetry.start_section("book.txt", 4, "One two.\n\nThree four.")
+    with telemetry.timer(record, "io_s"):
+        time.sleep(0.01)
+    telemetry.record_response(record, 0.1, 0.5)
+    telemetry.record_response(record, 0.3, 0.25)
+    telemetry.finish_section(record, "accept", "One.\n\nThree.")
+    telemetry.close()
+
+    (line,) = path.read_text().splitlines()
+    written = json.loads(line)
+    assert written["file"] == "book.txt"
+    assert written["section"] == 4
+    assert written["paragraphs"] == 2
+    assert written["input_chars"] == 21
+    assert written["output_chars"] == 12
+    assert written["input_tokens"] > written["output_tokens"] > 0
+    assert written["requests"] == 2
+    # The TTFT of the first request, the time of both
+    assert written["ttft_s"] == 0.1
+    assert written["model_s"] == 0.75
+    assert written["io_s"] >= 0.01
+    assert written["action"] == "accept"
+
+
+def test_summary(tmp_path):
+    """Test the percentile summary of the recorded timings."""
+    telemetry = Telemetry(str(tmp_path / "metrics.jsonl"))
+    for i in range(1, 101):
+        record = telemetry.start_section("book.txt", i, "Text")
+        telemetry.add(record, "think_s", i / 1000)
+        telemetry.finish_section(record, "skip")
+
+    summary = telemetry.summary()
+
+    assert summary.splitlines()[0] == "Section timings (100 sections):"
+    think = next(line for line in summary.splitlines() if line.startswith("think"))
+    assert think.split() == ["think", "50.0ms", "95.0ms", "99.0ms"]
+    # Sections without a model request have no TTFT to summarize
+    assert not any(line.startswith("ttft") for line in summary.splitlines())
+
+
+def test_percentile():
+    """Test the nearest-rank percentile."""
+    values = [1.0, 2.0, 3.0, 4.0]
+    assert Telemetry.percentile(values, 0.5) == 2.0
+    assert Telemetry.percentile(values, 0.95) == 4.0
+    assert Telemetry.percentile([7.0], 0.99) == 7.0
@@ -0,0 +1,18 @@
+"""Tests for the TokenEstimator class."""
+
+from text_edit_ai.cli.token_estimator import TokenEstimator
+
+
+def test_estimate_counts_words_and_punctuation():
+    """Test that short words and punctuation marks count as a token each."""
+    assert TokenEstimator.estimate("Hi, I am Bo.") == 6
+
+
+def test_estimate_long_words():
+    """Test that long words count as several tokens."""
+    assert TokenEstimator.estimate("incomprehensibilities") == 6
+
+
+def test_estimate_empty():
+    """Test that empty text has no tokens."""
+    assert TokenEstimator.estimate("") == 0
@@ -1,7 +1,7 @@
 """Tests for the UIManager class."""
 
 import pytest
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 from text_edit_ai.cli.ui_manager import UIManager
 from text_edit_ai.cli.colors import Colors
 
@@ -58,7 +58,7 @@ def test_get_initial_action_invalid(ui_manager):
 def test_get_ai_action_skip(ui_manager):
     """Test getting AI action with 'skip' response."""
     with patch("builtins.input", return_value="s"):
-        result = ui_manager.get_ai_action("Edited text", "Diff text")
+        result = ui_manager.get_ai_action("Edited text", lambda: "Diff text")
 
         assert result == "skip"
 
@@ -66,7 +66,7 @@ def test_get_ai_action_skip(ui_manager):
 def test_get_ai_action_section_prompt(ui_manager):
     """Test getting AI action with 'section_prompt' response."""
     with patch("builtins.input", return_value="c"):
-        result = ui_manager.get_ai_action("Edited text", "Diff text")
+        result = ui_manager.get_ai_action("Edited text", lambda: "Diff text")
 
         assert result == "section_prompt"
 
@@ -74,7 +74,7 @@ def test_get_ai_action_section_prompt(ui_manager):
 def test_get_ai_action_size(ui_manager):
     """Test getting AI action with 'size' response."""
     with patch("builtins.input", return_value="z"):
-        result = ui_manager.get_ai_action("Edited text", "Diff text")
+        result = ui_manager.get_ai_action("Edited text", lambda: "Diff text")
 
         assert result == "size"
 
@@ -82,7 +82,7 @@ def test_get_ai_action_size(ui_manager):
 def test_get_ai_action_exit(ui_manager):
     """Test getting AI action with 'exit' response."""
     with patch("builtins.input", return_value="x"):
-        result = ui_manager.get_ai_action("Edited text", "Diff text")
+        result = ui_manager.get_ai_action("Edited text", lambda: "Diff text")
 
         assert result == "exit"
 
@@ -91,12 +91,56 @@ def test_get_ai_action_invalid(ui_manager):
     """Test getting AI action with invalid response."""
     with patch("builtins.input", side_effect=["invalid", "a"]):
         with patch("builtins.print") as mock_print:
-            result = ui_manager.get_ai_action("Edited text", "Diff text")
+            result = ui_manager.get_ai_action("Edited text", lambda: "Diff text")
 
             assert result == "accept"
             mock_print.assert_any_call("Invalid action. Please try again.")
 
 
+def test_get_ai_action_streamed(ui_manager):
+    """Test that a streamed edit is not displayed a second time."""
+    with patch("builtins.input", return_value="a"):
+        with patch.object(UIManager, "display_edited") as mock_display_edited:
+            result = ui_manager.get_ai_action("Edited text", lambda: "Diff text", True)
+
+            assert result == "accept"
+            mock_display_edited.assert_not_called()
+
+
+def test_get_ai_action_markup(ui_manager):
+    """Test that the diff is only computed when markup is requested."""
+    get_diff = MagicMock(return_value="Diff text")
+    with patch("builtins.input", side_effect=["m", "a"]):
+        with patch.object(UIManager, "display_markup") as mock_display_markup:
+            with patch.object(UIManager, "display_edited"):
+                result = ui_manager.get_ai_action("Edited text", get_diff)
+
+                assert result == "accept"
+                get_diff.assert_called_once_with()
+                mock_display_markup.assert_called_once_with("Diff text")
+
+
+def test_get_ai_action_no_markup(ui_manager):
+    """Test that the diff is not computed if markup is never requested."""
+    get_diff = MagicMock(return_value="Diff text")
+    with patch("builtins.input", return_value="a"):
+        with patch.object(UIManager, "display_edited"):
+            ui_manager.get_ai_action("Edited text", get_diff)
+
+            get_diff.assert_not_called()
+
+
+def test_stream_display(ui_manager):
+    """Test displaying a streamed edit and its timings."""
+    with patch("builtins.print") as mock_print:
+        ui_manager.start_stream()
+        ui_manager.display_token("Hello")
+        ui_manager.end_stream(0.25, 1.5)
+
+        mock_print.assert_any_call("Hello", end="", flush=True)
+        mock_print.assert_any_call("First token: 0.25s / Total: 1.50s\n")
+
+
 def test_get_section_prompt(ui_manager):
     """Test getting section prompt."""
     with patch("builtins.input", return_value="Test section prompt"):
@@ -157,3 +201,45 @@ def test_show_completion_message(ui_manager):
         ui_manager.show_completion_message()
 
         mock_print.assert_called_once_with("All sections have been processed.")
+
+
+def test_display_candidate(ui_manager):
+    """Test displaying an alternative edit."""
+    with patch("builtins.print") as mock_print:
+        ui_manager.display_candidate(2, "temperature 0.6", "Candidate text")
+
+        mock_print.assert_any_call(
+            "\n[PURPLE]=== CANDIDATE 2 (temperature 0.6) ===[RESET]"
+        )
+        mock_print.assert_any_call("\nCandidate text\n")
+
+
+def test_choose_candidate(ui_manager):
+    """Test that only the listed candidates can be chosen."""
+    with patch("builtins.input", side_effect=["2", "x", "3"]):
+        with patch("builtins.print") as mock_print:
+            result = ui_manager.choose_candidate([1, 3])
+
+            assert result == 3
+            assert mock_print.call_count == 2
+            mock_print.assert_any_call("Invalid candidate. Please try again.")
+
+
+def test_choose_candidate_cancel(ui_manager):
+    """Test canceling the choice of a candidate."""
+    with patch("builtins.input", return_value=""):
+        with patch("builtins.print"):
+            assert ui_manager.choose_candidate([1, 2]) is None
+
+
+def test_get_failure_action(ui_manager):
+    """Test choosing to retry after a failed request, past an invalid answer."""
+    with patch("builtins.input", side_effect=["invalid", "r"]):
+        with patch("builtins.print") as mock_print:
+            result = ui_manager.get_failure_action(ValueError("Service unavailable"))
+
+            assert result == "retry"
+            mock_print.assert_any_call(
+                "\n[RED]Request failed: Service unavailable[RESET]\n"
+            )
+            mock_print.assert_any_call("Invalid action. Please try again.")